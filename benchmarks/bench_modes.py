@@ -0,0 +1,188 @@
+"""Benchmark offline cho mọi chế độ trích xuất (all, recent, quick, deep, deep-process, api, aio).
+
+Không cần mạng: Data API được trả lời bởi ``offline_stub.StubApiServer`` (HTTP cục bộ,
+response ghi sẵn trong ``fixtures/api/``), còn yt-dlp phát lại info dict đã ghi ở tầng
+extractor (xem ``offline_stub.install_ytdlp_replay``). Mỗi cặp (chế độ, số video) chạy
+trong một tiến trình con riêng để đo bộ nhớ đỉnh không bị lẫn giữa các lần.
+
+``deep`` và ``deep-process`` là cùng chế độ popular deep trên cùng fixture, khác backend lấy
+lượt xem (luồng / tiến trình con, ``cue_procpool``); ``--page-kb`` thêm chi phí phân tích trang
+video để thấy khác biệt về CPU. Thời gian ``deep-process`` gồm cả khởi động tiến trình con.
+
+    python benchmarks/bench_modes.py --sizes 100,1000,10000,50000 --workers 8
+    python benchmarks/bench_modes.py --modes api,deep --sizes 5000 --latency-ms 20 --json out.json
+    python benchmarks/bench_modes.py --modes deep,deep-process --sizes 2000 --page-kb 400
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import functools
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import offline_stub  # noqa: E402
+
+
+MODES = ("all", "recent", "quick", "deep", "deep-process", "api", "aio")
+DEFAULT_SIZES = (100, 1000, 10000, 50000)
+
+
+def _engine_kwargs(mode, top):
+    if mode == "all":
+        return {"extract_type": "all"}
+    if mode == "recent":
+        return {"extract_type": "recent", "video_count": top}
+    if mode == "quick":
+        return {"extract_type": "popular", "video_count": top, "quick_popular": True}
+    if mode in ("deep", "deep-process"):
+        return {"extract_type": "popular", "video_count": top}
+    return {"extract_type": "popular", "video_count": top, "use_api": True, "api_key": "bench"}
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:        # Windows: dùng tracemalloc (chỉ tính bộ nhớ Python)
+        import tracemalloc
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20 if tracemalloc.is_tracing() else None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(mode, size, api_base, workers, top, latency, max_rate, page_kb=0, processes=None):
+    """Chạy một chế độ trên kênh giả lập ``size`` video (trong tiến trình hiện tại)."""
+    try:
+        import resource  # noqa: F401
+    except ImportError:
+        import tracemalloc
+        tracemalloc.start()
+    offline_stub.install_ytdlp_replay(latency, page_kb)
+
+    import cue_engine
+    from cue_engine import YoutubeExtractor
+    from cue_ratelimit import AdaptiveLimiter
+
+    cue_engine.API_BASE = api_base
+    base_rss = _peak_rss_mb()
+    if mode == "aio":
+        # Popular qua Data API bằng engine asyncio (cue_aio)
+        from cue_aio import AsyncApiEngine
+        engine = AsyncApiEngine("bench", "popular", video_count=top, concurrency=workers)
+        t0 = time.perf_counter()
+        results = sum(len(r.results) for r in engine.run_sync([offline_stub.channel_id(size)]))
+    else:
+        backend = {}
+        if mode == "deep-process":
+            # Tiến trình con cũng phải phát lại fixture (không kế thừa được khi dùng spawn)
+            from cue_procpool import ViewProcessPool
+            setup = functools.partial(offline_stub.install_ytdlp_replay, latency, page_kb)
+            backend = {"backend": "process",
+                       "process_pool": ViewProcessPool(processes or workers, setup=setup)}
+        engine = YoutubeExtractor(
+            offline_stub.channel_id(size), workers=workers, cache=None,
+            limiter=AdaptiveLimiter(workers, max_rate=max_rate),
+            api_limiter=AdaptiveLimiter(workers),
+            **_engine_kwargs(mode, top), **backend,
+        )
+        t0 = time.perf_counter()
+        results = sum(1 for _ in engine.iter_results())
+        if engine.process_pool is not None:
+            engine.process_pool.close()
+    seconds = time.perf_counter() - t0
+    peak = _peak_rss_mb()
+    videos = engine.metrics.counters.get("videos") or results
+    return {
+        "mode": mode,
+        "size": size,
+        "results": results,
+        "videos": videos,
+        "seconds": round(seconds, 4),
+        "videos_per_second": round(videos / seconds, 1) if seconds > 0 else None,
+        "peak_rss_mb": round(peak, 1) if peak is not None else None,
+        "rss_growth_mb": round(peak - base_rss, 1) if peak is not None else None,
+        "summary": engine.metrics.summary(),
+        "metrics": engine.metrics.snapshot(),
+    }
+
+
+def _spawn(mode, size, api_base, args):
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", mode, str(size), api_base,
+           "--workers", str(args.workers), "--top", str(args.top),
+           "--latency-ms", str(args.latency_ms), "--max-rate", str(args.max_rate),
+           "--page-kb", str(args.page_kb), "--processes", str(args.processes or args.workers)]
+    env = dict(os.environ, NO_PROXY="127.0.0.1,localhost", no_proxy="127.0.0.1,localhost")
+    proc = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8", env=env)
+    if proc.returncode != 0:
+        return {"mode": mode, "size": size, "error": (proc.stderr.strip().splitlines() or ["?"])[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _print_row(row):
+    if "error" in row:
+        print(f"{row['mode']:<13}{row['size']:>8}  LỖI: {row['error']}", flush=True)
+        return
+    rss = "-" if row["peak_rss_mb"] is None else f"{row['peak_rss_mb']:.1f}"
+    print(f"{row['mode']:<13}{row['size']:>8}{row['seconds']:>10.3f}{row['videos_per_second']:>12.1f}"
+          f"{rss:>10}  {row['summary']}", flush=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--child", nargs=3, metavar=("MODE", "SIZE", "API_BASE"), help=argparse.SUPPRESS)
+    ap.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                    help="Số video của các kênh giả lập, cách nhau bằng dấu phẩy")
+    ap.add_argument("--modes", default=",".join(MODES), help=f"Chế độ cần đo (trong {', '.join(MODES)})")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--top", type=int, default=50, help="N cho recent/popular")
+    ap.add_argument("--latency-ms", type=float, default=0.0,
+                    help="Độ trễ giả lập mỗi request (mặc định 0: chỉ đo chi phí CPU)")
+    ap.add_argument("--max-rate", type=float, default=0.0,
+                    help="Giới hạn request/giây tới trang video (mặc định 0: không giới hạn)")
+    ap.add_argument("--page-kb", type=int, default=0,
+                    help="Cỡ trang video giả (KB) phải phân tích mỗi video (mặc định 0: bỏ qua)")
+    ap.add_argument("--processes", type=int, default=None,
+                    help="Số tiến trình con cho deep-process (mặc định = --workers)")
+    ap.add_argument("--json", metavar="PATH", help="Ghi toàn bộ kết quả (kèm metrics) ra JSON")
+    args = ap.parse_args(argv)
+    latency = args.latency_ms / 1000.0
+
+    if args.child:
+        mode, size, api_base = args.child
+        row = run_case(mode, int(size), api_base, args.workers, args.top, latency, args.max_rate,
+                       args.page_kb, args.processes)
+        print(json.dumps(row, ensure_ascii=False))
+        return 0
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = sorted(set(modes) - set(MODES))
+    if unknown:
+        ap.error(f"Chế độ không hợp lệ: {', '.join(unknown)}")
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    server = offline_stub.StubApiServer(latency=latency).start()
+    rows = []
+    try:
+        print(f"workers={args.workers} top={args.top} latency_ms={args.latency_ms} "
+              f"max_rate={args.max_rate} page_kb={args.page_kb}")
+        print(f"{'mode':<13}{'videos':>8}{'seconds':>10}{'video/s':>12}{'rss MB':>10}  metrics")
+        for mode in modes:
+            for size in sizes:
+                row = _spawn(mode, size, server.base_url, args)
+                rows.append(row)
+                _print_row(row)
+    finally:
+        server.stop()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+    return 1 if any("error" in r for r in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
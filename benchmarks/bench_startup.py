@@ -0,0 +1,107 @@
+"""Đo thời gian mở giao diện (``project 1.py``): import, cửa sổ hiện ra, ảnh nền sẵn sàng.
+
+Mỗi lần đo chạy một tiến trình Python mới (import thật sự lạnh trong tiến trình).
+Lần đầu dùng thư mục cache trống (ảnh nền phải giải mã + thu nhỏ), các lần sau dùng lại
+ảnh nền đã cache. Mặc định chạy Qt ở chế độ ``offscreen`` để đo được trên máy không màn hình.
+
+    python benchmarks/bench_startup.py --runs 7
+    python benchmarks/bench_startup.py --runs 5 --platform windows --json startup.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUI = os.path.join(ROOT, "project 1.py")
+
+
+def child():
+    t0 = time.perf_counter()
+    import importlib.util
+    sys.path.insert(0, ROOT)
+    spec = importlib.util.spec_from_file_location("cue_gui", GUI)
+    gui = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gui)
+    t_import = time.perf_counter()
+
+    # Móc vào apply_background trước khi tạo cửa sổ: luồng nền bắt đầu ngay trong
+    # __init__ và có thể phát ``loaded`` trước cả show() (ảnh đã scale nằm sẵn trong cache)
+    ready = []
+    apply_background = gui.YoutubeUrlExtractor.apply_background
+
+    def applied(self, image):
+        apply_background(self, image)
+        ready.append(time.perf_counter())
+
+    gui.YoutubeUrlExtractor.apply_background = applied
+
+    app = gui.QApplication([])
+    window = gui.YoutubeUrlExtractor()
+    window.show()
+    app.processEvents()
+    t_shown = time.perf_counter()
+
+    window.background_loader.wait(10000)
+    deadline = time.perf_counter() + 10
+    while not ready and time.perf_counter() < deadline:
+        app.processEvents()
+    t_bg = ready[0] if ready else None
+    print(json.dumps({
+        "import": t_import - t0,
+        "shown": t_shown - t0,
+        "background": (t_bg - t0) if t_bg else None,
+        "heavy_modules": sorted(m for m in ("yt_dlp", "pandas", "openpyxl", "pyarrow")
+                                if m in sys.modules),
+    }))
+    return 0
+
+
+def _median(rows, key):
+    values = [r[key] for r in rows if r.get(key) is not None]
+    return statistics.median(values) * 1000 if values else float("nan")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--runs", type=int, default=5, help="Số lần đo (mỗi lần một tiến trình mới)")
+    ap.add_argument("--platform", default="offscreen", help="QT_QPA_PLATFORM (mặc định offscreen)")
+    ap.add_argument("--json", metavar="PATH", help="Ghi số liệu từng lần ra JSON")
+    args = ap.parse_args(argv)
+    if args.child:
+        return child()
+
+    cache_dir = tempfile.mkdtemp(prefix="cue_startup_")
+    env = dict(os.environ, QT_QPA_PLATFORM=args.platform, CUE_CACHE_DIR=cache_dir)
+    rows = []
+    for i in range(max(1, args.runs)):
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child"],
+                              capture_output=True, text=True, env=env)
+        if proc.returncode != 0:
+            print(proc.stderr, file=sys.stderr)
+            return 1
+        row = json.loads(proc.stdout.strip().splitlines()[-1])
+        row["run"] = i
+        rows.append(row)
+
+    cold, warm = rows[0], rows[1:] or rows
+    print(f"{'':<20}{'import':>10}{'shown':>10}{'background':>12}  (ms)")
+    print(f"{'lần đầu (cache trống)':<20}{cold['import'] * 1000:>10.0f}{cold['shown'] * 1000:>10.0f}"
+          f"{(cold['background'] or float('nan')) * 1000:>12.0f}")
+    print(f"{'các lần sau (median)':<20}{_median(warm, 'import'):>10.0f}{_median(warm, 'shown'):>10.0f}"
+          f"{_median(warm, 'background'):>12.0f}")
+    print("module nặng đã nạp lúc mở:", ", ".join(cold["heavy_modules"]) or "không có")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""So sánh cách lấy view_count cũ (YoutubeDL mới + extract_info đầy đủ mỗi video)
+với ``cue_views.ViewCountFetcher``, hoàn toàn offline.
+
+Mạng được thay bằng fixture ``fixtures/watch_info.json`` (info dict dạng YoutubeIE):
+``YoutubeIE._real_extract`` trả về bản sao fixture, có thể thêm độ trễ giả lập.
+
+    python benchmarks/bench_view_counts.py --videos 500 --workers 8 --latency-ms 0
+"""
+import os
+import sys
+import copy
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yt_dlp  # noqa: E402
+from yt_dlp.extractor.youtube import YoutubeIE  # noqa: E402
+
+from cue_views import ViewCountFetcher  # noqa: E402
+
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "watch_info.json")
+
+
+def install_fixture(latency_s):
+    with open(FIXTURE, encoding="utf-8") as f:
+        recorded = json.load(f)
+
+    def fake_real_extract(self, url):
+        vid = self._match_id(url)
+        if latency_s:
+            time.sleep(latency_s)
+        info = copy.deepcopy(recorded)
+        info["id"] = vid
+        info["webpage_url"] = url
+        info["view_count"] = sum(map(ord, vid))
+        return info
+
+    YoutubeIE._real_extract = fake_real_extract
+
+
+def legacy_fetch(vid):
+    """Bản gốc của _fetch_views_single: tạo YoutubeDL mới, xử lý đầy đủ."""
+    opts = {"quiet": True, "no_warnings": True, "ignoreerrors": True, "extract_flat": False}
+    try:
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            info = ydl.extract_info(f"https://www.youtube.com/watch?v={vid}", download=False)
+        return int(info.get("view_count") or 0)
+    except Exception:
+        return 0
+
+
+def run(fn, ids, workers):
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        views = list(ex.map(fn, ids))
+    return time.perf_counter() - t0, views
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--videos", type=int, default=300)
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--latency-ms", type=float, default=0.0,
+                    help="Độ trễ giả lập cho mỗi lần extract (mặc định 0: chỉ đo chi phí CPU)")
+    args = ap.parse_args(argv)
+
+    install_fixture(args.latency_ms / 1000.0)
+    ids = [f"vid{i:08d}"[:11] for i in range(args.videos)]
+
+    legacy_t, legacy_views = run(legacy_fetch, ids, args.workers)
+    fetcher = ViewCountFetcher()
+    try:
+        light_t, light_views = run(fetcher.fetch, ids, args.workers)
+    finally:
+        fetcher.close()
+
+    assert legacy_views == light_views, "Kết quả view_count khác nhau giữa hai cách"
+    n = len(ids)
+    print(f"videos={n} workers={args.workers} latency_ms={args.latency_ms}")
+    print(f"legacy : {legacy_t:8.3f}s  {n / legacy_t:9.1f} video/s")
+    print(f"light  : {light_t:8.3f}s  {n / light_t:9.1f} video/s")
+    print(f"speedup: {legacy_t / light_t:8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
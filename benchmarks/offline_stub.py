@@ -0,0 +1,230 @@
+"""Kênh YouTube giả lập để benchmark offline.
+
+- ``StubApiServer``: HTTP server cục bộ trả lời ``channels``, ``playlistItems`` và
+  ``videos`` của Data API v3 dựa trên các response đã ghi trong ``fixtures/api/``
+  (chỉ thay ID, số lượng và pageToken), có gzip và keep-alive như API thật.
+- ``install_ytdlp_replay``: thay ``_real_extract`` của ``YoutubeTabIE`` / ``YoutubeIE``
+  để yt-dlp trả về info dict đã ghi (``fixtures/playlist_entry.json``,
+  ``fixtures/watch_info.json``) thay vì gọi mạng. Uploads playlist được trả dần theo
+  trang 100 video như YouTube. ``page_kb`` > 0 thêm chi phí phân tích trang video: mỗi
+  video phải regex + ``json.loads`` một trang HTML giả cỡ ``page_kb`` KB, như yt-dlp tách
+  ``ytInitialPlayerResponse`` khỏi trang thật (để so backend luồng / tiến trình).
+
+Kích thước kênh được mã hoá trong Channel ID: ``channel_id(5000)`` là kênh 5.000 video.
+"""
+import copy
+import gzip
+import heapq
+import json
+import os
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PLAYLIST_PAGE = 100
+
+
+def channel_id(size):
+    return f"UCbench{size:017d}"
+
+
+def channel_size(any_id):
+    """Số video của kênh từ UC…/UU… giả lập."""
+    m = re.search(r"(?:UC|UU)bench(\d{17})", any_id or "")
+    return int(m.group(1)) if m else 0
+
+
+def video_id(i):
+    return f"v{i:010d}"
+
+
+def video_index(vid):
+    return int(vid[1:])
+
+
+def view_count(i):
+    # Phân bố giả ngẫu nhiên nhưng cố định để kết quả top N lặp lại được
+    return (i * 2654435761) % 9999991
+
+
+def _load(*parts):
+    with open(os.path.join(FIXTURES, *parts), encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ---------- Data API stub ----------
+class _ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        parts = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(parts.query))
+        endpoint = parts.path.rsplit("/", 1)[-1]
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        with server.lock:
+            server.requests[endpoint] = server.requests.get(endpoint, 0) + 1
+        build = getattr(server, f"_{endpoint}", None)
+        if build is None:
+            self._send(404, {"error": {"code": 404, "message": "Not Found", "errors": []}})
+            return
+        self._send(200, build(params))
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        gz = "gzip" in (self.headers.get("Accept-Encoding") or "")
+        if gz:
+            body = gzip.compress(body, compresslevel=5)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        if gz:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubApiServer(ThreadingHTTPServer):
+    """Data API v3 giả lập; ``base_url`` dùng làm ``cue_engine.API_BASE``."""
+
+    daemon_threads = True
+
+    def __init__(self, latency=0.0, host="127.0.0.1", port=0):
+        super().__init__((host, port), _ApiHandler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = {}
+        self._tpl_channels = _load("api", "channels.json")
+        self._tpl_items = _load("api", "playlistItems.json")
+        self._tpl_videos = _load("api", "videos.json")
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/youtube/v3"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def _channels(self, params):
+        uc = params.get("id", "")
+        size = channel_size(uc)
+        data = copy.deepcopy(self._tpl_channels)
+        item = data["items"][0]
+        item["contentDetails"]["relatedPlaylists"]["uploads"] = "UU" + uc[2:]
+        item["statistics"]["videoCount"] = str(size)
+        return data
+
+    def _playlistItems(self, params):
+        size = channel_size(params.get("playlistId"))
+        start = int(params.get("pageToken") or 0)
+        end = min(size, start + int(params.get("maxResults") or 5))
+        item_tpl = self._tpl_items["items"][0]
+        items = []
+        for i in range(start, end):
+            item = copy.deepcopy(item_tpl)
+            item["contentDetails"]["videoId"] = video_id(i)
+            items.append(item)
+        data = {"items": items}
+        if end < size:
+            data["nextPageToken"] = str(end)
+        return data
+
+    def _videos(self, params):
+        item_tpl = self._tpl_videos["items"][0]
+        items = []
+        for vid in filter(None, params.get("id", "").split(",")):
+            item = copy.deepcopy(item_tpl)
+            item["id"] = vid
+            item["statistics"]["viewCount"] = str(view_count(video_index(vid)))
+            items.append(item)
+        return {"items": items}
+
+
+# ---------- yt-dlp replay ----------
+def _watch_page(watch_tpl, page_kb):
+    blob = json.dumps(watch_tpl)
+    player = json.dumps({"videoDetails": watch_tpl,
+                         "padding": [blob] * max(1, page_kb * 1024 // len(blob))})
+    return f"<html><script>var ytInitialPlayerResponse = {player};</script></html>"
+
+
+def install_ytdlp_replay(latency=0.0, page_kb=0):
+    """Thay extractor YouTube của yt-dlp bằng bản phát lại fixture (trong tiến trình hiện tại)."""
+    from yt_dlp.extractor.youtube import YoutubeIE, YoutubeTabIE
+
+    entry_tpl = _load("playlist_entry.json")
+    watch_tpl = _load("watch_info.json")
+    page = _watch_page(watch_tpl, page_kb) if page_kb else None
+
+    def entry(i, uc):
+        e = copy.deepcopy(entry_tpl)
+        vid = video_id(i)
+        e["id"] = vid
+        e["url"] = f"https://www.youtube.com/watch?v={vid}"
+        e["title"] = f"Bench video {i}"
+        e["view_count"] = view_count(i)
+        e["channel_id"] = uc
+        e["channel_url"] = f"https://www.youtube.com/channel/{uc}"
+        e["thumbnails"] = [dict(t, url=t["url"].replace("VIDEO_ID", vid)) for t in e["thumbnails"]]
+        return e
+
+    def paged_entries(size, uc):
+        for start in range(0, size, PLAYLIST_PAGE):
+            if latency:
+                time.sleep(latency)        # mỗi trang là một request
+            for i in range(start, min(size, start + PLAYLIST_PAGE)):
+                yield entry(i, uc)
+
+    def tab_extract(self, url):
+        size = channel_size(url)
+        uc = "UC" + re.search(r"(?:UC|UU)(bench\d{17})", url).group(1)
+        if "sort=p" in url:
+            # Tab Popular: YouTube chỉ trả vài chục video nhiều lượt xem nhất
+            if latency:
+                time.sleep(latency)
+            top = heapq.nlargest(min(size, 60), range(size), key=view_count)
+            entries = [entry(i, uc) for i in top]
+        else:
+            entries = paged_entries(size, uc)
+        return {
+            "_type": "playlist",
+            "id": "UU" + uc[2:],
+            "title": "Uploads from Bench Channel",
+            "channel_id": uc,
+            "webpage_url": url,
+            "entries": entries,
+        }
+
+    def watch_extract(self, url):
+        vid = self._match_id(url)
+        if latency:
+            time.sleep(latency)
+        if page is not None:
+            m = re.search(r"ytInitialPlayerResponse = ({.+?});</script>", page)
+            info = json.loads(m.group(1))["videoDetails"]
+        else:
+            info = copy.deepcopy(watch_tpl)
+        info["id"] = vid
+        info["webpage_url"] = url
+        info["view_count"] = view_count(video_index(vid))
+        info["title"] = f"Bench video {video_index(vid)}"
+        return info
+
+    YoutubeTabIE._real_extract = tab_extract
+    YoutubeIE._real_extract = watch_extract
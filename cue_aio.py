@@ -0,0 +1,573 @@
+"""Engine bất đồng bộ (asyncio) cho đường YouTube Data API, chạy nhiều kênh cùng lúc.
+
+Pipeline ``channels`` → ``playlistItems`` → ``videos`` của mọi kênh chạy trên một event
+loop duy nhất: mỗi request đang chờ chỉ là một coroutine (vài KB) thay vì một luồng
+với stack riêng. Số request đang bay được giới hạn bằng semaphore toàn cục
+(``concurrency``), số kênh xử lý cùng lúc bằng ``channel_concurrency``.
+
+- ``AsyncHttpClient``: GET HTTP/1.1 tối giản trên asyncio streams (keep-alive theo host,
+  gzip, chunked, thử lại 429/5xx như ``cue_http.HttpClient``), không cần thư viện ngoài.
+- ``AsyncApiEngine``: all / recent / popular cho danh sách kênh; quota, xoay vòng key,
+  huỷ / tạm dừng (``JobControl``) và số liệu (``Metrics``) giống ``YoutubeExtractor``.
+
+Engine chạy trọn trong luồng gọi ``run_sync()`` (vd. ``QThread`` của giao diện); các
+callback được gọi trong luồng đó, còn ``cancel()/pause()/resume()`` gọi được từ luồng khác.
+"""
+import asyncio
+import gzip
+import json
+import math
+import re
+import time
+import urllib.parse
+import urllib.request
+
+import cue_engine
+from cue_batch import ChannelResult
+from cue_columns import VideoColumns
+from cue_control import Cancelled, JobControl
+from cue_engine import VideoResult, watch_url
+from cue_http import HttpClient, HttpError, RETRY_STATUSES
+from cue_metrics import Metrics
+from cue_progress import ProgressTracker
+from cue_quota import (KeyRing, QuotaMeter, QuotaExhausted, QUOTA_REASONS, RATE_LIMIT_REASONS,
+                       PAGE_SIZE)
+from cue_store import channel_of_playlist
+from cue_topk import TopK
+
+
+class _Conn:
+    def __init__(self, reader, writer, absolute=False):
+        self.reader = reader
+        self.writer = writer
+        # Đi qua proxy HTTP (không tunnel): dòng request dùng URL đầy đủ
+        self.absolute = absolute
+
+    def close(self):
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+
+class AsyncHttpClient:
+    """Client GET/JSON cho asyncio; giữ kết nối keep-alive rảnh theo (scheme, host, port)."""
+
+    def __init__(self, timeout=15.0, max_retries=4, backoff=0.5, max_backoff=30.0,
+                 user_agent="CUE/1.0 (gzip)", max_idle=256):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.user_agent = user_agent
+        self.max_idle = max_idle
+        self._idle = {}
+        self._ssl = None
+        self._proxies = urllib.request.getproxies()
+
+    # Cùng công thức backoff / Retry-After với client đồng bộ
+    _delay = HttpClient._delay
+
+    # ---------- connections ----------
+    def _ssl_context(self):
+        if self._ssl is None:
+            import ssl
+            self._ssl = ssl.create_default_context()
+        return self._ssl
+
+    async def _open(self, scheme, host, port):
+        proxy = self._proxies.get(scheme)
+        if proxy and not urllib.request.proxy_bypass(host):
+            p = urllib.parse.urlsplit(proxy)
+            reader, writer = await asyncio.open_connection(p.hostname, p.port or 80)
+            conn = _Conn(reader, writer, absolute=scheme != "https")
+            if scheme == "https":
+                try:
+                    writer.write(f"CONNECT {host}:{port} HTTP/1.1\r\nHost: {host}:{port}\r\n\r\n"
+                                 .encode("ascii"))
+                    await writer.drain()
+                    head = await reader.readuntil(b"\r\n\r\n")
+                    status = int(head.split(None, 2)[1])
+                    if status != 200:
+                        raise OSError(f"Proxy từ chối CONNECT: HTTP {status}")
+                    if not hasattr(writer, "start_tls"):
+                        raise OSError("Cần Python 3.11+ để đi qua proxy HTTPS.")
+                    await writer.start_tls(self._ssl_context(), server_hostname=host)
+                except BaseException:
+                    conn.close()
+                    raise
+            return conn
+        ssl_ctx = self._ssl_context() if scheme == "https" else None
+        reader, writer = await asyncio.open_connection(host, port, ssl=ssl_ctx)
+        return _Conn(reader, writer)
+
+    def _take(self, key):
+        idle = self._idle.get(key)
+        while idle:
+            conn = idle.pop()
+            if not conn.reader.at_eof() and not conn.writer.is_closing():
+                return conn
+            conn.close()
+        return None
+
+    def _put(self, key, conn):
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.max_idle:
+            idle.append(conn)
+        else:
+            conn.close()
+
+    async def close(self):
+        idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    # ---------- requests ----------
+    @staticmethod
+    async def _read_response(reader):
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        version, status, reason = (lines[0].split(" ", 2) + [""])[:3]
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+        status = int(status)
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if status in (204, 304):
+            body = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return status, reason, headers, body, keep_alive
+
+    async def _request(self, scheme, host, port, target):
+        key = (scheme, host, port)
+        conn = self._take(key) or await self._open(scheme, host, port)
+        default_port = 443 if scheme == "https" else 80
+        host_header = host if port == default_port else f"{host}:{port}"
+        if conn.absolute:
+            target = f"{scheme}://{host_header}{target}"
+        request = (f"GET {target} HTTP/1.1\r\n"
+                   f"Host: {host_header}\r\n"
+                   f"User-Agent: {self.user_agent}\r\n"
+                   "Accept: application/json\r\n"
+                   "Accept-Encoding: gzip\r\n"
+                   "Connection: keep-alive\r\n\r\n")
+        try:
+            conn.writer.write(request.encode("latin-1"))
+            await conn.writer.drain()
+            status, reason, headers, body, keep_alive = await self._read_response(conn.reader)
+        except BaseException:
+            # Lỗi / timeout / bị huỷ giữa chừng: kết nối không còn dùng lại được
+            conn.close()
+            raise
+        if keep_alive:
+            self._put(key, conn)
+        else:
+            conn.close()
+        return status, reason, headers, body
+
+    async def get(self, url, params=None, on_retry=None, on_response=None):
+        """GET và trả về body (đã giải nén); hook giống ``HttpClient.get``."""
+        if params:
+            url = f"{url}?{urllib.parse.urlencode(params)}"
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme
+        port = parts.port or (443 if scheme == "https" else 80)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        attempt = 0
+        while True:
+            try:
+                status, reason, headers, body = await asyncio.wait_for(
+                    self._request(scheme, parts.hostname, port, target), self.timeout)
+            except (OSError, EOFError, asyncio.TimeoutError, asyncio.LimitOverrunError, ValueError):
+                # Kết nối keep-alive bị server đóng / lỗi mạng / quá thời gian: thử lại
+                if attempt >= self.max_retries:
+                    raise
+                if on_retry:
+                    on_retry()
+                await asyncio.sleep(self._delay(attempt))
+                attempt += 1
+                continue
+
+            if on_response:
+                on_response(status, len(body))
+            if headers.get("content-encoding", "").lower() == "gzip":
+                body = gzip.decompress(body)
+            if 200 <= status < 300:
+                return body
+            if status in RETRY_STATUSES and attempt < self.max_retries:
+                if on_retry:
+                    on_retry()
+                await asyncio.sleep(self._delay(attempt, headers.get("retry-after")))
+                attempt += 1
+                continue
+            raise HttpError(status, reason, body, url)
+
+    async def get_json(self, url, params=None, **hooks):
+        return json.loads((await self.get(url, params, **hooks)).decode("utf-8"))
+
+
+class AsyncApiEngine:
+    """Chạy một chế độ (all/recent/popular) qua Data API cho nhiều kênh trên một event loop.
+
+    ``on_results(rows)`` nhận từng nhóm ``VideoResult`` ngay khi có (all/recent: mỗi trang,
+    popular: bảng xếp hạng khi kênh xong); ``on_channel_done(ChannelResult)`` khi một kênh
+    kết thúc; ``on_progress(current, total)`` là tiến trình gộp của mọi kênh (đã gộp theo
+    thời gian như ``YoutubeExtractor``). Kênh lỗi được thử lại ``max_retries`` lần.
+    """
+
+    def __init__(self, api_key, extract_type="popular", video_count=None,
+                 concurrency=64, channel_concurrency=16, max_retries=2, backoff=2.0,
+                 http=None, quota=None, cache=None, control=None, metrics=None,
+                 on_progress=None, on_results=None, on_channel_done=None,
+                 progress_interval=0.05, store=None, views_max_age=None):
+        if extract_type not in cue_engine.EXTRACT_TYPES:
+            raise RuntimeError("Kiểu lấy video không hợp lệ.")
+        self.api_keys = KeyRing.parse(api_key)
+        if not self.api_keys:
+            raise RuntimeError("Thiếu API key cho YouTube Data API.")
+        self.api_key = self.api_keys.keys[0]
+        self.extract_type = extract_type
+        self.video_count = int(video_count) if video_count else None
+        self.concurrency = max(1, int(concurrency))
+        self.channel_concurrency = max(1, int(channel_concurrency))
+        self.max_retries = max(0, int(max_retries))
+        self.backoff = float(backoff)
+        # cue_aio.AsyncHttpClient (cấu hình timeout/thử lại); None = tạo mới mỗi lần run()
+        self.http = http
+        self.quota = quota or QuotaMeter()
+        # cue_cache.Cache (tùy chọn) cho bước resolve đầu vào không phải UC/@handle
+        self.cache = cache
+        # cue_store.VideoStore (tùy chọn): popular ghi lượt xem vào kho; có views_max_age (giây)
+        # thì bỏ qua video có lượt xem chưa quá tuổi đó trong kho
+        self.store = store
+        self.views_max_age = views_max_age
+        self.control = control or JobControl()
+        self.metrics = metrics or Metrics()
+        self.progress = ProgressTracker(on_progress, interval=progress_interval)
+        self.on_results = on_results
+        self.on_channel_done = on_channel_done
+        # Cùng tên thuộc tính với YoutubeExtractor để giao diện / CLI báo cáo như nhau
+        self.resumed = 0
+        self.unavailable_videos = 0
+        self.failed_videos = 0
+        self.api_fallback_reason = None
+        self.channels_done = 0
+        self._done = 0
+        self._known = 0
+        self._sem = None
+
+    # ---------- cancel / pause (gọi được từ luồng khác) ----------
+    def cancel(self):
+        self.control.cancel()
+
+    def pause(self):
+        self.control.pause()
+
+    def resume(self):
+        self.control.resume()
+
+    @property
+    def cancelled(self):
+        return self.control.cancelled
+
+    async def _check(self):
+        # Không chặn event loop như JobControl.check(): tạm dừng thì nhường lại loop
+        while self.control.paused:
+            await asyncio.sleep(0.1)
+        if self.control.cancelled:
+            raise Cancelled("Job đã bị huỷ.")
+
+    async def _sleep(self, seconds):
+        deadline = time.monotonic() + seconds
+        while True:
+            await self._check()
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return
+            await asyncio.sleep(min(left, 0.25))
+
+    def _advance(self, prog, done=0, known=None):
+        """Cộng tiến trình của một kênh; ``prog`` = [done, known] riêng của kênh đó.
+
+        ``known`` là tổng dự kiến của kênh (đặt lại, không cộng dồn) nên thử lại kênh không
+        làm tổng tăng thêm.
+        """
+        if known is not None:
+            self._known += known - prog[1]
+            prog[1] = known
+        prog[0] += done
+        self._done += done
+        self.progress.update(self._done, max(self._known, self._done))
+
+    def _restart(self, prog):
+        # Lần thử mới của kênh làm lại từ đầu: bỏ phần "đã xong" của lần thử trước
+        self._done -= prog[0]
+        prog[0] = 0
+
+    # ---------- requests ----------
+    async def _get(self, endpoint, params):
+        """Như ``YoutubeExtractor._http_get_json``: xoay key khi hết quota, chờ khi bị giới hạn."""
+        # Đọc lúc gọi để benchmark offline đổi được cue_engine.API_BASE
+        url = f"{cue_engine.API_BASE}/{endpoint}"
+        rate_limited = 0
+        while True:
+            await self._check()
+            key = self.api_keys.acquire()
+            self.api_keys.record(key, self.quota.charge(endpoint))
+            delay = None
+            async with self._sem:
+                started = time.monotonic()
+                received = [0]
+                hooks = {
+                    "on_retry": lambda: self.metrics.count("retries_http"),
+                    "on_response": lambda status, n: received.__setitem__(0, received[0] + n),
+                }
+                try:
+                    data = await self.http.get_json(url, dict(params, key=key), **hooks)
+                    self.metrics.observe(endpoint, time.monotonic() - started, nbytes=received[0])
+                    return data
+                except HttpError as e:
+                    self.metrics.observe(endpoint, time.monotonic() - started, ok=False, nbytes=received[0])
+                    reasons = e.api_reasons()
+                    if e.status == 403 and any(r in QUOTA_REASONS for r in reasons):
+                        self.api_keys.mark_exhausted(key)
+                        self.metrics.count("api_key_exhausted")
+                        continue
+                    if e.status == 403 and any(r in RATE_LIMIT_REASONS for r in reasons) and rate_limited < 5:
+                        self.metrics.count("retries_api_rate_limit")
+                        delay = min(30.0, 2 ** rate_limited)
+                        rate_limited += 1
+                    else:
+                        raise
+                except BaseException:
+                    self.metrics.observe(endpoint, time.monotonic() - started, ok=False, nbytes=received[0])
+                    raise
+            # Chờ ngoài semaphore để không giữ chỗ của request khác
+            await self._sleep(delay)
+
+    async def _resolve_with_ytdlp(self, raw):
+        def resolve():
+            return cue_engine.YoutubeExtractor(raw, "all", cache=self.cache)._extract_uc_from_input()
+        return await asyncio.get_running_loop().run_in_executor(None, resolve)
+
+    async def _channel_info(self, raw):
+        """(uploads playlist ID, số video) — 1 request ``channels`` kể cả với @handle."""
+        params = {
+            "part": "contentDetails,statistics",
+            "fields": "items(id,contentDetails(relatedPlaylists(uploads)),statistics(videoCount))",
+        }
+        m = re.search(r"(?:^|/channel/)(UC[0-9A-Za-z_-]{22})", raw)
+        handle = re.search(r"(?:^|youtube\.com/)(@[^/?#\s]+)", raw)
+        user = re.search(r"youtube\.com/user/([^/?#\s]+)", raw)
+        if m:
+            params["id"] = m.group(1)
+        elif handle:
+            params["forHandle"] = handle.group(1)
+        elif user:
+            params["forUsername"] = user.group(1)
+        else:
+            # /c/tên-tuỳ-chỉnh... API không tra được: resolve bằng yt-dlp trong thread pool
+            params["id"] = await self._resolve_with_ytdlp(raw)
+        data = await self._get("channels", params)
+        items = data.get("items") or []
+        if not items:
+            raise RuntimeError("API không tìm thấy kênh.")
+        uploads = items[0]["contentDetails"]["relatedPlaylists"]["uploads"]
+        return uploads, int((items[0].get("statistics") or {}).get("videoCount") or 0)
+
+    def _planned(self, channel_videos):
+        """(số video sẽ xử lý, đơn vị quota cần) cho một kênh."""
+        if self.extract_type == "recent":
+            n = min(self.video_count or 1, channel_videos)
+            return n, math.ceil(n / PAGE_SIZE)
+        pages = math.ceil(channel_videos / PAGE_SIZE)
+        return channel_videos, pages * (2 if self.extract_type == "popular" else 1)
+
+    async def _pages(self, uploads, limit=None):
+        """Sinh từng trang videoId của uploads playlist (tối đa ``limit`` ID)."""
+        token = None
+        got = 0
+        while True:
+            params = {
+                "part": "contentDetails",
+                "playlistId": uploads,
+                "maxResults": PAGE_SIZE if limit is None else max(1, min(PAGE_SIZE, limit - got)),
+                "fields": "nextPageToken,items(contentDetails(videoId))",
+            }
+            if token:
+                params["pageToken"] = token
+            data = await self._get("playlistItems", params)
+            ids = [it["contentDetails"].get("videoId") for it in data.get("items") or []]
+            ids = [vid for vid in ids if vid]
+            if limit is not None:
+                ids = ids[:limit - got]
+            got += len(ids)
+            yield ids
+            token = data.get("nextPageToken")
+            if not token or (limit is not None and got >= limit):
+                return
+
+    async def _list(self, uploads, limit, out, prog, sent):
+        # ``sent[0]`` = số dòng của kênh đã gửi qua on_results ở các lần thử trước: lần thử
+        # lại đọc lại từ đầu nên bỏ qua phần đó, tránh URL trùng trong file xuất
+        pos = 0
+        async for ids in self._pages(uploads, limit):
+            out.extend(ids)
+            self.metrics.count("videos", len(ids))
+            self._advance(prog, len(ids))
+            new = ids[max(0, sent[0] - pos):]
+            pos += len(ids)
+            if self.on_results and new:
+                self.on_results([VideoResult(watch_url(vid)) for vid in new])
+                sent[0] += len(new)
+
+    async def _stats(self, batch, top, uploads, prog):
+        """``videos?part=statistics`` cho một lô (vị trí, ID) rồi đưa vào bảng xếp hạng."""
+        order = dict((vid, i) for i, vid in batch)
+        data = await self._get("videos", {
+            "part": "statistics", "id": ",".join(vid for _, vid in batch),
+            "fields": "items(id,statistics(viewCount))",
+        })
+        scored = []
+        for it in data.get("items", []):
+            vid = it.get("id")
+            if vid:
+                views = int(it.get("statistics", {}).get("viewCount", 0))
+                top.push(views, vid, order=order.get(vid, 0))
+                scored.append((vid, views, None, order.get(vid)))
+        self.metrics.count("videos", len(scored))
+        if self.store is not None and scored:
+            self.store.put_views(scored, channel_of_playlist(uploads))
+        self._advance(prog, len(batch))
+
+    def _from_store(self, batch, top, prog):
+        """Đưa video có lượt xem còn mới trong kho vào bảng xếp hạng; trả về phần còn phải lấy."""
+        if self.store is None or not self.views_max_age or not batch:
+            return batch
+        stored = self.store.fresh_views([vid for _, vid in batch], self.views_max_age)
+        if not stored:
+            return batch
+        for i, vid in batch:
+            if vid in stored:
+                top.push(stored[vid][0], vid, order=i)
+        self.metrics.count("views_from_store", len(stored))
+        self._advance(prog, len(stored))
+        return [(i, vid) for i, vid in batch if vid not in stored]
+
+    async def _popular(self, uploads, top_n, prog):
+        # Pipeline: mỗi trang playlistItems (50 ID) thành ngay một task videos
+        top = TopK(top_n)
+        tasks = []
+        fed = 0
+        try:
+            async for ids in self._pages(uploads):
+                batch = self._from_store(list(enumerate(ids, start=fed)), top, prog)
+                fed += len(ids)
+                if batch:
+                    tasks.append(asyncio.ensure_future(self._stats(batch, top, uploads, prog)))
+            await asyncio.gather(*tasks)
+        except Cancelled:
+            pass     # bảng xếp hạng tạm thời của các lô đã xong
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return [VideoResult(watch_url(vid), views) for views, vid in top.snapshot()]
+
+    async def _channel(self, raw, prog, sent):
+        uploads, channel_videos = await self._channel_info(raw)
+        planned, need = self._planned(channel_videos)
+        remaining = self.api_keys.remaining()
+        if need > remaining:
+            raise QuotaExhausted(f"Không đủ quota API: cần ~{need} đơn vị, còn {remaining}.")
+        self._advance(prog, known=planned)
+        if self.extract_type == "popular":
+            results = await self._popular(uploads, max(1, int(self.video_count or 50)), prog)
+            if self.on_results and results:
+                self.on_results(results)
+            return VideoColumns.from_rows(results)
+        out = VideoColumns()
+        limit = None if self.extract_type == "all" else max(1, int(self.video_count or 1))
+        try:
+            await self._list(uploads, limit, out, prog, sent)
+        except Cancelled:
+            pass
+        return out
+
+    async def _run_channel(self, res):
+        prog = [0, 0]       # [đã xong, dự kiến] của kênh này, dùng chung mọi lần thử
+        sent = [0]          # số dòng đã gửi qua on_results, dùng chung mọi lần thử
+        while True:
+            res.attempts += 1
+            self._restart(prog)
+            try:
+                res.results = await self._channel(res.channel, prog, sent)
+                res.error = None
+                return
+            except Cancelled:
+                return
+            except Exception as e:
+                res.error = str(e)
+                if isinstance(e, QuotaExhausted) or res.attempts > self.max_retries:
+                    # Bỏ kênh: phần còn lại của kênh không còn tính vào tổng
+                    self._advance(prog, known=prog[0])
+                    return
+            try:
+                await self._sleep(min(60.0, self.backoff * 2 ** (res.attempts - 1)))
+            except Cancelled:
+                return
+
+    # ---------- run ----------
+    async def run(self, channels):
+        """Chạy mọi kênh; trả về list ``ChannelResult`` (có thêm ``results``) theo thứ tự đầu vào."""
+        self.metrics.start()
+        self._sem = asyncio.Semaphore(self.concurrency)
+        channel_sem = asyncio.Semaphore(self.channel_concurrency)
+        own_http = self.http is None
+        if own_http:
+            self.http = AsyncHttpClient()
+        results = [ChannelResult(ch) for ch in channels]
+
+        async def one(res):
+            async with channel_sem:
+                if self.cancelled:
+                    return
+                await self._run_channel(res)
+            self.channels_done += 1
+            if self.on_channel_done:
+                self.on_channel_done(res)
+
+        try:
+            with self.metrics.stage("api"):
+                await asyncio.gather(*(one(res) for res in results))
+        finally:
+            self.progress.flush()
+            self.metrics.finish()
+            # Kết nối gắn với event loop này, không dùng lại được sau khi loop đóng
+            await self.http.close()
+            if own_http:
+                self.http = None
+        return results
+
+    def run_sync(self, channels):
+        """Chạy ``run()`` trên một event loop mới trong luồng hiện tại."""
+        return asyncio.run(self.run(channels))
@@ -0,0 +1,269 @@
+"""Chạy nhiều kênh trong một batch với pool luồng dùng chung.
+
+- ``FairExecutor``: pool cố định, xếp việc theo từng kênh (lane) và lấy
+  việc xoay vòng giữa các kênh để kênh lớn không chiếm hết luồng.
+- ``BatchScheduler``: sống lâu, chạy danh sách kênh với giới hạn song song
+  toàn cục, gộp tiến trình và thử lại kênh lỗi với backoff tăng dần.
+"""
+import heapq
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from cue_columns import VideoColumns
+from cue_engine import YoutubeExtractor
+
+
+def load_channel_list(path):
+    """Đọc file danh sách kênh: mỗi dòng một UC…/@handle/URL, bỏ dòng trống và ``#``."""
+    channels = []
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            raw = line.strip()
+            if not raw or raw.startswith("#"):
+                continue
+            if raw not in seen:
+                seen.add(raw)
+                channels.append(raw)
+    return channels
+
+
+class _Lane:
+    """Giao diện ``submit`` kiểu Executor, gắn với một kênh của FairExecutor."""
+
+    def __init__(self, owner, key):
+        self._owner = owner
+        self._key = key
+
+    def submit(self, fn, *args, **kwargs):
+        return self._owner.submit(self._key, fn, *args, **kwargs)
+
+
+class FairExecutor:
+    """Pool luồng cố định, lấy việc xoay vòng (round-robin) giữa các lane."""
+
+    def __init__(self, max_workers=8):
+        self.max_workers = max(1, int(max_workers))
+        self._queues = OrderedDict()   # key -> deque[(future, fn, args, kwargs)]
+        self._cond = threading.Condition()
+        self._shutdown = False
+        self._threads = []
+        for i in range(self.max_workers):
+            t = threading.Thread(target=self._worker, name=f"cue-fair-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def lane(self, key):
+        return _Lane(self, key)
+
+    def submit(self, key, fn, *args, **kwargs):
+        fut = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Executor đã đóng.")
+            self._queues.setdefault(key, deque()).append((fut, fn, args, kwargs))
+            self._cond.notify()
+        return fut
+
+    def _next_item(self):
+        # Gọi khi đang giữ lock: lấy 1 việc của lane đầu rồi đưa lane xuống cuối
+        while self._queues:
+            key, q = next(iter(self._queues.items()))
+            if not q:
+                del self._queues[key]
+                continue
+            item = q.popleft()
+            if q:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            return item
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                item = self._next_item()
+                while item is None:
+                    if self._shutdown:
+                        return
+                    self._cond.wait()
+                    item = self._next_item()
+            fut, fn, args, kwargs = item
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                fut.set_exception(e)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        with self._cond:
+            self._shutdown = True
+            if cancel_futures:
+                for q in self._queues.values():
+                    for fut, _, _, _ in q:
+                        fut.cancel()
+                self._queues.clear()
+            self._cond.notify_all()
+        if wait:
+            for t in self._threads:
+                t.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        return False
+
+
+class ChannelResult:
+    """Kết quả của một kênh trong batch."""
+
+    def __init__(self, channel):
+        self.channel = channel
+        # ID + lượt xem + tiêu đề dạng cột (cue_columns); URL chỉ tạo khi xuất
+        self.results = VideoColumns()
+        self.error = None
+        self.attempts = 0
+
+    @property
+    def urls(self):
+        """List URL, tạo mới từ ``results`` mỗi lần gọi (khi xuất nên lặp ``results.urls()``)."""
+        return list(self.results.urls())
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class BatchScheduler:
+    """Chạy nhiều kênh với pool dùng chung; có thể gọi ``run`` nhiều lần trước khi ``close``.
+
+    ``workers`` là giới hạn luồng lấy dữ liệu video toàn cục (dùng chung mọi kênh),
+    ``channel_workers`` là số kênh được xử lý cùng lúc.
+    ``on_progress(channels_done, channels_total, items_done, items_total)`` được gọi
+    mỗi khi có tiến triển; ``on_channel_done(ChannelResult)`` khi một kênh kết thúc.
+    """
+
+    def __init__(self, workers=8, channel_workers=4, max_retries=2,
+                 backoff=2.0, max_backoff=60.0,
+                 on_progress=None, on_channel_done=None):
+        self.workers = max(1, int(workers))
+        self.channel_workers = max(1, int(channel_workers))
+        self.max_retries = max(0, int(max_retries))
+        self.backoff = float(backoff)
+        self.max_backoff = float(max_backoff)
+        self.on_progress = on_progress
+        self.on_channel_done = on_channel_done
+
+        self._video_pool = FairExecutor(self.workers)
+        self._channel_pool = ThreadPoolExecutor(max_workers=self.channel_workers,
+                                                thread_name_prefix="cue-channel")
+        self._lock = threading.Lock()
+        self._item_progress = {}
+        self._channels_done = 0
+        self._channels_total = 0
+
+    # ---------- progress ----------
+    def _report(self):
+        if not self.on_progress:
+            return
+        with self._lock:
+            cur = sum(c for c, _ in self._item_progress.values())
+            tot = sum(t for _, t in self._item_progress.values())
+            done, total = self._channels_done, self._channels_total
+        self.on_progress(done, total, cur, tot)
+
+    def _channel_progress(self, channel):
+        def cb(current, total):
+            with self._lock:
+                self._item_progress[channel] = (current, total)
+            self._report()
+        return cb
+
+    # ---------- jobs ----------
+    def _run_channel(self, channel, job_opts):
+        extractor = YoutubeExtractor(
+            channel,
+            executor=self._video_pool.lane(channel),
+            on_progress=self._channel_progress(channel),
+            **job_opts,
+        )
+        # Batch chỉ xuất URL: bỏ tiêu đề, giữ ID + lượt xem dạng cột
+        return extractor.collect(titles=False)
+
+    def _retry_delay(self, attempts):
+        return min(self.max_backoff, self.backoff * (2 ** (attempts - 1)))
+
+    def run(self, channels, extract_type="all", **job_opts):
+        """Chạy toàn bộ ``channels``; trả về list ``ChannelResult`` theo thứ tự đầu vào.
+
+        Kênh lỗi không dừng batch: được thử lại tối đa ``max_retries`` lần
+        (backoff ``backoff * 2**(n-1)`` giây), sau đó ghi nhận lỗi.
+        """
+        job_opts = dict(job_opts, extract_type=extract_type)
+        job_opts.setdefault("workers", self.workers)
+        results = OrderedDict((ch, ChannelResult(ch)) for ch in channels)
+        with self._lock:
+            self._item_progress = {}
+            self._channels_done = 0
+            self._channels_total = len(results)
+
+        pending = deque(results)
+        retry_heap = []            # (ready_at, seq, channel)
+        running = {}               # future -> channel
+        seq = 0
+
+        while pending or retry_heap or running:
+            now = time.monotonic()
+            while retry_heap and retry_heap[0][0] <= now:
+                pending.append(heapq.heappop(retry_heap)[2])
+            while pending and len(running) < self.channel_workers:
+                ch = pending.popleft()
+                results[ch].attempts += 1
+                running[self._channel_pool.submit(self._run_channel, ch, job_opts)] = ch
+
+            if not running:
+                # Chỉ còn kênh đang chờ backoff
+                time.sleep(max(0.0, retry_heap[0][0] - time.monotonic()))
+                continue
+
+            timeout = None
+            if retry_heap:
+                timeout = max(0.0, retry_heap[0][0] - time.monotonic())
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for fut in done:
+                ch = running.pop(fut)
+                res = results[ch]
+                try:
+                    res.results = fut.result()
+                    res.error = None
+                except Exception as e:
+                    res.error = str(e)
+                    if res.attempts <= self.max_retries:
+                        seq += 1
+                        heapq.heappush(retry_heap,
+                                       (time.monotonic() + self._retry_delay(res.attempts), seq, ch))
+                        continue
+                with self._lock:
+                    self._channels_done += 1
+                if self.on_channel_done:
+                    self.on_channel_done(res)
+                self._report()
+
+        return list(results.values())
+
+    def close(self):
+        self._channel_pool.shutdown(wait=True)
+        self._video_pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
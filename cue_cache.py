@@ -0,0 +1,161 @@
+"""Bộ nhớ đệm SQLite trên đĩa cho CUE.
+
+Lưu hai loại dữ liệu:
+- ``channels``: đầu vào (@handle/URL) -> Channel ID (UC…)
+- ``playlists``: playlist ID (UU…) -> danh sách video ID theo thứ tự playlist
+
+Mỗi bản ghi có TTL riêng; khi vượt giới hạn kích thước, bản ghi ít dùng
+gần đây nhất bị xoá trước (LRU). Playlist đã hết hạn không bị xoá ngay mà
+vẫn đọc được với ``max_age`` lớn hơn, làm mốc cho đồng bộ tăng dần.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from cue_columns import VideoColumns
+
+
+def default_cache_dir():
+    base = os.environ.get("CUE_CACHE_DIR")
+    if base:
+        return base
+    if os.name == "nt":
+        root = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(root, "CUE", "cache")
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(root, "cue")
+
+
+class Cache:
+    """Cache thread-safe; có thể dùng chung giữa các job và các tiến trình (WAL).
+
+    ``channel_ttl`` / ``playlist_ttl`` tính bằng giây. ``max_channels`` giới hạn
+    số bản ghi kênh, ``max_video_ids`` giới hạn tổng số video ID lưu trong các playlist.
+    """
+
+    def __init__(self, path=None, channel_ttl=30 * 86400, playlist_ttl=6 * 3600,
+                 max_channels=100000, max_video_ids=5000000):
+        if path is None:
+            path = os.path.join(default_cache_dir(), "cache.sqlite3")
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.channel_ttl = channel_ttl
+        self.playlist_ttl = playlist_ttl
+        self.max_channels = max_channels
+        self.max_video_ids = max_video_ids
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS channels (
+                    key TEXT PRIMARY KEY,
+                    uc TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS playlists (
+                    playlist_id TEXT PRIMARY KEY,
+                    video_ids TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    stored_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_channels_accessed ON channels(accessed_at);
+                CREATE INDEX IF NOT EXISTS idx_playlists_accessed ON playlists(accessed_at);
+            """)
+
+    # ---------- channel -> UC ----------
+    def get_channel(self, key):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT uc, stored_at FROM channels WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.channel_ttl:
+                self._conn.execute("DELETE FROM channels WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE channels SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def put_channel(self, key, uc):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO channels (key, uc, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, uc, now, now),
+            )
+            self._evict_channels()
+
+    # ---------- playlist -> video IDs ----------
+    def get_playlist(self, playlist_id, max_age=None):
+        """Trả về video ID (``cue_columns.VideoColumns``), hoặc None nếu chưa có / đã hết hạn."""
+        now = time.time()
+        ttl = self.playlist_ttl if max_age is None else max_age
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT video_ids, stored_at FROM playlists WHERE playlist_id = ?", (playlist_id,)
+            ).fetchone()
+            if row is None or now - row[1] > ttl:
+                return None
+            self._conn.execute(
+                "UPDATE playlists SET accessed_at = ? WHERE playlist_id = ?", (now, playlist_id)
+            )
+        return VideoColumns.from_joined(row[0])
+
+    def put_playlist(self, playlist_id, video_ids):
+        now = time.time()
+        if not isinstance(video_ids, VideoColumns):
+            video_ids = VideoColumns(video_ids)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO playlists (playlist_id, video_ids, count, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (playlist_id, video_ids.joined(), len(video_ids), now, now),
+            )
+            self._evict_playlists()
+
+    # ---------- maintenance ----------
+    def _evict_channels(self):
+        # Gọi khi đang giữ lock và trong transaction
+        self._conn.execute(
+            "DELETE FROM channels WHERE stored_at < ?", (time.time() - self.channel_ttl,)
+        )
+        (n,) = self._conn.execute("SELECT COUNT(*) FROM channels").fetchone()
+        if n > self.max_channels:
+            self._conn.execute(
+                "DELETE FROM channels WHERE key IN "
+                "(SELECT key FROM channels ORDER BY accessed_at ASC LIMIT ?)",
+                (n - self.max_channels,),
+            )
+
+    def _evict_playlists(self):
+        # Playlist hết hạn vẫn được giữ làm mốc cho đồng bộ tăng dần; chỉ xoá theo LRU khi quá tải
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(count), 0) FROM playlists").fetchone()
+        if total <= self.max_video_ids:
+            return
+        rows = self._conn.execute(
+            "SELECT playlist_id, count FROM playlists ORDER BY accessed_at ASC"
+        ).fetchall()
+        victims = []
+        for pid, count in rows[:-1]:   # luôn giữ bản ghi mới dùng nhất
+            if total <= self.max_video_ids:
+                break
+            victims.append((pid,))
+            total -= count
+        self._conn.executemany("DELETE FROM playlists WHERE playlist_id = ?", victims)
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM channels")
+            self._conn.execute("DELETE FROM playlists")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
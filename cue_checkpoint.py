@@ -0,0 +1,111 @@
+"""Checkpoint cho các job popular dài (deep và Data API) để chạy tiếp khi bị gián đoạn.
+
+Mỗi job (loại + uploads playlist) có một file JSONL chỉ ghi nối thêm, mỗi dòng một bản ghi:
+- ``{"ids": [...]}``: danh sách video cần quét (deep);
+- ``{"page": [...], "next": token}``: một trang ``playlistItems`` và con trỏ trang kế (API);
+- ``{"views": [[vid, views, title], ...]}``: lượt xem đã lấy được.
+
+Dòng cuối ghi dở (tiến trình bị dừng giữa chừng) được bỏ qua khi đọc. Job xong thì
+file bị xoá; file quá ``max_age`` giây được coi là cũ (lượt xem đã đổi) và làm lại từ đầu.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from cue_cache import default_cache_dir
+from cue_columns import VideoColumns
+
+
+def default_checkpoint_dir():
+    return os.path.join(default_cache_dir(), "checkpoints")
+
+
+class Checkpoint:
+    """Nhật ký tiến độ của một job; an toàn khi ghi từ nhiều luồng."""
+
+    def __init__(self, path, max_age=86400, flush_interval=0.5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.ids = None              # VideoColumns
+        self.page_ids = VideoColumns()
+        self.next_token = None
+        self.views = {}          # vid -> (views, title)
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        fresh = os.path.exists(path) and time.time() - os.path.getmtime(path) <= max_age
+        if fresh:
+            self._load()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._f = open(path, "a" if fresh else "w", encoding="utf-8", newline="\n")
+
+    @classmethod
+    def for_job(cls, folder, kind, playlist_id, **kwargs):
+        name = hashlib.sha1(f"{kind}:{playlist_id}".encode("utf-8")).hexdigest()[:16]
+        return cls(os.path.join(folder, f"{kind}_{name}.jsonl"), **kwargs)
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue
+                    if "ids" in rec:
+                        self.ids = VideoColumns(rec["ids"])
+                    if "page" in rec:
+                        self.page_ids.extend(rec["page"])
+                        self.next_token = rec.get("next")
+                    for vid, views, title in rec.get("views") or ():
+                        self.views[vid] = (views, title)
+        except OSError:
+            pass
+
+    @property
+    def pages_done(self):
+        """Đã phân trang hết uploads playlist ở lần chạy trước."""
+        return bool(self.page_ids) and not self.next_token
+
+    def __len__(self):
+        return len(self.views)
+
+    def _write(self, rec, force=False):
+        with self._lock:
+            if self._f.closed:
+                return
+            self._f.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+            now = time.monotonic()
+            if force or now - self._last_flush >= self.flush_interval:
+                self._f.flush()
+                self._last_flush = now
+
+    def set_ids(self, ids):
+        self.ids = ids if isinstance(ids, VideoColumns) else VideoColumns(ids)
+        self._write({"ids": list(self.ids)}, force=True)
+
+    def add_page(self, ids, next_token):
+        self.page_ids.extend(ids)
+        self.next_token = next_token
+        self._write({"page": list(ids), "next": next_token}, force=True)
+
+    def add_views(self, items):
+        """Ghi các bộ (vid, views, title)."""
+        rows = [[vid, views, title] for vid, views, title in items]
+        if rows:
+            self._write({"views": rows})
+
+    def close(self):
+        """Đóng nhưng giữ file để lần chạy sau tiếp tục."""
+        with self._lock:
+            if not self._f.closed:
+                self._f.close()
+
+    def discard(self):
+        """Job đã xong: xoá checkpoint."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
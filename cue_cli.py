@@ -0,0 +1,456 @@
+"""Dòng lệnh cho CUE: chạy trích xuất không cần PyQt6.
+
+Ví dụ:
+    python cue_cli.py extract @abc --mode popular --top 200 -o urls.txt
+    python cue_cli.py extract UCxxxx --mode recent --count 20
+    python cue_cli.py batch channels.txt --mode recent --count 10 --output-dir out/
+    python cue_cli.py top UCaaa UCbbb --top 100 --with-meta     # từ kho, không cần mạng
+"""
+import sys
+import os
+import argparse
+import re
+
+from cue_engine import YoutubeExtractor, BACKENDS, EXTRACT_TYPES, channel_url, watch_url
+from cue_batch import BatchScheduler, load_channel_list
+from cue_cache import Cache
+from cue_store import VideoStore
+from cue_checkpoint import default_checkpoint_dir
+from cue_http import HttpClient
+from cue_quota import KeyRing, DEFAULT_DAILY_QUOTA
+from cue_metrics import Metrics
+from cue_ratelimit import AdaptiveLimiter
+from cue_export import DEFAULT_COLUMNS, FORMATS, RESULT_COLUMNS, open_writer
+
+
+def _stderr_progress(current, total):
+    if total:
+        sys.stderr.write(f"\r{current}/{total}")
+    else:
+        sys.stderr.write(f"\r{current}")
+    sys.stderr.flush()
+
+
+def _add_job_args(p):
+    p.add_argument("--mode", choices=EXTRACT_TYPES, default="all",
+                   help="all | recent | popular (mặc định: all)")
+    p.add_argument("--top", "--count", dest="video_count", type=int, default=None,
+                   help="Số video cần lấy (popular: top N, recent: N video mới nhất)")
+    p.add_argument("--api-key", default=os.environ.get("YOUTUBE_API_KEY"),
+                   help="API key YouTube Data API, nhiều key cách nhau bởi dấu phẩy "
+                        "(hoặc biến môi trường YOUTUBE_API_KEY)")
+    p.add_argument("--use-api", action="store_true", help="Dùng YouTube Data API cho popular")
+    p.add_argument("--api-daily-quota", type=int, default=DEFAULT_DAILY_QUOTA,
+                   help=f"Quota mỗi key mỗi ngày, mặc định {DEFAULT_DAILY_QUOTA}")
+    p.add_argument("--api-quota-state", default=None,
+                   help="File JSON lưu quota đã dùng trong ngày giữa các lần chạy")
+    p.add_argument("--no-api-fallback", action="store_true",
+                   help="Báo lỗi thay vì chuyển sang yt-dlp khi hết quota API")
+    p.add_argument("--quick", action="store_true", help="Phổ biến nhanh từ tab Popular")
+    p.add_argument("--cookies", default=None, help="Đường dẫn cookies.txt")
+    p.add_argument("--workers", type=int, default=8, help="Số luồng (deep), mặc định 8")
+    p.add_argument("--backend", choices=BACKENDS, default="thread",
+                   help="Popular deep: lấy lượt xem bằng luồng (thread, mặc định) hoặc tiến trình "
+                        "con (process, tận dụng nhiều nhân CPU)")
+    p.add_argument("--processes", type=int, default=None,
+                   help="Số tiến trình con cho --backend process (mặc định = --workers)")
+    p.add_argument("--max-rate", type=float, default=None,
+                   help="Trần request/giây tới YouTube ở chế độ deep (tự giảm khi bị chặn); "
+                        "mặc định không có trần, chỉ tự đặt khi bị chặn")
+    p.add_argument("--http-timeout", type=float, default=15.0,
+                   help="Timeout (giây) cho mỗi request Data API, mặc định 15")
+    p.add_argument("--http-retries", type=int, default=4,
+                   help="Số lần thử lại khi Data API trả 429/5xx, mặc định 4")
+    p.add_argument("--cache-path", default=None,
+                   help="File cache SQLite (mặc định: thư mục cache của người dùng)")
+    p.add_argument("--no-cache", action="store_true", help="Không dùng cache")
+    p.add_argument("--refresh-cache", action="store_true",
+                   help="Bỏ qua dữ liệu cache cũ, lấy mới và ghi đè")
+    p.add_argument("--store-path", default=None,
+                   help="File kho metadata video SQLite (mặc định: thư mục cache của người dùng)")
+    p.add_argument("--no-store", action="store_true",
+                   help="Không đọc/ghi kho metadata video (lượt xem đã lấy ở các lần trước)")
+    p.add_argument("--views-max-age", type=float, default=0.0,
+                   help="Popular: dùng lại lượt xem trong kho nếu lấy chưa quá số giờ này "
+                        "(vd. 24); mặc định 0 = luôn lấy mới")
+    p.add_argument("--incremental", action="store_true",
+                   help="Chỉ lấy video mới hơn danh sách uploads đã lưu trong cache rồi gộp lại")
+    p.add_argument("--resume", action="store_true",
+                   help="Popular deep/API: lưu checkpoint và chạy tiếp job bị gián đoạn")
+    p.add_argument("--checkpoint-dir", default=None,
+                   help="Thư mục checkpoint (bật --resume; mặc định trong thư mục cache)")
+    p.add_argument("--metrics", default=None,
+                   help="Ghi số liệu hiệu năng của job ra file (.json, hoặc .prom cho Prometheus)")
+    p.add_argument("-q", "--quiet", action="store_true", help="Không in tiến trình ra stderr")
+
+
+def _job_opts(args):
+    keys = KeyRing.parse(args.api_key, daily_quota=args.api_daily_quota,
+                         state_path=args.api_quota_state)
+    return dict(
+        video_count=args.video_count,
+        use_api=args.use_api, api_key=keys, api_fallback=not args.no_api_fallback,
+        quick_popular=args.quick, cookies_path=args.cookies,
+        workers=args.workers,
+        backend=args.backend, processes=args.processes,
+        cache=None if args.no_cache else Cache(args.cache_path),
+        refresh_cache=args.refresh_cache,
+        store=None if args.no_store else VideoStore(args.store_path),
+        views_max_age=args.views_max_age * 3600,
+        incremental=args.incremental,
+        checkpoint_dir=args.checkpoint_dir or (default_checkpoint_dir() if args.resume else None),
+        http=HttpClient(timeout=args.http_timeout, max_retries=args.http_retries),
+        # Dùng chung cho mọi kênh trong batch: giới hạn của YouTube tính theo IP
+        limiter=AdaptiveLimiter(args.workers, max_rate=args.max_rate or None),
+        api_limiter=AdaptiveLimiter(args.workers),
+        metrics=Metrics(),
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cue", description="CUE - lấy URL video từ kênh YouTube.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ex = sub.add_parser("extract", help="Lấy URL video của một kênh.")
+    ex.add_argument("channel", help="UC…, @handle hoặc URL kênh")
+    _add_job_args(ex)
+    ex.add_argument("-o", "--output", default=None, help="Ghi URL ra file thay vì stdout")
+    ex.add_argument("--format", choices=FORMATS, default=None,
+                    help="Định dạng file -o (mặc định theo đuôi file, không rõ thì txt)")
+    ex.add_argument("--with-meta", action="store_true",
+                    help="Kèm lượt xem và tiêu đề (khi có) bên cạnh URL")
+    ex.add_argument("--skip-exported", action="store_true",
+                    help="Bỏ video đã từng xuất ra cùng file (hoặc stdout) ở các lần chạy trước")
+
+    pl = sub.add_parser("plan", help="Ước lượng quota Data API cho một kênh trước khi chạy.")
+    pl.add_argument("channel", help="UC…, @handle hoặc URL kênh")
+    _add_job_args(pl)
+
+    bt = sub.add_parser("batch", help="Lấy URL cho nhiều kênh với pool luồng dùng chung.")
+    bt.add_argument("channels", nargs="+",
+                    help="UC…/@handle/URL, hoặc file .txt (mỗi dòng một kênh)")
+    _add_job_args(bt)
+    bt.add_argument("--channel-workers", type=int, default=4,
+                    help="Số kênh xử lý cùng lúc, mặc định 4")
+    bt.add_argument("--retries", type=int, default=2, help="Số lần thử lại kênh lỗi, mặc định 2")
+    bt.add_argument("--backoff", type=float, default=2.0,
+                    help="Thời gian chờ ban đầu (giây) trước khi thử lại, nhân đôi mỗi lần")
+    bt.add_argument("--async", dest="async_api", action="store_true",
+                    help="Chạy mọi kênh qua Data API trên một event loop asyncio (cần --api-key; "
+                         "all/recent/popular đều dùng API)")
+    bt.add_argument("--concurrency", type=int, default=64,
+                    help="--async: số request Data API đang bay tối đa, mặc định 64")
+    bt.add_argument("-o", "--output", default=None, help="Ghi toàn bộ URL ra một file")
+    bt.add_argument("--output-dir", default=None, help="Ghi mỗi kênh ra một file <kênh>.txt")
+    bt.add_argument("--skip-exported", action="store_true",
+                    help="Bỏ video đã từng xuất ra cùng file (kể cả trùng giữa các kênh trong lần chạy)")
+
+    tp = sub.add_parser("top", help="Top N video của nhiều kênh từ kho metadata (không cần mạng).")
+    tp.add_argument("channels", nargs="+",
+                    help="UC…/@handle/URL đã chạy popular trước đó, hoặc file .txt (mỗi dòng một kênh)")
+    tp.add_argument("--top", "--count", dest="video_count", type=int, default=50,
+                    help="Số video, mặc định 50")
+    tp.add_argument("--max-age", type=float, default=None,
+                    help="Chỉ tính lượt xem lấy trong vòng số giờ này (mặc định: mọi bản ghi)")
+    tp.add_argument("--store-path", default=None, help="File kho metadata video SQLite")
+    tp.add_argument("--cache-path", default=None,
+                    help="File cache SQLite để đổi @handle/URL sang UC… không cần mạng")
+    tp.add_argument("--with-meta", action="store_true", help="Kèm lượt xem, tiêu đề và kênh")
+    tp.add_argument("-o", "--output", default=None, help="Ghi ra file thay vì stdout")
+    tp.add_argument("--format", choices=FORMATS, default=None,
+                    help="Định dạng file -o (mặc định theo đuôi file, không rõ thì txt)")
+    tp.add_argument("-q", "--quiet", action="store_true", help="Không in tổng kết ra stderr")
+    return parser
+
+
+def _export_target(path):
+    # Khoá chống xuất trùng trong kho: đường dẫn tuyệt đối của file, hoặc "-" cho stdout
+    return os.path.abspath(path) if path else "-"
+
+
+def _video_id(row):
+    return (row if isinstance(row, str) else row[0]).rsplit("=", 1)[-1]
+
+
+def _only_new(store, target, rows, written=()):
+    """Giữ các kết quả (URL hoặc tuple url, …) chưa từng xuất ra ``target`` và chưa có trong
+    ``written`` (ID đã ghi trong lần chạy này); trùng ngay trong ``rows`` chỉ giữ một lần.
+
+    Không đánh dấu gì trong kho: người gọi chỉ ``mark_exported`` sau khi đã ghi và đóng file
+    thành công, để file hỏng / bị huỷ không làm mất video ở lần ``--skip-exported`` sau.
+    """
+    fresh = {}
+    for r in rows:
+        vid = _video_id(r)
+        if vid not in written:
+            fresh.setdefault(vid, r)
+    seen = store.exported(target, fresh)
+    return [r for vid, r in fresh.items() if vid not in seen]
+
+
+def _require_store(args, job_opts):
+    if args.skip_exported and job_opts["store"] is None:
+        raise RuntimeError("--skip-exported cần kho metadata video (bỏ --no-store).")
+    return job_opts["store"] if args.skip_exported else None
+
+
+def cmd_extract(args):
+    job_opts = _job_opts(args)
+    dedupe = _require_store(args, job_opts)
+    target = _export_target(args.output)
+    extractor = YoutubeExtractor(
+        args.channel, args.mode,
+        on_progress=None if args.quiet else _stderr_progress,
+        **job_opts,
+    )
+    batches = extractor.iter_batches()
+    written = set()     # ID đã ghi trọn, đánh dấu đã xuất khi ghi xong
+    if dedupe is not None:
+        batches = (_only_new(dedupe, target, b, written) for b in batches)
+    columns = RESULT_COLUMNS if args.with_meta else DEFAULT_COLUMNS
+    count = 0
+    interrupted = False
+    if args.output:
+        # Ghi dạng luồng: URL được ghi ngay khi có, không giữ cả danh sách
+        metrics = extractor.metrics
+        with open_writer(args.output, args.format, columns) as writer:
+            try:
+                for batch in batches:
+                    with metrics.stage("export"):
+                        writer.write_many(batch)
+                    if dedupe is not None:
+                        written.update(map(_video_id, batch))
+            except KeyboardInterrupt:
+                # Ctrl+C: dừng gửi request, vẫn đóng file với phần đã ghi
+                extractor.cancel()
+                interrupted = True
+            count = writer.count
+            with metrics.stage("export"):
+                writer.close()
+    else:
+        try:
+            for batch in batches:
+                for r in batch:
+                    row = r[:len(columns)]
+                    sys.stdout.write("\t".join("" if v is None else str(v) for v in row) + "\n")
+                sys.stdout.flush()
+                count += len(batch)
+                if dedupe is not None:
+                    written.update(map(_video_id, batch))
+        except KeyboardInterrupt:
+            extractor.cancel()
+            interrupted = True
+    if dedupe is not None:
+        dedupe.mark_exported(target, written)
+    if not args.quiet:
+        if interrupted:
+            sys.stderr.write(f"\nĐã dừng: giữ {count} URL đã lấy được.\n")
+        else:
+            sys.stderr.write(f"\nHoàn thành: {count} URL.\n")
+        _report_api(extractor)
+    _report_metrics(extractor.metrics, args)
+    return 130 if interrupted else 0
+
+
+def _report_metrics(metrics, args):
+    if not args.quiet:
+        sys.stderr.write(f"Hiệu năng: {metrics.summary()}\n")
+    if args.metrics:
+        metrics.dump(args.metrics)
+        if not args.quiet:
+            sys.stderr.write(f"Đã ghi số liệu: {args.metrics}\n")
+
+
+def _report_api(extractor):
+    skipped = extractor.unavailable_videos + extractor.failed_videos
+    if skipped:
+        sys.stderr.write(f"Bỏ qua {skipped} video không lấy được lượt xem "
+                         f"({extractor.unavailable_videos} không xem được, "
+                         f"{extractor.failed_videos} lỗi sau khi thử lại).\n")
+    if extractor.limiter.throttled:
+        snap = extractor.limiter.snapshot()
+        sys.stderr.write(f"Bị YouTube giới hạn {snap['throttled']} lần; "
+                         f"đã giảm còn {snap['concurrency']} luồng.\n")
+    if extractor.resumed:
+        sys.stderr.write(f"Chạy tiếp từ checkpoint: {extractor.resumed} video đã có lượt xem.\n")
+    if extractor.api_fallback_reason:
+        sys.stderr.write(f"Đã chuyển sang yt-dlp: {extractor.api_fallback_reason}\n")
+    snap = extractor.quota.snapshot()
+    if snap["total_units"]:
+        per = ", ".join(f"{k}={v}" for k, v in sorted(snap["units"].items()))
+        sys.stderr.write(f"Quota API đã dùng: {snap['total_units']} đơn vị ({per}); "
+                         f"còn lại ~{extractor.api_keys.remaining()}.\n")
+    extractor.api_keys.flush()
+
+
+def cmd_plan(args):
+    extractor = YoutubeExtractor(args.channel, args.mode, **_job_opts(args))
+    if not extractor.api_key:
+        raise RuntimeError("Thiếu API key cho YouTube Data API.")
+    plan = extractor.plan_api_cost()
+    print(f"Kênh {plan['channel_id']}: {plan['channel_videos']} video")
+    print(f"Ước lượng: ~{plan['estimated_units']} đơn vị quota "
+          f"(còn lại ~{plan['remaining_units']} trên {len(extractor.api_keys)} key)")
+    extractor.api_keys.flush()
+    return 0 if plan["estimated_units"] <= plan["remaining_units"] else 3
+
+
+def _expand_channels(items):
+    channels = []
+    for item in items:
+        if os.path.isfile(item):
+            channels.extend(load_channel_list(item))
+        else:
+            channels.append(item)
+    return list(dict.fromkeys(channels))
+
+
+def _safe_name(channel):
+    return "".join(c if c.isalnum() or c in "-_@" else "_" for c in channel).strip("_") or "channel"
+
+
+def cmd_batch(args):
+    channels = _expand_channels(args.channels)
+    job_opts = _job_opts(args)
+    dedupe = _require_store(args, job_opts)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    out = open(args.output, "w", encoding="utf-8") if args.output else None
+    if out is None and not args.output_dir:
+        out = sys.stdout
+    out_target = _export_target(args.output)
+    out_written = set()     # ID đã ghi ra ``out``, đánh dấu đã xuất sau khi đóng file
+
+    def on_progress(ch_done, ch_total, cur, tot):
+        sys.stderr.write(f"\rKênh {ch_done}/{ch_total} - video {cur}/{tot}")
+        sys.stderr.flush()
+
+    def on_channel_done(res):
+        if not res.ok:
+            if not args.quiet:
+                sys.stderr.write(f"\nLỗi kênh {res.channel} (sau {res.attempts} lần): {res.error}\n")
+            return
+        if args.output_dir:
+            path = os.path.join(args.output_dir, _safe_name(res.channel) + ".txt")
+            urls = res.results.urls()
+            if dedupe is not None:
+                urls = _only_new(dedupe, _export_target(path), urls)
+            with open(path, "w", encoding="utf-8") as f:
+                f.writelines(url + "\n" for url in urls)
+            if dedupe is not None:
+                dedupe.mark_exported(_export_target(path), map(_video_id, urls))
+        if out is not None:
+            urls = res.results.urls()
+            if dedupe is not None:
+                urls = _only_new(dedupe, out_target, urls, out_written)
+            out.writelines(url + "\n" for url in urls)
+            out.flush()
+            if dedupe is not None:
+                out_written.update(map(_video_id, urls))
+
+    try:
+        if args.async_api:
+            results = _run_async_batch(channels, args, job_opts, on_progress, on_channel_done)
+        else:
+            results = _run_batch(channels, args, job_opts, on_progress, on_channel_done)
+    finally:
+        if out is not None and out is not sys.stdout:
+            out.close()
+    if dedupe is not None and out is not None:
+        dedupe.mark_exported(out_target, out_written)
+
+    failed = [r for r in results if not r.ok]
+    if not args.quiet:
+        total_urls = sum(len(r.results) for r in results if r.ok)
+        sys.stderr.write(f"\nHoàn thành: {len(results) - len(failed)}/{len(results)} kênh, "
+                         f"{total_urls} URL.\n")
+    _report_metrics(job_opts["metrics"], args)
+    return 2 if failed else 0
+
+
+def _run_batch(channels, args, job_opts, on_progress, on_channel_done):
+    with BatchScheduler(
+            workers=args.workers, channel_workers=args.channel_workers,
+            max_retries=args.retries, backoff=args.backoff,
+            on_progress=None if args.quiet else on_progress,
+            on_channel_done=on_channel_done,
+    ) as scheduler:
+        return scheduler.run(channels, args.mode, **job_opts)
+
+
+def _run_async_batch(channels, args, job_opts, on_progress, on_channel_done):
+    from cue_aio import AsyncApiEngine, AsyncHttpClient
+
+    engine = AsyncApiEngine(
+        job_opts["api_key"], args.mode, video_count=args.video_count,
+        concurrency=args.concurrency, channel_concurrency=args.channel_workers,
+        max_retries=args.retries, backoff=args.backoff,
+        http=AsyncHttpClient(timeout=args.http_timeout, max_retries=args.http_retries),
+        cache=job_opts["cache"], metrics=job_opts["metrics"],
+        store=job_opts["store"], views_max_age=job_opts["views_max_age"],
+        on_progress=None if args.quiet else (
+            lambda cur, tot: on_progress(engine.channels_done, len(channels), cur, tot)),
+        on_channel_done=on_channel_done,
+    )
+    try:
+        return engine.run_sync(channels)
+    finally:
+        engine.api_keys.flush()
+
+
+def _offline_channel_id(raw, cache):
+    """UC… của đầu vào mà không gọi mạng: UC/URL /channel/ trực tiếp, còn lại tra cache."""
+    raw = raw.strip()
+    if raw.startswith("UC"):
+        return raw
+    m = re.search(r"/channel/(UC[0-9A-Za-z_-]+)", raw)
+    uc = m.group(1) if m else cache.get_channel(channel_url(raw))
+    if not uc:
+        raise RuntimeError(f"Chưa có Channel ID của {raw} trong cache; dùng UC… hoặc chạy kênh này trước.")
+    return uc
+
+
+def cmd_top(args):
+    cache = Cache(args.cache_path)
+    store = VideoStore(args.store_path)
+    try:
+        channels = [_offline_channel_id(ch, cache) for ch in _expand_channels(args.channels)]
+        max_age = None if args.max_age is None else args.max_age * 3600
+        rows = [(watch_url(vid), views, title, uc)
+                for views, vid, title, uc in store.top(channels, args.video_count, max_age)]
+    finally:
+        store.close()
+        cache.close()
+    columns = RESULT_COLUMNS + ("channel_id",) if args.with_meta else DEFAULT_COLUMNS
+    if args.output:
+        with open_writer(args.output, args.format, columns) as writer:
+            writer.write_many(rows)
+    else:
+        for row in rows:
+            sys.stdout.write("\t".join("" if v is None else str(v) for v in row[:len(columns)]) + "\n")
+    if not args.quiet:
+        sys.stderr.write(f"{len(rows)} video từ kho ({len(channels)} kênh).\n")
+    return 0 if rows else 4
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == "extract":
+            return cmd_extract(args)
+        if args.command == "plan":
+            return cmd_plan(args)
+        if args.command == "batch":
+            return cmd_batch(args)
+        if args.command == "top":
+            return cmd_top(args)
+    except KeyboardInterrupt:
+        return 130
+    except Exception as e:
+        sys.stderr.write(f"\nLỗi: {e}\n")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Kết quả dạng cột, gọn bộ nhớ, cho danh sách video rất lớn.
+
+Một kênh 100k video giữ dưới dạng list URL (chuỗi ~90 byte + con trỏ) hoặc list
+``VideoResult`` tốn vài chục MB; ``VideoColumns`` giữ:
+
+- video ID: 11 byte cố định mỗi video trong một ``bytearray`` (ID YouTube luôn dài 11 ký tự
+  ASCII; ID khác chuẩn được giữ riêng trong một dict nhỏ);
+- lượt xem: ``array('q')`` (-1 = không biết);
+- tiêu đề: chỉ tạo list khi có ít nhất một tiêu đề.
+
+URL chỉ được tạo khi đọc (``urls()`` / ``rows()``), tức là lúc xuất. Dùng được như một
+danh sách ID chỉ đọc: ``len``, lặp, chỉ số, cắt lát.
+"""
+from array import array
+
+
+ID_LEN = 11
+WATCH_URL = "https://www.youtube.com/watch?v={}"
+
+
+class VideoColumns:
+    """Danh sách video (ID, lượt xem, tiêu đề) lưu theo cột; chỉ thêm vào cuối."""
+
+    __slots__ = ("_ids", "_views", "_titles", "_odd")
+
+    def __init__(self, ids=()):
+        self._ids = bytearray()
+        self._views = array("q")
+        self._titles = None     # list tiêu đề, chỉ tạo khi có tiêu đề đầu tiên
+        self._odd = None        # {vị trí: ID} cho ID không phải 11 ký tự ASCII
+        self.extend(ids)
+
+    @classmethod
+    def from_joined(cls, text, sep=","):
+        """Từ chuỗi ID nối bằng ``sep`` (dạng lưu trong cue_cache) mà không tạo chuỗi cho từng ID."""
+        cols = cls()
+        if not text:
+            return cols
+        raw = text.encode("ascii", "replace")
+        n = (len(raw) + 1) // (ID_LEN + 1)
+        if (len(raw) == n * (ID_LEN + 1) - 1 and raw[ID_LEN::ID_LEN + 1] == sep.encode() * (n - 1)
+                and raw.count(sep.encode()) == n - 1 and text.isascii()):
+            cols._ids = bytearray(raw.replace(sep.encode(), b""))
+            cols._views = array("q", [-1]) * n
+            return cols
+        cols.extend(text.split(sep))
+        return cols
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Từ các bộ (url, views, title) như ``VideoResult``."""
+        cols = cls()
+        for row in rows:
+            cols.append(row[0].rsplit("=", 1)[-1], *row[1:3])
+        return cols
+
+    def append(self, vid, views=None, title=None):
+        n = len(self._views)
+        if len(vid) == ID_LEN and vid.isascii():
+            self._ids += vid.encode("ascii")
+        else:
+            self._ids += b"\0" * ID_LEN
+            if self._odd is None:
+                self._odd = {}
+            self._odd[n] = vid
+        self._views.append(-1 if views is None else int(views))
+        if title is not None and self._titles is None:
+            self._titles = [None] * n
+        if self._titles is not None:
+            self._titles.append(title)
+
+    def extend(self, ids):
+        for vid in ids:
+            self.append(vid)
+
+    def __len__(self):
+        return len(self._views)
+
+    def _id(self, i):
+        if self._odd is not None and i in self._odd:
+            return self._odd[i]
+        return self._ids[i * ID_LEN:(i + 1) * ID_LEN].decode("ascii")
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                raise ValueError("VideoColumns chỉ hỗ trợ cắt lát liên tiếp.")
+            part = VideoColumns()
+            part._ids = self._ids[start * ID_LEN:max(start, stop) * ID_LEN]
+            part._views = self._views[start:stop]
+            if self._titles is not None:
+                part._titles = self._titles[start:stop]
+            if self._odd is not None:
+                part._odd = {k - start: v for k, v in self._odd.items() if start <= k < stop} or None
+            return part
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("VideoColumns index out of range")
+        return self._id(i)
+
+    def __iter__(self):
+        if self._odd is None:
+            # Giải mã cả cột một lần rồi cắt, nhanh hơn giải mã từng ID
+            text = self._ids.decode("ascii")
+            return (text[j:j + ID_LEN] for j in range(0, len(text), ID_LEN))
+        return (self._id(i) for i in range(len(self)))
+
+    def __eq__(self, other):
+        if isinstance(other, VideoColumns):
+            return list(self.rows()) == list(other.rows())
+        return NotImplemented
+
+    def views(self, i):
+        v = self._views[i]
+        return None if v < 0 else v
+
+    def title(self, i):
+        return None if self._titles is None else self._titles[i]
+
+    def joined(self, sep=","):
+        """Chuỗi ID nối bằng ``sep`` (ngược với ``from_joined``)."""
+        return sep.join(self)
+
+    def urls(self, fmt=WATCH_URL):
+        """URL của từng video, tạo khi lặp."""
+        return (fmt.format(vid) for vid in self)
+
+    def rows(self, fmt=WATCH_URL):
+        """Các bộ (url, views, title), tạo khi lặp (xuất file, gửi sang giao diện)."""
+        titles = self._titles
+        for i, vid in enumerate(self):
+            v = self._views[i]
+            yield fmt.format(vid), (None if v < 0 else v), (None if titles is None else titles[i])
+
+    @property
+    def nbytes(self):
+        """Bộ nhớ ước tính của các cột (byte), không tính tiêu đề."""
+        return len(self._ids) + self._views.itemsize * len(self._views)
+
+    def __repr__(self):
+        return f"VideoColumns({len(self)} video)"
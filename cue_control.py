@@ -0,0 +1,50 @@
+"""Huỷ và tạm dừng job đang chạy theo kiểu hợp tác.
+
+Engine gọi ``JobControl.check()`` trước mỗi request (trang playlist, lô statistics,
+metadata video): nếu đang tạm dừng thì chờ, nếu đã huỷ thì ném ``Cancelled``. Request
+đang bay vẫn chạy nốt, nhưng không có request mới nào được gửi sau khi huỷ.
+"""
+import threading
+
+
+class Cancelled(RuntimeError):
+    """Job đã bị huỷ."""
+
+
+class JobControl:
+    """Cờ huỷ/tạm dừng dùng chung giữa luồng điều khiển (GUI, CLI) và các luồng làm việc."""
+
+    def __init__(self):
+        self._cancel = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set() and not self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+        self._running.set()      # đánh thức các luồng đang chờ để chúng thấy cờ huỷ
+
+    def pause(self):
+        if not self._cancel.is_set():
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def sleep(self, seconds):
+        """Ngủ tối đa ``seconds`` giây nhưng thức dậy ngay khi bị huỷ (ném ``Cancelled``)."""
+        self._cancel.wait(seconds)
+        self.check()
+
+    def check(self):
+        """Chờ nếu đang tạm dừng; ném ``Cancelled`` nếu job đã bị huỷ."""
+        self._running.wait()
+        if self._cancel.is_set():
+            raise Cancelled("Job đã bị huỷ.")
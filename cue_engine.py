@@ -0,0 +1,954 @@
+"""Engine lấy URL video từ kênh YouTube, không phụ thuộc PyQt6.
+
+Dùng chung cho giao diện (``project 1.py``) và dòng lệnh (``cue_cli.py``).
+"""
+import re
+import heapq
+import math
+import random
+import itertools
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from cue_checkpoint import Checkpoint
+from cue_columns import VideoColumns
+from cue_control import Cancelled, JobControl
+from cue_http import HttpError, default_client
+from cue_metrics import Metrics
+from cue_progress import ProgressTracker
+from cue_ratelimit import AdaptiveLimiter
+from cue_quota import (KeyRing, QuotaMeter, QuotaExhausted, QUOTA_REASONS, RATE_LIMIT_REASONS,
+                       PAGE_SIZE, estimate_cost)
+from cue_store import channel_of_playlist
+from cue_topk import TopK
+from cue_views import ViewCountFetcher, classify_error
+from cue_ytdl import default_pool
+
+
+WATCH_URL = "https://www.youtube.com/watch?v={}"
+# Gốc URL của YouTube Data API v3 (benchmark offline trỏ về stub server cục bộ)
+API_BASE = "https://www.googleapis.com/youtube/v3"
+EXTRACT_TYPES = ("all", "recent", "popular")
+# Cách lấy view_count ở popular deep: luồng (mặc định) hoặc tiến trình con (cue_procpool)
+BACKENDS = ("thread", "process")
+# Số lần thử lấy metadata một video trước khi bỏ nó khỏi bảng xếp hạng
+VIEW_ATTEMPTS = 4
+
+
+def watch_url(vid):
+    return WATCH_URL.format(vid)
+
+
+def channel_url(raw):
+    """URL kênh chuẩn hoá từ UC…/@handle/URL (cũng là khoá của kênh trong cue_cache)."""
+    if raw.startswith("http"):
+        return raw.rstrip("/")
+    if raw.startswith("@"):
+        return f"https://www.youtube.com/{raw}"
+    return f"https://www.youtube.com/channel/{raw}"
+
+
+# Một kết quả; views/title là None khi nguồn không cung cấp (vd. all/recent qua cache)
+VideoResult = namedtuple("VideoResult", "url views title", defaults=(None, None))
+
+
+class YoutubeExtractor:
+    """Trích xuất URL video của một kênh; báo tiến trình qua ``on_progress(current, total)``
+    (đã gộp theo thời gian, tốc độ và ETA đọc ở ``self.progress``)."""
+
+    def __init__(self, channel_input, extract_type, video_count=None,
+                 use_api=False, api_key=None,
+                 quick_popular=False, cookies_path=None, workers=8,
+                 on_progress=None, executor=None, cache=None, refresh_cache=False,
+                 incremental=False, http=None, quota=None, api_fallback=True,
+                 checkpoint_dir=None, control=None, limiter=None, api_limiter=None,
+                 metrics=None, ydl_pool=None, progress_interval=0.05,
+                 backend="thread", processes=None, process_pool=None, process_batch=16,
+                 store=None, views_max_age=None):
+        self.channel_input = channel_input.strip()
+        self.extract_type = extract_type
+        self.video_count = int(video_count) if video_count else None
+        self.use_api = use_api
+        # api_key: 1 key, nhiều key cách nhau bởi dấu phẩy, hoặc cue_quota.KeyRing dùng chung
+        self.api_keys = KeyRing.parse(api_key)
+        self.api_key = self.api_keys.keys[0] if self.api_keys else ""
+        self.quick_popular = quick_popular
+        self.cookies_path = cookies_path
+        self.workers = max(1, int(workers))
+        self.on_progress = on_progress
+        # Gộp tiến trình (tối đa 1 lần / progress_interval giây) + tốc độ, ETA (cue_progress)
+        self.progress = ProgressTracker(on_progress, interval=progress_interval)
+        # Executor dùng chung (batch); None = tự tạo ThreadPoolExecutor riêng cho job
+        self.executor = executor
+        # cue_cache.Cache (tùy chọn); refresh_cache=True bỏ qua dữ liệu đã lưu nhưng vẫn ghi mới
+        self.cache = cache
+        self.refresh_cache = refresh_cache
+        # Đồng bộ tăng dần: chỉ lấy video mới hơn danh sách đã lưu (cần cache)
+        self.incremental = incremental
+        self._view_fetcher = None
+        self._leaderboard = None
+        # cue_http.HttpClient cho Data API; mặc định dùng client chung (keep-alive, gzip, retry)
+        self.http = http or default_client()
+        # Đếm quota Data API; hết quota thì (nếu api_fallback) chuyển sang yt-dlp
+        self.quota = quota or QuotaMeter()
+        self.api_fallback = api_fallback
+        self.api_fallback_reason = None
+        # Thư mục checkpoint cho popular deep/API (None = tắt); resumed = số video lấy lại từ checkpoint
+        self.checkpoint_dir = checkpoint_dir
+        self.resumed = 0
+        # Huỷ/tạm dừng hợp tác: mọi request mới đều đi qua control.check()
+        self.control = control or JobControl()
+        # Giới hạn tốc độ + song song thích nghi (AIMD); truyền vào để dùng chung giữa các job
+        self.limiter = limiter or AdaptiveLimiter(self.workers)
+        self.api_limiter = api_limiter or AdaptiveLimiter(self.workers)
+        # Video bỏ khỏi bảng xếp hạng: không xem được / vẫn lỗi sau VIEW_ATTEMPTS lần
+        self.unavailable_videos = 0
+        self.failed_videos = 0
+        self._lock = threading.Lock()
+        # Thời gian theo giai đoạn + số liệu request (cue_metrics); dùng chung được cho batch
+        self.metrics = metrics or Metrics()
+        # Pool YoutubeDL (cue_ytdl) dùng lại giữa các lần gọi; mặc định dùng pool chung của tiến trình
+        self.ydl_pool = ydl_pool or default_pool()
+        # Popular deep với backend="process": ``processes`` tiến trình con (mặc định = workers),
+        # mỗi lần gửi ``process_batch`` video; process_pool = cue_procpool.ViewProcessPool tự tạo
+        # (None = pool chung của tiến trình, giữ qua các job)
+        self.backend = backend
+        self.processes = processes
+        self.process_pool = process_pool
+        self.process_batch = max(1, int(process_batch))
+        # cue_store.VideoStore (tùy chọn): lượt xem mới lấy được ghi vào kho; chỉ khi có
+        # views_max_age (giây) thì lượt xem trong kho chưa quá tuổi đó mới được dùng lại
+        # thay vì lấy mới (None/0 = luôn lấy mới, thứ hạng không dựa vào số liệu cũ)
+        self.store = store
+        self.views_max_age = views_max_age
+
+    def _progress(self, current, total):
+        self.progress.update(current, total)
+
+    # ---------- cancel / pause ----------
+    def cancel(self):
+        """Ngừng gửi request mới; job kết thúc sớm với phần kết quả đã có."""
+        self.control.cancel()
+
+    def pause(self):
+        self.control.pause()
+
+    def resume(self):
+        self.control.resume()
+
+    @property
+    def cancelled(self):
+        return self.control.cancelled
+
+    def leaderboard(self):
+        """Bảng xếp hạng tạm thời (views, vid) của chế độ popular deep/API, đọc được giữa chừng."""
+        return self._leaderboard.snapshot() if self._leaderboard is not None else []
+
+    def _open_checkpoint(self, kind, uploads_playlist_id):
+        if not self.checkpoint_dir:
+            return None
+        ckpt = Checkpoint.for_job(self.checkpoint_dir, kind, uploads_playlist_id)
+        self.resumed = len(ckpt)
+        return ckpt
+
+    # ---------- yt-dlp helpers ----------
+    def _normalize_to_channel_url(self, raw):
+        return channel_url(raw)
+
+    def _extract_uc_from_input(self):
+        """Lấy UC… từ UC/@handle/URL bằng yt-dlp (ổn định, nhanh)."""
+        raw = self.channel_input
+
+        if raw.startswith("UC"):
+            return raw
+
+        m = re.search(r"/channel/(UC[0-9A-Za-z_-]+)", raw)
+        if m:
+            return m.group(1)
+
+        url = self._normalize_to_channel_url(raw)
+        if self.cache is not None and not self.refresh_cache:
+            uc = self.cache.get_channel(url)
+            if uc:
+                return uc
+        self.control.check()
+
+        with self.ydl_pool.lease(self._yt_opts(flat=True)) as ydl:
+            info = ydl.extract_info(url, download=False)
+
+        uc = None
+        if isinstance(info, dict):
+            uc = info.get("channel_id") or info.get("uploader_id") or info.get("id")
+            if not (uc and uc.startswith("UC")):
+                entries = info.get("entries") or []
+                if entries:
+                    first = entries[0] or {}
+                    uc = first.get("channel_id") or first.get("uploader_id")
+        if not (uc and uc.startswith("UC")):
+            raise RuntimeError("Không xác định được Channel ID (UC…) từ đầu vào.")
+        if self.cache is not None:
+            self.cache.put_channel(url, uc)
+        return uc
+
+    def _uploads_playlist_from_uc(self, uc):
+        return f"UU{uc[2:]}"
+
+    def _yt_opts(self, flat=True):
+        opts = {
+            "quiet": True,
+            "ignoreerrors": True,
+            "extract_flat": bool(flat),
+        }
+        if self.cookies_path:
+            opts["cookies"] = self.cookies_path
+        return opts
+
+    def _iter_upload_entries_lazy(self, uploads_playlist_id):
+        """Sinh (video ID, tiêu đề) của uploads playlist theo từng trang, chỉ tải trang kế khi cần."""
+        # Chỉ tính thời gian nằm trong yt-dlp vào giai đoạn paging, không tính phía tiêu thụ
+        return self.metrics.timed_iter("paging", self._iter_upload_entries_raw(uploads_playlist_id))
+
+    def _iter_upload_entries_raw(self, uploads_playlist_id):
+        url = f"https://www.youtube.com/playlist?list={uploads_playlist_id}"
+        with self.ydl_pool.lease(self._yt_opts(flat=True)) as ydl:
+            # process=False giữ entries ở dạng generator: dừng vòng lặp là dừng phân trang
+            info = ydl.extract_info(url, download=False, process=False)
+            if isinstance(info, dict) and info.get("_type") in ("url", "url_transparent"):
+                info = ydl.extract_info(info["url"], download=False, process=False)
+            for e in (info or {}).get("entries") or []:
+                vid = e.get("id") if e else None
+                if vid:
+                    yield vid, e.get("title")
+                # Kiểm tra trước khi vòng lặp kéo phần tử kế (có thể là tải trang mới)
+                self.control.check()
+
+    def _iter_upload_ids_lazy(self, uploads_playlist_id):
+        return (vid for vid, _ in self._iter_upload_entries_lazy(uploads_playlist_id))
+
+    # ---------- uploads cache / incremental sync ----------
+    def _cached_upload_ids(self, uploads_playlist_id):
+        """Trả về (ids, còn_hạn); ids là None nếu chưa có gì để dùng."""
+        if self.cache is None or self.refresh_cache:
+            return None, False
+        ids = self.cache.get_playlist(uploads_playlist_id)
+        if ids is not None:
+            return ids, True
+        if self.incremental:
+            return self.cache.get_playlist(uploads_playlist_id, max_age=math.inf), False
+        return None, False
+
+    def _take_until_known(self, ids, known):
+        """Lấy các ID mới cho đến khi gặp ID đã biết (uploads xếp mới nhất trước)."""
+        new_ids = []
+        for vid in ids:
+            if vid in known:
+                break
+            new_ids.append(vid)
+        return new_ids
+
+    def _merge_upload_ids(self, new_ids, cached):
+        seen = set(new_ids)
+        merged = VideoColumns(new_ids)
+        merged.extend(vid for vid in cached if vid not in seen)
+        return merged
+
+    def _store_upload_ids(self, uploads_playlist_id, ids):
+        if self.cache is not None:
+            self.cache.put_playlist(uploads_playlist_id, ids)
+
+    def _fetch_upload_ids(self, uploads_playlist_id):
+        """Danh sách video ID của uploads playlist, ưu tiên lấy từ cache."""
+        cached, fresh = self._cached_upload_ids(uploads_playlist_id)
+        if fresh:
+            return cached
+        if cached:
+            new_ids = self._take_until_known(self._iter_upload_ids_lazy(uploads_playlist_id), set(cached))
+            ids = self._merge_upload_ids(new_ids, cached)
+        else:
+            # Đọc lười từng trang, chỉ giữ ID dạng cột: entry dict của yt-dlp bị bỏ ngay
+            # thay vì giữ cả danh sách entries của kênh trong bộ nhớ
+            t0 = time.perf_counter()
+            ids = VideoColumns(self._iter_upload_ids_lazy(uploads_playlist_id))
+            self.metrics.observe("playlist", time.perf_counter() - t0, ok=bool(ids))
+        self._store_upload_ids(uploads_playlist_id, ids)
+        return ids
+
+    def _fetch_recent_entries(self, uploads_playlist_id, count):
+        """(ID, tiêu đề) của ``count`` video mới nhất; chỉ tải đủ số trang cần thiết."""
+        cached, fresh = self._cached_upload_ids(uploads_playlist_id)
+        if fresh:
+            return [(vid, None) for vid in cached[:count]]
+        if cached:
+            # Đồng bộ tăng dần: phần chênh lệch nhỏ, gộp luôn vào cache
+            return [(vid, None) for vid in self._fetch_upload_ids(uploads_playlist_id)[:count]]
+        if self.use_api and self.api_key:
+            try:
+                with self.metrics.stage("paging"):
+                    ids = self._api_upload_ids(uploads_playlist_id, limit=count)
+                return [(vid, None) for vid in ids]
+            except QuotaExhausted as e:
+                if not self.api_fallback:
+                    raise
+                self.api_fallback_reason = str(e)
+        return list(itertools.islice(self._iter_upload_entries_lazy(uploads_playlist_id), count))
+
+    def _iter_all(self, uploads_playlist_id):
+        """Mọi video của kênh, trả dần theo từng trang khi chưa có danh sách trong cache."""
+        cached, _ = self._cached_upload_ids(uploads_playlist_id)
+        if cached is not None:
+            ids = self._fetch_upload_ids(uploads_playlist_id)
+            total = len(ids)
+            for i, vid in enumerate(ids, start=1):
+                self.control.check()
+                self.metrics.count("videos")
+                yield VideoResult(watch_url(vid))
+                self._progress(i, total)
+            return
+
+        # Chưa biết tổng số video: báo total = 0 (giao diện hiện thanh "đang chạy")
+        ids = VideoColumns() if self.cache is not None else None
+        for i, (vid, title) in enumerate(self._iter_upload_entries_lazy(uploads_playlist_id), start=1):
+            if ids is not None:
+                ids.append(vid)
+            self.metrics.count("videos")
+            yield VideoResult(watch_url(vid), None, title)
+            self._progress(i, 0)
+        if ids is not None:
+            self._store_upload_ids(uploads_playlist_id, ids)
+
+    # ---------- Popular modes ----------
+    def _collect_popular_shelf_quick(self, base_channel_url, top_n):
+        """Cách nhanh: tab Popular, thường chỉ ~30–60 video."""
+        shelf_url = f"{base_channel_url}/videos?view=0&sort=p&flow=grid"
+        self.control.check()
+        with self.metrics.stage("paging"), self.ydl_pool.lease(self._yt_opts(flat=True)) as ydl:
+            info = ydl.extract_info(shelf_url, download=False)
+        self.metrics.count("videos", len((info or {}).get("entries") or []))
+        entries = (info or {}).get("entries") or []
+        total = min(top_n, len(entries)) if top_n else len(entries)
+        results = []
+        for i, e in enumerate(entries[:total], start=1):
+            vid = (e or {}).get("id")
+            if vid:
+                results.append(VideoResult(watch_url(vid), e.get("view_count"), e.get("title")))
+            self._progress(i, total)
+        return results
+
+    def _fetch_views_single(self, vid):
+        """(view_count, tiêu đề) cho 1 video (metadata tối thiểu, YoutubeDL mượn từ pool).
+
+        Mỗi lần gọi đi qua ``self.limiter``; bị chặn (429/kiểm tra bot) hoặc lỗi tạm thời
+        thì chờ rồi thử lại. Trả về (None, None) nếu video không xem được hoặc vẫn lỗi sau
+        ``VIEW_ATTEMPTS`` lần — video đó bị bỏ khỏi bảng xếp hạng thay vì tính 0 lượt xem.
+        Ném ``Cancelled`` nếu job bị huỷ.
+        """
+        for attempt in range(VIEW_ATTEMPTS):
+            self.control.check()
+            started = self.limiter.acquire(self.control.check)
+            try:
+                result = self._view_fetcher.fetch_meta(vid)
+            except Exception as e:
+                kind = classify_error(e)
+                self.limiter.release(started, kind)
+                self.metrics.observe("video", time.monotonic() - started, ok=False)
+                if kind == "unavailable":
+                    break
+                self.metrics.count("throttled" if kind == "throttled" else "retries_video")
+                base = 5.0 if kind == "throttled" else 1.0
+                self.control.sleep(min(60.0, base * 2 ** attempt) * (0.5 + random.random() / 2))
+                continue
+            self.limiter.release(started, "ok")
+            self.metrics.observe("video", time.monotonic() - started)
+            if result[0] is not None:
+                return result
+            break
+        else:
+            with self._lock:
+                self.failed_videos += 1
+            return None, None
+        with self._lock:
+            self.unavailable_videos += 1
+        return None, None
+
+    def _stored_views(self, ids):
+        """{vid: (views, title)} còn mới trong kho của ``ids``; {} nếu không có kho, không bật
+        dùng lại (``views_max_age``) hoặc refresh_cache."""
+        if self.store is None or not self.views_max_age or self.refresh_cache:
+            return {}
+        found = self.store.fresh_views(ids, self.views_max_age)
+        if found:
+            self.metrics.count("views_from_store", len(found))
+        return found
+
+    def _remember_views(self, uploads_playlist_id, rows):
+        # rows: (vid, views, title, vị trí trong uploads)
+        if self.store is not None and rows:
+            self.store.put_views(rows, channel_of_playlist(uploads_playlist_id))
+
+    def _collect_popular_deep_concurrent(self, uploads_playlist_id, top_n):
+        """Chính xác: quét hết uploads, lấy view_count song song, giữ top N bằng heap.
+
+        Có checkpoint thì chạy tiếp từ lần trước: chỉ lấy lượt xem của video còn thiếu.
+        """
+        ckpt = self._open_checkpoint("deep", uploads_playlist_id)
+        try:
+            results = self._deep_scan(uploads_playlist_id, top_n, ckpt)
+        except BaseException:
+            if ckpt is not None:
+                ckpt.close()
+            raise
+        self._finish_checkpoint(ckpt)
+        return results
+
+    def _finish_checkpoint(self, ckpt):
+        # Bị huỷ thì giữ checkpoint để lần sau chạy tiếp; xong trọn vẹn thì xoá
+        if ckpt is None:
+            return
+        if self.control.cancelled:
+            ckpt.close()
+        else:
+            ckpt.discard()
+
+    def _deep_scan(self, uploads_playlist_id, top_n, ckpt):
+        ids = ckpt.ids if ckpt is not None else None
+        if ids is None:
+            ids = self._fetch_upload_ids(uploads_playlist_id)
+            if ckpt is not None and ids:
+                ckpt.set_ids(ids)
+        total = len(ids)
+        if total == 0:
+            return []
+
+        top = self._leaderboard = TopK(top_n)
+        restored = ckpt.views if ckpt is not None else {}
+        stored = self._stored_views(vid for vid in ids if vid not in restored)
+        done = 0
+        missing = []
+        for i, vid in enumerate(ids):
+            known = restored.get(vid) or stored.get(vid)
+            if known:
+                views, title = known
+                top.push(views, vid, order=i, payload=title)
+                done += 1
+            else:
+                missing.append((i, vid))
+        self._progress(done, total)
+        fetched = []
+
+        def record(i, vid, views, title):
+            nonlocal done
+            if views is not None:
+                top.push(views, vid, order=i, payload=title)
+                if ckpt is not None:
+                    ckpt.add_views(((vid, views, title),))
+                fetched.append((vid, views, title, i))
+                if len(fetched) >= 500:
+                    self._remember_views(uploads_playlist_id, fetched)
+                    fetched.clear()
+            self.metrics.count("videos")
+            done += 1
+            self._progress(done, total)
+
+        def collect(ex):
+            # Chỉ giữ một cửa sổ future đang chờ: huỷ job thì không còn hàng nghìn request xếp hàng
+            window = 2 * self.workers
+            todo = iter(missing)
+            running = {}
+
+            def fill():
+                while len(running) < window and not self.control.cancelled:
+                    nxt = next(todo, None)
+                    if nxt is None:
+                        return
+                    running[ex.submit(self._fetch_views_single, nxt[1])] = nxt
+
+            fill()
+            while running:
+                if self.control.cancelled:
+                    for fut in [f for f in running if f.cancel()]:
+                        del running[fut]
+                    if not running:
+                        break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    i, vid = running.pop(fut)
+                    views, title = None, None
+                    try:
+                        views, title = fut.result()
+                    except Cancelled:
+                        continue
+                    except Exception:
+                        with self._lock:
+                            self.failed_videos += 1
+                    record(i, vid, views, title)
+                fill()
+
+        try:
+            if missing and self.backend == "process":
+                with self.metrics.stage("views"):
+                    self._collect_views_processes(missing, record)
+            elif missing:
+                self._view_fetcher = ViewCountFetcher(self.cookies_path, pool=self.ydl_pool)
+                try:
+                    with self.metrics.stage("views"):
+                        if self.executor is not None:
+                            collect(self.executor)
+                        else:
+                            with ThreadPoolExecutor(max_workers=self.workers) as ex:
+                                collect(ex)
+                finally:
+                    self._view_fetcher.close()
+        finally:
+            self._remember_views(uploads_playlist_id, fetched)
+
+        return [VideoResult(watch_url(vid), views, title) for views, vid, title in top.items()]
+
+    def _collect_views_processes(self, missing, record):
+        """Backend ``"process"``: gửi lô ID sang tiến trình con (cue_procpool), nhận kết quả theo lô.
+
+        Mỗi lô giữ 1 chỗ của ``self.limiter`` (độ trễ đo theo lô) và lấy 1 token tốc độ cho
+        mỗi video. Video bị chặn / lỗi tạm thời được hẹn giờ thử lại trong lô sau (backoff và
+        tối đa ``VIEW_ATTEMPTS`` lần như backend luồng, không chặn các lô khác);
+        ``record(i, vid, views, title)`` được gọi đúng 1 lần cho mỗi video.
+        """
+        from cue_procpool import shared_pool
+        pool = self.process_pool or shared_pool(self.processes or self.workers, self.cookies_path)
+        queue = deque((i, vid, 0) for i, vid in missing)
+        delayed = []                # heap (thời điểm thử lại, i, vid, attempt)
+        window = 2 * pool.processes
+        running = {}
+
+        def fill():
+            now = time.monotonic()
+            while delayed and delayed[0][0] <= now:
+                queue.appendleft(heapq.heappop(delayed)[1:])
+            while queue and len(running) < window and not self.control.cancelled:
+                # Không chờ chỗ trống khi chính các lô đang chạy giữ hết limiter (chỉ luồng này trả chỗ)
+                if running and self.limiter.in_flight >= self.limiter.concurrency:
+                    return
+                started = self.limiter.acquire(self.control.check)
+                try:
+                    batch = [queue.popleft() for _ in range(min(self.process_batch, len(queue)))]
+                    for _ in batch[1:]:
+                        self.limiter.bucket.take(self.control.check)
+                    fut = pool.submit([vid for _, vid, _ in batch])
+                except BaseException:
+                    self.limiter.release(started, "error")
+                    raise
+                running[fut] = (batch, started)
+
+        def handle(batch, started, rows):
+            kinds = {row[1] for row in rows}
+            self.limiter.release(started, "throttled" if "throttled" in kinds
+                                 else "error" if "error" in kinds else "ok")
+            for (i, vid, attempt), (_, kind, views, title, seconds) in zip(batch, rows):
+                self.metrics.observe("video", seconds, ok=kind in ("ok", "unavailable"))
+                if kind in ("throttled", "error"):
+                    self.metrics.count("throttled" if kind == "throttled" else "retries_video")
+                    if attempt + 1 < VIEW_ATTEMPTS:
+                        base = 5.0 if kind == "throttled" else 1.0
+                        delay = min(60.0, base * 2 ** attempt) * (0.5 + random.random() / 2)
+                        heapq.heappush(delayed, (time.monotonic() + delay, i, vid, attempt + 1))
+                        continue
+                    with self._lock:
+                        self.failed_videos += 1
+                elif kind == "unavailable":
+                    with self._lock:
+                        self.unavailable_videos += 1
+                record(i, vid, views, title)
+
+        try:
+            fill()
+            while running or (delayed and not self.control.cancelled):
+                if self.control.cancelled:
+                    for fut in [f for f in running if f.cancel()]:
+                        self.limiter.release(running.pop(fut)[1], "error")
+                    if not running:
+                        break
+                if not running:
+                    # Chỉ còn video chờ thử lại
+                    self.control.sleep(max(0.0, delayed[0][0] - time.monotonic()))
+                    fill()
+                    continue
+                timeout = max(0.0, delayed[0][0] - time.monotonic()) if delayed else None
+                finished, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    batch, started = running.pop(fut)
+                    try:
+                        rows = fut.result()
+                    except Exception:
+                        # Tiến trình con chết giữa chừng: cả lô coi như lỗi tạm thời
+                        rows = [(vid, "error", None, None, 0.0) for _, vid, _ in batch]
+                    handle(batch, started, rows)
+                fill()
+        except Cancelled:
+            pass
+        finally:
+            # Bị huỷ/lỗi giữa chừng: trả chỗ limiter của các lô chưa nhận (limiter có thể dùng chung)
+            for fut, (_, started) in running.items():
+                fut.cancel()
+                self.limiter.release(started, "error")
+
+    # ---------- YouTube Data API (fast & full) ----------
+    def _http_get_json(self, url, params):
+        """GET Data API với key lấy xoay vòng từ KeyRing và ghi nhận quota theo endpoint.
+
+        Key hết quota (403 quotaExceeded) bị loại và request được gửi lại bằng key khác;
+        403 rateLimitExceeded được thử lại sau khi chờ.
+        """
+        endpoint = url.rsplit("/", 1)[-1]
+        rate_limited = 0
+        while True:
+            self.control.check()
+            key = self.api_keys.acquire()
+            self.api_keys.record(key, self.quota.charge(endpoint))
+            started = self.api_limiter.acquire(self.control.check)
+            received = [0]
+            hooks = {
+                "on_retry": lambda: self.metrics.count("retries_http"),
+                "on_response": lambda status, n: received.__setitem__(0, received[0] + n),
+                "control": self.control,
+            }
+            try:
+                data = self.http.get_json(url, dict(params, key=key), **hooks)
+                self.api_limiter.release(started, "ok")
+                self.metrics.observe(endpoint, time.monotonic() - started, nbytes=received[0])
+                return data
+            except HttpError as e:
+                reasons = e.api_reasons()
+                throttled = e.status == 429 or any(r in RATE_LIMIT_REASONS for r in reasons)
+                self.api_limiter.release(started, "throttled" if throttled else "error")
+                self.metrics.observe(endpoint, time.monotonic() - started, ok=False, nbytes=received[0])
+                if e.status == 403 and any(r in QUOTA_REASONS for r in reasons):
+                    self.api_keys.mark_exhausted(key)
+                    self.metrics.count("api_key_exhausted")
+                    continue
+                if e.status == 403 and any(r in RATE_LIMIT_REASONS for r in reasons) and rate_limited < 5:
+                    self.metrics.count("retries_api_rate_limit")
+                    self.control.sleep(min(30.0, 2 ** rate_limited))
+                    rate_limited += 1
+                    continue
+                raise
+            except BaseException:
+                self.api_limiter.release(started, "error")
+                self.metrics.observe(endpoint, time.monotonic() - started, ok=False, nbytes=received[0])
+                raise
+
+    def _api_upload_ids(self, uploads_pid, limit=None, on_ids=None, start_token=None, prior_ids=None):
+        """Lấy videoId từ uploads qua playlistItems (50/req).
+
+        Dừng sớm khi đồng bộ tăng dần gặp ID đã biết, hoặc khi đủ ``limit`` ID
+        (danh sách cắt ngắn thì không ghi vào cache). Nếu có ``on_ids``, mỗi trang
+        ID mới được chuyển ngay cho ``on_ids(ids, next_token)`` (và không tự báo tiến
+        trình); ``next_token`` là None ở trang cuối. ``start_token``/``prior_ids`` để
+        chạy tiếp phân trang từ checkpoint.
+        """
+        cached, fresh = self._cached_upload_ids(uploads_pid)
+        if fresh:
+            return cached if limit is None else cached[:limit]
+        if limit is not None:
+            cached = None
+        known = set(cached) if cached else ()
+
+        video_ids = VideoColumns(prior_ids or ())
+        page_token = start_token
+        total_scan_reported = 0
+        reached_known = False
+        while True:
+            params = {
+                "part": "contentDetails",
+                "playlistId": uploads_pid,
+                "maxResults": 50 if limit is None else max(1, min(50, limit - len(video_ids))),
+                "fields": "nextPageToken,items(contentDetails(videoId))",
+            }
+            if page_token:
+                params["pageToken"] = page_token
+            data = self._http_get_json(f"{API_BASE}/playlistItems", params)
+            items = data.get("items") or []
+            page_start = len(video_ids)
+            for it in items:
+                vid = it["contentDetails"].get("videoId")
+                if vid in known:
+                    reached_known = True
+                    break
+                if vid:
+                    video_ids.append(vid)
+            page_token = data.get("nextPageToken")
+
+            if on_ids is not None:
+                on_ids(video_ids[page_start:], None if reached_known else page_token)
+            else:
+                # cập nhật tiến trình theo số item đã gom
+                total_scan_reported += len(items)
+                self._progress(total_scan_reported, limit or max(total_scan_reported, 1))
+
+            if limit is not None and len(video_ids) >= limit:
+                return video_ids[:limit]
+            if reached_known or not page_token:
+                break
+
+        if limit is not None:
+            return video_ids
+        if cached:
+            video_ids = self._merge_upload_ids(video_ids, cached)
+        self._store_upload_ids(uploads_pid, video_ids)
+        return video_ids
+
+    def _fetch_stats_batch(self, batch):
+        """``videos?part=statistics`` cho tối đa 50 ID; trả về list (views, vid)."""
+        stats = self._http_get_json(
+            f"{API_BASE}/videos",
+            {"part": "statistics", "id": ",".join(batch),
+             "fields": "items(id,statistics(viewCount))"}
+        )
+        scored = []
+        for it in stats.get("items", []):
+            vid = it.get("id")
+            views = int(it.get("statistics", {}).get("viewCount", 0))
+            if vid:
+                scored.append((views, vid))
+        return scored
+
+    def _api_channel_info(self, uc):
+        """(uploads playlist ID, tổng số video) của kênh qua ``channels`` (1 đơn vị quota)."""
+        ch = self._http_get_json(
+            f"{API_BASE}/channels",
+            {"part": "contentDetails,statistics", "id": uc,
+             "fields": "items(contentDetails(relatedPlaylists(uploads)),statistics(videoCount))"}
+        )
+        items = ch.get("items") or []
+        if not items:
+            raise RuntimeError("API không tìm thấy kênh.")
+        uploads_pid = items[0]["contentDetails"]["relatedPlaylists"]["uploads"]
+        video_count = int((items[0].get("statistics") or {}).get("videoCount") or 0)
+        return uploads_pid, video_count
+
+    def plan_api_cost(self):
+        """Ước lượng quota cho job trước khi chạy: dict gồm số video, đơn vị cần và còn lại."""
+        uc = self._extract_uc_from_input()
+        _, channel_videos = self._api_channel_info(uc)
+        return {
+            "channel_id": uc,
+            "channel_videos": channel_videos,
+            "estimated_units": estimate_cost(self.extract_type, self.video_count, channel_videos),
+            "remaining_units": self.api_keys.remaining(),
+        }
+
+    def _collect_popular_via_api(self, uc, top_n):
+        """Dùng YouTube Data API v3: rất nhanh & đủ. Cần API key."""
+        if not self.api_key:
+            raise RuntimeError("Thiếu API key cho YouTube Data API.")
+
+        # Lấy uploads playlist ID và số video để kiểm tra quota trước khi quét
+        uploads_pid, channel_videos = self._api_channel_info(uc)
+        ckpt = self._open_checkpoint("api", uploads_pid)
+        try:
+            pages = math.ceil(channel_videos / PAGE_SIZE)
+            _, fresh = self._cached_upload_ids(uploads_pid)
+            need = pages if fresh else 2 * pages
+            if ckpt is not None:
+                need -= (len(ckpt.page_ids) + len(ckpt)) // PAGE_SIZE
+            remaining = self.api_keys.remaining()
+            if need > remaining:
+                raise QuotaExhausted(f"Không đủ quota API: cần ~{need} đơn vị, còn {remaining}.")
+            with self.metrics.stage("api"):
+                results = self._api_scan(uploads_pid, top_n, ckpt)
+        except BaseException:
+            if ckpt is not None:
+                ckpt.close()
+            raise
+        self._finish_checkpoint(ckpt)
+        return results
+
+    def _api_scan(self, uploads_pid, top_n, ckpt):
+        # Pipeline: mỗi khi playlistItems gom đủ 50 ID thì gửi ngay lô statistics
+        # cho pool (tối đa `workers` request song song), không chờ hết danh sách.
+        lock = threading.Lock()
+        top = self._leaderboard = TopK(top_n)
+        restored = ckpt.views if ckpt is not None else {}
+        batches = []
+        pending = []
+        fed = 0
+        known = 0
+        done = 0
+
+        def on_done(fut, order):
+            nonlocal done
+            if fut.cancelled() or isinstance(fut.exception(), Cancelled):
+                return
+            if fut.exception() is None:
+                scored = fut.result()
+                # order = vị trí trong playlist: hoà lượt xem thì video mới hơn đứng trước
+                for views, vid in scored:
+                    top.push(views, vid, order=order.get(vid, 0))
+                self.metrics.count("videos", len(scored))
+                if ckpt is not None:
+                    ckpt.add_views((vid, views, None) for views, vid in scored)
+                self._remember_views(uploads_pid, [(vid, views, None, order.get(vid))
+                                                   for views, vid in scored])
+            with lock:
+                done += len(order)
+                cur, tot = done, known
+            self._progress(cur, max(tot, cur, 1))
+
+        def submit(batch):
+            order = dict((vid, i) for i, vid in batch)
+            fut = ex.submit(self._fetch_stats_batch, [vid for _, vid in batch])
+            fut.add_done_callback(lambda f, o=order: on_done(f, o))
+            batches.append(fut)
+
+        def feed(ids):
+            nonlocal fed, known, done
+            skipped = 0
+            stored = self._stored_views([vid for vid in ids if vid not in restored])
+            for vid in ids:
+                if vid in restored or vid in stored:
+                    # Đã có lượt xem từ checkpoint / kho (còn mới): không gọi lại API
+                    top.push((restored.get(vid) or stored[vid])[0], vid, order=fed)
+                    skipped += 1
+                else:
+                    pending.append((fed, vid))
+                fed += 1
+            with lock:
+                known += len(ids)
+                done += skipped
+            while len(pending) >= 50:
+                submit(pending[:50])
+                del pending[:50]
+
+        def on_page(ids, next_token):
+            if ckpt is not None:
+                ckpt.add_page(ids, next_token)
+            feed(ids)
+
+        own_pool = None
+        ex = self.executor
+        if ex is None:
+            ex = own_pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            prior = ckpt.page_ids if ckpt is not None else []
+            if ckpt is not None and ckpt.pages_done:
+                # Lần trước đã phân trang xong: phần còn lại (đồng bộ tăng dần) nằm trong cache
+                cached, _ = self._cached_upload_ids(uploads_pid)
+                video_ids = self._merge_upload_ids(prior, cached or [])
+            else:
+                feed(prior)
+                video_ids = self._api_upload_ids(
+                    uploads_pid, on_ids=on_page,
+                    start_token=ckpt.next_token if prior else None, prior_ids=prior)
+            # ID chưa đi qua feed (lấy từ cache / checkpoint) nằm sau phần đã feed
+            feed(video_ids[fed:])
+            if pending:
+                for i in range(0, len(pending), 50):
+                    submit(pending[i:i+50])
+                pending.clear()
+            for fut in batches:
+                fut.result()     # chờ xong và ném lại lỗi (nếu có)
+        except Cancelled:
+            # Trả về bảng xếp hạng của các lô đã xong
+            for fut in batches:
+                fut.cancel()
+        finally:
+            if own_pool is not None:
+                own_pool.shutdown(wait=True, cancel_futures=True)
+
+        return [VideoResult(watch_url(vid), views) for views, vid in top.snapshot()]
+
+    # ---------- Main run ----------
+    def iter_results(self):
+        """Sinh ``VideoResult`` theo thứ tự kết quả.
+
+        all/recent trả dần từng video ngay khi có; popular chỉ biết top N sau khi
+        quét xong nên trả cả bảng xếp hạng ở cuối. Nếu job bị huỷ (``cancel()``),
+        generator kết thúc bình thường với phần kết quả đã có (popular: bảng xếp
+        hạng tạm thời) và ``cancelled`` là True.
+        """
+        self.metrics.start()
+        try:
+            yield from self._iter_results()
+        except Cancelled:
+            pass
+        finally:
+            self.progress.flush()
+            self.metrics.finish()
+
+    def _iter_results(self):
+        if self.extract_type not in EXTRACT_TYPES:
+            raise RuntimeError("Kiểu lấy video không hợp lệ.")
+        if self.backend not in BACKENDS:
+            raise RuntimeError("Backend không hợp lệ (thread hoặc process).")
+
+        # Luôn resolve UC id 1 lần
+        with self.metrics.stage("resolve"):
+            uc = self._extract_uc_from_input()
+        uploads_pid = self._uploads_playlist_from_uc(uc)
+
+        # Popular
+        if self.extract_type == "popular":
+            top_n = max(1, int(self.video_count or 50))
+
+            # Ưu tiên API nếu bật; hết quota thì chuyển sang deep (yt-dlp)
+            if self.use_api:
+                try:
+                    results = self._collect_popular_via_api(uc, top_n)
+                except QuotaExhausted as e:
+                    if not self.api_fallback:
+                        raise
+                    self.api_fallback_reason = str(e)
+                    results = self._collect_popular_deep_concurrent(uploads_pid, top_n)
+                yield from results
+                return
+
+            # Nếu chọn nhanh (shelf)
+            if self.quick_popular:
+                base = self._normalize_to_channel_url(self.channel_input)
+                yield from self._collect_popular_shelf_quick(base, top_n)
+                return
+
+            # Mặc định: deep + đa luồng
+            yield from self._collect_popular_deep_concurrent(uploads_pid, top_n)
+            return
+
+        # All dựa vào toàn bộ uploads; Recent chỉ lấy N video đầu
+        if self.extract_type == "all":
+            yield from self._iter_all(uploads_pid)
+            return
+
+        entries = self._fetch_recent_entries(uploads_pid, max(1, int(self.video_count or 1)))
+        total = len(entries)
+        self.metrics.count("videos", total)
+        for i, (vid, title) in enumerate(entries, start=1):
+            yield VideoResult(watch_url(vid), None, title)
+            self._progress(i, total)
+
+    def iter_batches(self, size=200, max_delay=1.0):
+        """Gom ``iter_results()`` thành từng lô: đủ ``size`` kết quả hoặc quá ``max_delay`` giây."""
+        batch = []
+        started = time.monotonic()
+        for result in self.iter_results():
+            if not batch:
+                started = time.monotonic()
+            batch.append(result)
+            if len(batch) >= size or time.monotonic() - started >= max_delay:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def iter_urls(self):
+        """Sinh URL theo thứ tự kết quả; các chế độ all/recent trả dần từng URL."""
+        return (r.url for r in self.iter_results())
+
+    def run(self):
+        """Chạy trọn job và trả về list URL."""
+        return list(self.iter_urls())
+
+    def collect(self, titles=True):
+        """Chạy trọn job, trả về ``cue_columns.VideoColumns`` (URL chỉ tạo khi xuất);
+        ``titles=False`` bỏ tiêu đề cho nhẹ hơn nữa."""
+        rows = self.iter_results()
+        if not titles:
+            rows = ((r[0], r[1]) for r in rows)
+        return VideoColumns.from_rows(rows)
@@ -0,0 +1,338 @@
+"""Xuất URL dạng luồng: ghi từng dòng khi có kết quả, bộ nhớ không tăng theo số dòng.
+
+Định dạng hỗ trợ: txt, csv, jsonl, parquet (cần ``pyarrow``) và xlsx (openpyxl
+``write_only``, ghi thẳng ra file tạm thay vì giữ cả workbook trong RAM).
+
+Mọi writer ghi vào file tạm cùng thư mục rồi mới đổi tên (``os.replace``) khi
+đóng thành công, nên lỗi giữa chừng không để lại file ghi dở.
+"""
+import csv
+import itertools
+import json
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+DEFAULT_COLUMNS = ("url",)
+# Cột của cue_engine.VideoResult
+RESULT_COLUMNS = ("url", "views", "title")
+INT_COLUMNS = ("views",)
+
+
+class UrlWriter:
+    """Writer cơ sở: ``write_row(tuple)`` theo ``columns``; dùng được với ``with``.
+
+    Lớp con ghi vào ``self.tmp_path`` và cài ``_close()``; ``close()`` đổi tên file tạm
+    thành ``path``, ``abort()`` xoá file tạm.
+    """
+
+    ext = ""
+
+    def __init__(self, path, columns=DEFAULT_COLUMNS):
+        self.path = path
+        self.columns = tuple(columns)
+        self.count = 0
+        folder, name = os.path.split(os.path.abspath(path))
+        self.tmp_path = os.path.join(folder, f".{name}.{os.getpid()}.tmp")
+        self._done = False
+
+    def write(self, url, *extra):
+        self.write_row((url,) + extra)
+
+    def write_row(self, row):
+        self._write_row(row)
+        self.count += 1
+
+    def write_many(self, rows):
+        """Ghi các URL (chuỗi) hoặc các dòng (tuple, vd. ``VideoResult``)."""
+        for row in rows:
+            if isinstance(row, str):
+                self.write(row)
+            else:
+                self.write_row(tuple(row)[:len(self.columns)])
+        return self.count
+
+    def _write_row(self, row):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def close(self):
+        if self._done:
+            return
+        self._done = True
+        self._close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        if self._done:
+            return
+        self._done = True
+        try:
+            self._close()
+        except Exception:
+            pass
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+class TxtWriter(UrlWriter):
+    ext = "txt"
+
+    def __init__(self, path, columns=DEFAULT_COLUMNS):
+        super().__init__(path, columns)
+        self._f = open(self.tmp_path, "w", encoding="utf-8", newline="\n")
+
+    def _write_row(self, row):
+        self._f.write("\t".join("" if v is None else str(v) for v in row) + "\n")
+
+    def _close(self):
+        self._f.close()
+
+
+class CsvWriter(UrlWriter):
+    ext = "csv"
+
+    def __init__(self, path, columns=DEFAULT_COLUMNS):
+        super().__init__(path, columns)
+        # utf-8-sig để Excel mở đúng tiếng Việt
+        self._f = open(self.tmp_path, "w", encoding="utf-8-sig", newline="")
+        self._w = csv.writer(self._f)
+        self._w.writerow(self.columns)
+
+    def _write_row(self, row):
+        self._w.writerow(row)
+
+    def _close(self):
+        self._f.close()
+
+
+class JsonlWriter(UrlWriter):
+    ext = "jsonl"
+
+    def __init__(self, path, columns=DEFAULT_COLUMNS):
+        super().__init__(path, columns)
+        self._f = open(self.tmp_path, "w", encoding="utf-8", newline="\n")
+
+    def _write_row(self, row):
+        self._f.write(json.dumps(dict(zip(self.columns, row)), ensure_ascii=False) + "\n")
+
+    def _close(self):
+        self._f.close()
+
+
+class XlsxWriter(UrlWriter):
+    """xlsx qua openpyxl ``write_only``: các dòng được xả ra file tạm, không giữ trong RAM."""
+
+    ext = "xlsx"
+
+    def __init__(self, path, columns=DEFAULT_COLUMNS):
+        super().__init__(path, columns)
+        from openpyxl import Workbook
+        self._wb = Workbook(write_only=True)
+        self._ws = self._wb.create_sheet("Sheet1")
+        self._ws.append(list(self.columns))
+
+    def _write_row(self, row):
+        self._ws.append(list(row))
+
+    def _close(self):
+        if self._wb is not None:
+            self._wb.save(self.tmp_path)
+            self._wb = None
+
+
+class ParquetWriter(UrlWriter):
+    """Parquet qua pyarrow, ghi theo row group ``batch_rows`` dòng."""
+
+    ext = "parquet"
+
+    def __init__(self, path, columns=DEFAULT_COLUMNS, batch_rows=65536):
+        super().__init__(path, columns)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Cần cài pyarrow để xuất Parquet (pip install pyarrow).")
+        self._pa = pa
+        self._batch_rows = batch_rows
+        self._buf = [[] for _ in self.columns]
+        self._schema = pa.schema([(c, pa.int64() if c in INT_COLUMNS else pa.string())
+                                  for c in self.columns])
+        self._writer = pq.ParquetWriter(self.tmp_path, self._schema)
+
+    def _write_row(self, row):
+        for col, v in zip(self._buf, row):
+            col.append(v)
+        if len(self._buf[0]) >= self._batch_rows:
+            self._flush()
+
+    def _flush(self):
+        if self._buf[0]:
+            table = self._pa.Table.from_arrays(
+                [self._pa.array(col, type=f.type) for col, f in zip(self._buf, self._schema)],
+                schema=self._schema,
+            )
+            self._writer.write_table(table)
+            self._buf = [[] for _ in self.columns]
+
+    def _close(self):
+        if self._writer is not None:
+            self._flush()
+            self._writer.close()
+            self._writer = None
+
+
+WRITERS = {
+    "xlsx": XlsxWriter,
+    "csv": CsvWriter,
+    "jsonl": JsonlWriter,
+    "parquet": ParquetWriter,
+    "txt": TxtWriter,
+}
+FORMATS = tuple(WRITERS)
+
+
+def format_from_path(path, default="txt"):
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    return ext if ext in WRITERS else default
+
+
+def open_writer(path, fmt=None, columns=DEFAULT_COLUMNS):
+    fmt = fmt or format_from_path(path)
+    if fmt not in WRITERS:
+        raise RuntimeError(f"Định dạng xuất không hỗ trợ: {fmt}")
+    return WRITERS[fmt](path, columns)
+
+
+def export_urls(urls, path, fmt=None, columns=DEFAULT_COLUMNS):
+    """Ghi một iterable URL (hoặc dòng theo ``columns``) ra ``path``; trả về số dòng đã ghi."""
+    with open_writer(path, fmt, columns) as w:
+        return w.write_many(urls)
+
+
+def part_path(folder, prefix, index, fmt):
+    return os.path.join(folder, f"{prefix}_part{index}.{fmt}")
+
+
+def _write_part(path, fmt, urls, columns=DEFAULT_COLUMNS):
+    # Hàm cấp module để chạy được trong ProcessPoolExecutor
+    with open_writer(path, fmt, columns) as w:
+        w.write_many(urls)
+    return path
+
+
+# Từ ngưỡng này trở lên, xlsx/parquet (tốn CPU thuần Python) được ghi bằng nhiều tiến trình
+PROCESS_THRESHOLD = 50000
+
+
+def export_split_parallel(urls, folder, per_file, fmt="xlsx", prefix="youtube_urls",
+                          workers=4, use_processes=None, on_progress=None,
+                          columns=DEFAULT_COLUMNS, total_rows=None):
+    """Ghi nhiều phần cùng lúc. Trả về list đường dẫn theo thứ tự.
+
+    ``urls`` là iterable bất kỳ (list, ``ResultSpool``...): chỉ cắt từng phần khi cần,
+    tối đa ``2 * workers`` phần nằm trong bộ nhớ cùng lúc. ``total_rows`` (mặc định
+    ``len(urls)`` nếu có) dùng để chọn tiến trình/luồng và tính tổng số phần.
+    ``use_processes=None`` tự chọn: tiến trình cho xlsx/parquet lớn, luồng cho phần còn lại.
+    ``on_progress(done_parts, total_parts)`` được gọi ở luồng gọi hàm mỗi khi xong một phần.
+    """
+    per_file = max(1, int(per_file))
+    if total_rows is None and hasattr(urls, "__len__"):
+        total_rows = len(urls)
+    if use_processes is None:
+        use_processes = fmt in ("xlsx", "parquet") and (total_rows or 0) >= PROCESS_THRESHOLD
+    if use_processes:
+        # Nạp multiprocessing khi thật sự cần (không làm chậm lúc mở giao diện)
+        from concurrent.futures import ProcessPoolExecutor as pool_cls
+    else:
+        pool_cls = ThreadPoolExecutor
+    total = -(-total_rows // per_file) if total_rows is not None else 0
+    workers = max(1, min(workers, total or workers))
+    paths = []
+    done = 0
+    if on_progress:
+        on_progress(0, total)
+    it = iter(urls)
+    with pool_cls(max_workers=workers) as ex:
+        running = set()
+        while True:
+            chunk = list(itertools.islice(it, per_file))
+            if chunk:
+                path = part_path(folder, prefix, len(paths) + 1, fmt)
+                paths.append(path)
+                running.add(ex.submit(_write_part, path, fmt, chunk, tuple(columns)))
+            # Giới hạn số phần đang chờ để bộ nhớ không tăng theo tổng số dòng
+            while running and (not chunk or len(running) >= 2 * workers):
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    fut.result()
+                    done += 1
+                    if on_progress:
+                        on_progress(done, max(total, len(paths)))
+            if not chunk:
+                break
+    return paths
+
+
+class ResultSpool:
+    """File JSONL tạm giữ kết quả trong lúc trích xuất (mỗi dòng một mảng theo ``columns``).
+
+    Kết quả được ghi xuống đĩa theo từng lô nên bộ nhớ không tăng theo số video, và
+    vẫn còn nguyên nếu job lỗi/bị huỷ giữa chừng. Đọc lại bằng ``iter_rows()`` (hoặc
+    lặp trực tiếp) để xuất ra định dạng cuối.
+    """
+
+    def __init__(self, folder=None, columns=RESULT_COLUMNS):
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(prefix="cue_results_", suffix=".jsonl", dir=folder)
+        self._f = os.fdopen(fd, "w", encoding="utf-8", newline="\n")
+        self.columns = tuple(columns)
+        self.count = 0
+
+    def append_many(self, rows):
+        for row in rows:
+            self._f.write(json.dumps(list(row)[:len(self.columns)], ensure_ascii=False) + "\n")
+            self.count += 1
+        # Xả ngay để phần đã lấy được không mất khi tiến trình bị dừng
+        self._f.flush()
+
+    def iter_rows(self):
+        if not self._f.closed:
+            self._f.flush()
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield tuple(json.loads(line))
+
+    def __iter__(self):
+        return self.iter_rows()
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        if not self._f.closed:
+            self._f.close()
+
+    def discard(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,193 @@
+"""HTTP client dùng chung cho YouTube Data API.
+
+- Giữ kết nối keep-alive theo từng luồng và từng host (không bắt tay TLS lại mỗi request).
+- Gửi ``Accept-Encoding: gzip`` và tự giải nén.
+- Có timeout và thử lại với backoff luỹ thừa khi gặp 429/5xx hoặc lỗi kết nối.
+"""
+import gzip
+import json
+import random
+import threading
+import time
+import http.client
+import urllib.parse
+import urllib.request
+
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HttpError(RuntimeError):
+    """Lỗi HTTP không thể thử lại (hoặc đã hết lượt thử)."""
+
+    def __init__(self, status, reason, body=b"", url=""):
+        self.status = status
+        self.reason = reason
+        self.body = body
+        self.url = url
+        msg = self.api_message()
+        # Không đưa url vào thông báo: query có chứa API key
+        super().__init__(f"HTTP {status} {reason}" + (f": {msg}" if msg else ""))
+
+    def json(self):
+        try:
+            return json.loads(self.body.decode("utf-8"))
+        except Exception:
+            return None
+
+    def api_reasons(self):
+        """Danh sách ``reason`` trong lỗi Google API (vd. ``quotaExceeded``)."""
+        data = self.json() or {}
+        errors = (data.get("error") or {}).get("errors") or []
+        return [e.get("reason") for e in errors if e.get("reason")]
+
+    def api_message(self):
+        data = self.json() or {}
+        return (data.get("error") or {}).get("message")
+
+
+class HttpClient:
+    """Client GET/JSON an toàn đa luồng, mỗi luồng giữ pool kết nối riêng."""
+
+    def __init__(self, timeout=15.0, max_retries=4, backoff=0.5, max_backoff=30.0,
+                 user_agent="CUE/1.0 (gzip)"):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.user_agent = user_agent
+        self._local = threading.local()
+        self._proxies = urllib.request.getproxies()
+
+    # ---------- connections ----------
+    def _pool(self):
+        pool = getattr(self._local, "pool", None)
+        if pool is None:
+            pool = self._local.pool = {}
+        return pool
+
+    def _proxy_for(self, scheme, host):
+        proxy = self._proxies.get(scheme)
+        return proxy if proxy and not urllib.request.proxy_bypass(host) else None
+
+    def _new_connection(self, scheme, host, port):
+        proxy = self._proxy_for(scheme, host)
+        if proxy:
+            p = urllib.parse.urlsplit(proxy)
+            conn = http.client.HTTPSConnection(p.hostname, p.port or 443, timeout=self.timeout) \
+                if p.scheme == "https" else \
+                http.client.HTTPConnection(p.hostname, p.port or 80, timeout=self.timeout)
+            if scheme == "https":
+                conn.set_tunnel(host, port)
+            return conn
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _connection(self, scheme, host, port):
+        key = (scheme, host, port)
+        pool = self._pool()
+        conn = pool.get(key)
+        if conn is None:
+            conn = pool[key] = self._new_connection(scheme, host, port)
+        return conn
+
+    def _drop(self, scheme, host, port):
+        conn = self._pool().pop((scheme, host, port), None)
+        if conn is not None:
+            conn.close()
+
+    def close(self):
+        """Đóng các kết nối của luồng hiện tại."""
+        pool = self._pool()
+        for conn in pool.values():
+            conn.close()
+        pool.clear()
+
+    # ---------- requests ----------
+    def _delay(self, attempt, retry_after=None):
+        if retry_after:
+            try:
+                return min(self.max_backoff, float(retry_after))
+            except ValueError:
+                pass
+        base = min(self.max_backoff, self.backoff * (2 ** attempt))
+        return base * (0.5 + random.random() / 2)
+
+    def get(self, url, params=None, on_retry=None, on_response=None, control=None):
+        """GET và trả về body (đã giải nén) dạng bytes.
+
+        ``on_retry()`` được gọi mỗi lần thử lại, ``on_response(status, wire_bytes)`` mỗi
+        response nhận được (byte trên đường truyền, trước khi giải nén). Có ``control``
+        (``cue_control.JobControl``) thì thời gian chờ giữa các lần thử dừng ngay khi job bị huỷ.
+        """
+        sleep = control.sleep if control is not None else time.sleep
+        if params:
+            url = f"{url}?{urllib.parse.urlencode(params)}"
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme
+        host = parts.hostname
+        port = parts.port or (443 if scheme == "https" else 80)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        if scheme == "http" and self._proxy_for(scheme, host):
+            # Proxy HTTP chuyển tiếp (không tunnel) cần URL đầy đủ trong dòng request
+            target = f"{scheme}://{host}:{port}{target}"
+        headers = {
+            "Accept-Encoding": "gzip",
+            "Accept": "application/json",
+            "User-Agent": self.user_agent,
+            "Connection": "keep-alive",
+        }
+
+        attempt = 0
+        while True:
+            conn = self._connection(scheme, host, port)
+            try:
+                conn.request("GET", target, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.HTTPException, OSError):
+                # Kết nối keep-alive bị đóng phía server / lỗi mạng: mở lại và thử lại
+                self._drop(scheme, host, port)
+                if attempt >= self.max_retries:
+                    raise
+                if on_retry:
+                    on_retry()
+                sleep(self._delay(attempt))
+                attempt += 1
+                continue
+
+            if on_response:
+                on_response(resp.status, len(body))
+            if resp.getheader("Content-Encoding", "").lower() == "gzip":
+                body = gzip.decompress(body)
+            if resp.will_close:
+                self._drop(scheme, host, port)
+
+            if 200 <= resp.status < 300:
+                return body
+            if resp.status in RETRY_STATUSES and attempt < self.max_retries:
+                if on_retry:
+                    on_retry()
+                sleep(self._delay(attempt, resp.getheader("Retry-After")))
+                attempt += 1
+                continue
+            raise HttpError(resp.status, resp.reason, body, url)
+
+    def get_json(self, url, params=None, **hooks):
+        return json.loads(self.get(url, params, **hooks).decode("utf-8"))
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def default_client():
+    """Client dùng chung của tiến trình (các job/kênh dùng lại kết nối của nhau)."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
@@ -0,0 +1,197 @@
+"""Đo thời gian từng giai đoạn và số liệu request của một job (hoặc cả batch).
+
+- Giai đoạn (``stage``): resolve, paging, views, api, export — tổng thời gian thực.
+- Request theo loại (``video``, ``playlistItems``, ``videos``...): số lần, số lỗi,
+  byte nhận được, độ trễ p50/p95/p99 (ước lượng trên mẫu reservoir, bộ nhớ cố định).
+- Bộ đếm sự kiện: số lần thử lại, số lần bị chặn, số video đã xử lý...
+
+Xuất ra JSON hoặc định dạng text của Prometheus (``dump(path)`` chọn theo đuôi file).
+"""
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _Series:
+    def __init__(self, reservoir):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.samples = []
+        self._reservoir = reservoir
+
+    def add(self, seconds, ok, nbytes, rng):
+        self.count += 1
+        self.errors += 0 if ok else 1
+        self.seconds += seconds
+        self.bytes += nbytes
+        if len(self.samples) < self._reservoir:
+            self.samples.append(seconds)
+        else:
+            j = rng.randrange(self.count)
+            if j < self._reservoir:
+                self.samples[j] = seconds
+
+    def quantiles(self):
+        data = sorted(self.samples)
+        if not data:
+            return {}
+        return {q: data[min(len(data) - 1, int(q * len(data)))] for q in QUANTILES}
+
+
+class Metrics:
+    """Bộ thu số liệu an toàn đa luồng; một instance có thể dùng chung cho nhiều job."""
+
+    def __init__(self, reservoir=10000):
+        self._lock = threading.Lock()
+        self._rng = random.Random(0)
+        self._reservoir = reservoir
+        self.started = None
+        self.finished = None
+        self.stages = {}
+        self.counters = {}
+        self.requests = {}
+
+    # ---------- ghi nhận ----------
+    def start(self):
+        with self._lock:
+            if self.started is None:
+                self.started = time.monotonic()
+
+    def finish(self):
+        with self._lock:
+            self.finished = time.monotonic()
+
+    def add_stage(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - t0)
+
+    def timed_iter(self, name, iterable):
+        """Bọc iterator: chỉ cộng thời gian nằm trong ``next()`` (không tính thời gian bên gọi)."""
+        it = iter(iterable)
+        while True:
+            t0 = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                self.add_stage(name, time.perf_counter() - t0)
+                return
+            self.add_stage(name, time.perf_counter() - t0)
+            yield item
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, kind, seconds, ok=True, nbytes=0):
+        with self._lock:
+            series = self.requests.get(kind)
+            if series is None:
+                series = self.requests[kind] = _Series(self._reservoir)
+            series.add(seconds, ok, nbytes, self._rng)
+
+    # ---------- đọc ----------
+    @property
+    def wall(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    def throughput(self):
+        wall = self.wall
+        return self.counters.get("videos", 0) / wall if wall > 0 else 0.0
+
+    def snapshot(self):
+        with self._lock:
+            requests = {
+                kind: {
+                    "count": s.count, "errors": s.errors, "bytes": s.bytes,
+                    "seconds": round(s.seconds, 6),
+                    **{f"p{int(q * 100)}": round(v, 6) for q, v in s.quantiles().items()},
+                }
+                for kind, s in self.requests.items()
+            }
+            stages = {k: round(v, 6) for k, v in self.stages.items()}
+            counters = dict(self.counters)
+        return {
+            "wall_seconds": round(self.wall, 6),
+            "videos_per_second": round(self.throughput(), 3),
+            "stages": stages,
+            "requests": requests,
+            "counters": counters,
+        }
+
+    def summary(self):
+        """Một dòng ngắn cho thanh trạng thái."""
+        snap = self.snapshot()
+        parts = [f"{snap['wall_seconds']:.1f}s", f"{snap['videos_per_second']:.1f} video/s"]
+        if snap["stages"]:
+            slowest = max(snap["stages"].items(), key=lambda kv: kv[1])
+            parts.append(f"chậm nhất: {slowest[0]} {slowest[1]:.1f}s")
+        total = sum(r["count"] for r in snap["requests"].values())
+        if total:
+            parts.append(f"{total} request")
+            p95 = max((r.get("p95", 0) for r in snap["requests"].values()), default=0)
+            parts.append(f"p95 {p95 * 1000:.0f}ms")
+        retries = sum(v for k, v in snap["counters"].items() if k.startswith("retries"))
+        if retries:
+            parts.append(f"{retries} lần thử lại")
+        return " · ".join(parts)
+
+    # ---------- xuất ----------
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix="cue_"):
+        snap = self.snapshot()
+        lines = [
+            f"# TYPE {prefix}wall_seconds gauge",
+            f"{prefix}wall_seconds {snap['wall_seconds']}",
+            f"# TYPE {prefix}videos_per_second gauge",
+            f"{prefix}videos_per_second {snap['videos_per_second']}",
+            f"# TYPE {prefix}stage_seconds gauge",
+        ]
+        lines += [f'{prefix}stage_seconds{{stage="{k}"}} {v}' for k, v in sorted(snap["stages"].items())]
+        lines.append(f"# TYPE {prefix}request_latency_seconds summary")
+        for kind, r in sorted(snap["requests"].items()):
+            for q in QUANTILES:
+                key = f"p{int(q * 100)}"
+                if key in r:
+                    lines.append(f'{prefix}request_latency_seconds{{kind="{kind}",quantile="{q}"}} {r[key]}')
+            lines.append(f'{prefix}request_latency_seconds_sum{{kind="{kind}"}} {r["seconds"]}')
+            lines.append(f'{prefix}request_latency_seconds_count{{kind="{kind}"}} {r["count"]}')
+        lines.append(f"# TYPE {prefix}request_errors_total counter")
+        lines += [f'{prefix}request_errors_total{{kind="{k}"}} {r["errors"]}'
+                  for k, r in sorted(snap["requests"].items())]
+        lines.append(f"# TYPE {prefix}response_bytes_total counter")
+        lines += [f'{prefix}response_bytes_total{{kind="{k}"}} {r["bytes"]}'
+                  for k, r in sorted(snap["requests"].items())]
+        lines.append(f"# TYPE {prefix}events_total counter")
+        lines += [f'{prefix}events_total{{name="{k}"}} {v}' for k, v in sorted(snap["counters"].items())]
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Ghi ra ``path``: ``.prom``/``.txt`` là Prometheus text, còn lại là JSON."""
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+        return path
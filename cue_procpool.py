@@ -0,0 +1,91 @@
+"""Backend đa tiến trình cho popular deep: lấy view_count trong các tiến trình con.
+
+Phân tích trang video của yt-dlp (JSON lớn, regex) tốn CPU; chạy bằng luồng thì mọi luồng
+tranh nhau một GIL nên máy nhiều nhân không nhanh hơn. ``ViewProcessPool`` chạy
+``ViewCountFetcher`` trong các tiến trình con:
+
+- mỗi tiến trình giữ ``YoutubeDL`` của riêng nó (``cue_ytdl.YdlPool`` của tiến trình đó),
+  tạo một lần rồi dùng lại cho mọi lô và mọi job sau;
+- tiến trình cha gửi một lô ID, nhận lại kết quả cả lô trong một lần (ít pickle/IPC hơn
+  gửi từng video).
+
+Tiến trình con chỉ thử mỗi video một lần và trả về loại kết quả (``"ok"``, ``"unavailable"``,
+``"throttled"``, ``"error"`` như ``cue_views.classify_error``); thử lại, giới hạn tốc độ,
+checkpoint và bảng xếp hạng vẫn do tiến trình cha lo.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from cue_views import ViewCountFetcher, classify_error
+
+
+DEFAULT_BATCH = 16              # số video mỗi lô gửi sang tiến trình con
+
+_fetcher = None                 # ViewCountFetcher của tiến trình con (tạo trong _init_worker)
+
+
+def _init_worker(cookies_path, setup):
+    global _fetcher
+    if setup is not None:
+        setup()
+    _fetcher = ViewCountFetcher(cookies_path)
+
+
+def fetch_batch(vids):
+    """Chạy trong tiến trình con: list (vid, kind, views, title, giây) theo thứ tự ``vids``."""
+    out = []
+    for vid in vids:
+        t0 = time.perf_counter()
+        try:
+            views, title = _fetcher.fetch_meta(vid)
+            kind = "ok" if views is not None else "unavailable"
+        except Exception as e:
+            # Chỉ gửi loại lỗi về: exception của yt-dlp không phải lúc nào cũng pickle được
+            views, title, kind = None, None, classify_error(e)
+        out.append((vid, kind, views, title, time.perf_counter() - t0))
+    return out
+
+
+class ViewProcessPool:
+    """Các tiến trình con lấy view_count theo lô; ``submit(vids)`` trả về Future của
+    ``fetch_batch``. ``setup`` (hàm pickle được, tuỳ chọn) chạy đầu tiên trong mỗi tiến
+    trình con, vd. benchmark cài bản phát lại yt-dlp."""
+
+    def __init__(self, processes=None, cookies_path=None, setup=None):
+        self.processes = max(1, int(processes or os.cpu_count() or 1))
+        self.cookies_path = cookies_path
+        self.broken = False
+        self._ex = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                       initargs=(cookies_path, setup))
+
+    def submit(self, vids):
+        try:
+            return self._ex.submit(fetch_batch, list(vids))
+        except BrokenProcessPool:
+            self.broken = True
+            raise
+
+    def close(self):
+        self._ex.shutdown(wait=False, cancel_futures=True)
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+
+def shared_pool(processes=None, cookies_path=None):
+    """Pool dùng chung của tiến trình: tiến trình con (và ``YoutubeDL`` ấm của chúng) được giữ
+    giữa các job; đổi số tiến trình / file cookies hoặc pool bị hỏng thì tạo pool mới."""
+    global _shared_pool
+    processes = max(1, int(processes or os.cpu_count() or 1))
+    with _shared_lock:
+        pool = _shared_pool
+        if (pool is None or pool.broken or pool.processes != processes
+                or pool.cookies_path != cookies_path):
+            if pool is not None:
+                pool.close()
+            pool = _shared_pool = ViewProcessPool(processes, cookies_path)
+        return pool
@@ -0,0 +1,84 @@
+"""Gộp các lần báo tiến trình và ước lượng tốc độ / thời gian còn lại.
+
+Engine gọi ``update(current, total)`` sau mỗi video; với kênh vài chục nghìn video, gửi
+nguyên từng lần sang giao diện (signal Qt qua luồng) làm nghẽn vòng lặp sự kiện. Tracker
+chỉ chuyển tiếp khi đã qua ``interval`` giây (mặc định 20 lần/giây) *và* ``current`` đã tăng
+ít nhất ``min_items`` video hoặc ``min_fraction`` của tổng (mặc định 0,1%: tối đa ~1000 lần
+cho cả job dù chạy nhanh hay chậm), cộng thêm các mốc không được bỏ: lần đầu, khi ``total``
+đổi (sang giai đoạn mới) và khi xong. Lần cuối bị gộp được gửi bằng ``flush()``.
+
+Tốc độ (video/giây, trung bình trượt) và ETA được tính ngay trong luồng làm việc, bên gọi
+đọc qua ``rate`` / ``eta`` trong callback.
+"""
+import threading
+import time
+
+
+class ProgressTracker:
+    """Bộ gộp tiến trình an toàn đa luồng; ``callback(current, total)`` có thể là None."""
+
+    def __init__(self, callback=None, interval=0.05, smoothing=0.3, min_items=1,
+                 min_fraction=0.001):
+        self.callback = callback
+        self.interval = interval
+        self.min_items = min_items
+        self.min_fraction = min_fraction
+        self.smoothing = smoothing
+        self.current = 0
+        self.total = 0
+        self.rate = None            # video/giây (EWMA), None khi chưa đủ dữ liệu
+        self._sent = None           # (current, total) đã gửi gần nhất
+        self._sent_at = 0.0
+        self._mark = None           # (thời điểm, current) để tính tốc độ
+        self._lock = threading.Lock()
+
+    @property
+    def eta(self):
+        """Số giây còn lại ước tính, hoặc None nếu chưa biết tổng / tốc độ."""
+        if not self.total or not self.rate:
+            return None
+        return max(0.0, (self.total - self.current) / self.rate)
+
+    def _measure(self, now, current):
+        if self._mark is None or current < self._mark[1]:
+            # Lần đầu hoặc giai đoạn mới đếm lại từ đầu
+            self._mark = (now, current)
+            self.rate = None
+            return
+        t0, c0 = self._mark
+        if now - t0 < self.interval:
+            return
+        inst = (current - c0) / (now - t0)
+        self.rate = inst if self.rate is None else (1 - self.smoothing) * self.rate + self.smoothing * inst
+        self._mark = (now, current)
+
+    def update(self, current, total):
+        now = time.monotonic()
+        with self._lock:
+            self.current, self.total = current, total
+            self._measure(now, current)
+            if self.callback is None:
+                return
+            due = (self._sent is None
+                   or total != self._sent[1]
+                   or (total and current >= total)
+                   or (now - self._sent_at >= self.interval
+                       and abs(current - self._sent[0]) >= self._step(total)))
+            if due and (current, total) != self._sent:
+                self._sent, self._sent_at = (current, total), now
+                self.callback(current, total)
+
+    __call__ = update
+
+    def _step(self, total):
+        # Bước tối thiểu giữa hai lần gửi, theo số video và theo tỉ lệ tổng
+        return max(self.min_items, total * self.min_fraction)
+
+    def flush(self):
+        """Gửi trạng thái mới nhất nếu nó đã bị gộp."""
+        with self._lock:
+            if self.callback is None or self._mark is None:
+                return
+            if (self.current, self.total) != self._sent:
+                self._sent, self._sent_at = (self.current, self.total), time.monotonic()
+                self.callback(self.current, self.total)
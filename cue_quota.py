@@ -0,0 +1,211 @@
+"""Đếm quota YouTube Data API, ước lượng chi phí job và xoay vòng nhiều API key.
+
+Chi phí (đơn vị quota) theo tài liệu Data API v3: ``channels``, ``playlistItems``,
+``videos`` = 1 đơn vị mỗi request; ``search`` = 100. Quota mặc định mỗi key là
+10.000 đơn vị/ngày, reset lúc 0h giờ Thái Bình Dương.
+"""
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+
+ENDPOINT_COSTS = {
+    "channels": 1,
+    "playlistItems": 1,
+    "videos": 1,
+    "search": 100,
+}
+DEFAULT_DAILY_QUOTA = 10000
+QUOTA_REASONS = ("quotaExceeded", "dailyLimitExceeded")
+RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+PAGE_SIZE = 50
+
+
+class QuotaExhausted(RuntimeError):
+    """Mọi API key đã hết quota (hoặc không đủ cho job)."""
+
+
+def _pacific_today():
+    try:
+        from zoneinfo import ZoneInfo
+        tz = ZoneInfo("America/Los_Angeles")
+    except Exception:
+        tz = timezone(timedelta(hours=-8))
+    return datetime.now(tz).strftime("%Y-%m-%d")
+
+
+def _fingerprint(key):
+    # File trạng thái chỉ lưu dấu vân tay của key, không lưu key thật
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def estimate_cost(extract_type, video_count=None, channel_videos=None):
+    """Ước lượng số đơn vị quota cho một kênh.
+
+    ``channel_videos`` là tổng số video của kênh (``statistics.videoCount``);
+    popular cần 1 (channels) + 1 trang playlistItems và 1 lô videos cho mỗi 50 video,
+    recent chỉ cần các trang playlistItems chứa N video đầu.
+    """
+    total = channel_videos or 0
+    if extract_type == "popular":
+        pages = math.ceil(total / PAGE_SIZE)
+        return ENDPOINT_COSTS["channels"] + pages * (ENDPOINT_COSTS["playlistItems"] + ENDPOINT_COSTS["videos"])
+    if extract_type == "recent":
+        n = min(video_count or 1, total) if total else (video_count or 1)
+        return math.ceil(n / PAGE_SIZE) * ENDPOINT_COSTS["playlistItems"]
+    return 0
+
+
+class QuotaMeter:
+    """Đếm request và đơn vị quota đã dùng theo endpoint (an toàn đa luồng)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.units = {}
+
+    def charge(self, endpoint):
+        cost = ENDPOINT_COSTS.get(endpoint, 1)
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.units[endpoint] = self.units.get(endpoint, 0) + cost
+        return cost
+
+    @property
+    def total(self):
+        with self._lock:
+            return sum(self.units.values())
+
+    def snapshot(self):
+        with self._lock:
+            return {"requests": dict(self.requests), "units": dict(self.units),
+                    "total_units": sum(self.units.values())}
+
+
+class KeyRing:
+    """Danh sách API key dùng xoay vòng (round-robin); bỏ qua key đã hết quota.
+
+    Lượng quota đã dùng của từng key được đếm cục bộ; nếu có ``state_path`` thì
+    lưu ra file JSON theo ngày (giờ Thái Bình Dương) để các lần chạy sau cùng ngày biết.
+    """
+
+    def __init__(self, keys, daily_quota=DEFAULT_DAILY_QUOTA, state_path=None):
+        self.keys = [k.strip() for k in keys if k and k.strip()]
+        self.keys = list(dict.fromkeys(self.keys))
+        self.daily_quota = daily_quota
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self._next = 0
+        self._day = _pacific_today()
+        self._used = {k: 0 for k in self.keys}
+        self._exhausted = set()
+        self._last_save = 0.0
+        self._load()
+
+    @classmethod
+    def parse(cls, value, **kwargs):
+        """Nhận KeyRing, list key, hoặc chuỗi nhiều key cách nhau bởi dấu phẩy/khoảng trắng."""
+        if isinstance(value, KeyRing):
+            return value
+        if isinstance(value, (list, tuple)):
+            return cls(value, **kwargs)
+        return cls((value or "").replace(",", " ").split(), **kwargs)
+
+    def __bool__(self):
+        return bool(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+    # ---------- state ----------
+    def _load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("day") != self._day:
+            return
+        used = state.get("used") or {}
+        exhausted = set(state.get("exhausted") or ())
+        for k in self.keys:
+            fp = _fingerprint(k)
+            self._used[k] = int(used.get(fp, 0))
+            if fp in exhausted:
+                self._exhausted.add(k)
+
+    def _save(self, force=False):
+        # Ghi file tối đa 1 lần/giây, trừ khi force (key hết quota / kết thúc job)
+        if not self.state_path:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_save < 1.0:
+            return
+        self._last_save = now
+        state = {
+            "day": self._day,
+            "used": {_fingerprint(k): n for k, n in self._used.items()},
+            "exhausted": sorted(_fingerprint(k) for k in self._exhausted),
+        }
+        tmp = self.state_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp, self.state_path)
+        except OSError:
+            pass
+
+    def _roll_day(self):
+        today = _pacific_today()
+        if today != self._day:
+            self._day = today
+            self._used = {k: 0 for k in self.keys}
+            self._exhausted.clear()
+
+    # ---------- usage ----------
+    def acquire(self):
+        """Key kế tiếp còn quota; ném ``QuotaExhausted`` nếu không còn key nào."""
+        with self._lock:
+            self._roll_day()
+            for _ in range(len(self.keys)):
+                key = self.keys[self._next % len(self.keys)]
+                self._next += 1
+                if key not in self._exhausted and self._used[key] < self.daily_quota:
+                    return key
+        raise QuotaExhausted("Tất cả API key đã hết quota trong ngày.")
+
+    def record(self, key, units):
+        with self._lock:
+            self._used[key] = self._used.get(key, 0) + units
+            self._save()
+
+    def mark_exhausted(self, key):
+        with self._lock:
+            self._exhausted.add(key)
+            self._save(force=True)
+
+    def flush(self):
+        with self._lock:
+            self._save(force=True)
+
+    def remaining(self):
+        with self._lock:
+            self._roll_day()
+            return sum(max(0, self.daily_quota - self._used[k])
+                       for k in self.keys if k not in self._exhausted)
+
+    def usage(self):
+        """Quota đã dùng theo key (key được rút gọn để có thể in/log)."""
+        with self._lock:
+            return {
+                "day": self._day,
+                "used": {k[:6] + "…": n for k, n in self._used.items()},
+                "exhausted": sorted(k[:6] + "…" for k in self._exhausted),
+            }
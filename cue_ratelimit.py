@@ -0,0 +1,177 @@
+"""Giới hạn tốc độ và tự điều chỉnh số request song song (AIMD).
+
+- ``TokenBucket``: tối đa ``rate`` request/giây, cho phép dồn ``burst`` request.
+- ``AdaptiveLimiter``: số request đang bay tăng dần (+1 mỗi "vòng" thành công) và
+  giảm theo cấp số nhân khi bị chặn (429, trang kiểm tra bot) hoặc khi độ trễ tăng
+  vọt so với mức nền; tốc độ của token bucket được điều chỉnh cùng chiều. Mặc định
+  không có trần tốc độ: chỉ khi bị chặn limiter mới tự đặt một trần (từ tốc độ đang đạt)
+  rồi nới dần và bỏ hẳn khi đã hồi phục.
+
+Một limiter có thể dùng chung cho nhiều job (batch), vì giới hạn của YouTube tính theo IP.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """Token bucket an toàn đa luồng; ``rate`` None/0 = không giới hạn."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate) if rate else None
+        self.burst = max(1.0, float(burst))
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def take(self, check=None):
+        """Lấy 1 token, chờ nếu cần; ``check()`` được gọi trong lúc chờ (để huỷ được)."""
+        while True:
+            with self._lock:
+                if self.rate is None:
+                    return
+                self._refill(time.monotonic())
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            if check:
+                check()
+            time.sleep(min(wait, 0.25))
+
+    def set_rate(self, rate):
+        """Đổi tốc độ; None/0 = bỏ giới hạn."""
+        with self._lock:
+            now = time.monotonic()
+            if self.rate is not None:
+                self._refill(now)
+            else:
+                self._stamp = now
+            self.rate = float(rate) if rate else None
+
+
+class AdaptiveLimiter:
+    """Giới hạn song song kiểu AIMD kèm token bucket.
+
+    Mỗi request: ``started = acquire()`` rồi ``release(started, outcome)`` với
+    ``outcome`` là ``"ok"``, ``"throttled"`` hoặc ``"error"`` (lỗi khác, không điều chỉnh).
+    Mỗi lần giảm cách nhau ít nhất ``cooldown`` giây để một đợt lỗi không kéo giới hạn về 1.
+    ``max_rate`` (request/giây) là trần cố định tuỳ chọn; None = không giới hạn cho tới khi
+    bị chặn.
+    """
+
+    def __init__(self, max_concurrency=8, max_rate=None, min_rate=0.5,
+                 decrease=0.5, latency_factor=3.0, min_spike=0.5, cooldown=2.0):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_rate = float(max_rate) if max_rate else None
+        self.min_rate = min_rate
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.min_spike = min_spike
+        self.cooldown = cooldown
+        # Bắt đầu ở mức tối đa (như trước đây), chỉ giảm khi có tín hiệu tắc nghẽn
+        self.limit = float(self.max_concurrency)
+        self.bucket = TokenBucket(self.max_rate, burst=self.max_concurrency)
+        self.in_flight = 0
+        self.throttled = 0
+        self._latency = None        # EWMA độ trễ
+        self._baseline = None       # độ trễ nền (xấp xỉ mức thấp nhất gần đây)
+        self._last_cut = 0.0
+        self._ceiling = None        # tốc độ lúc bị chặn khi không có max_rate
+        self._cond = threading.Condition()
+
+    @property
+    def concurrency(self):
+        return max(1, int(self.limit))
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    def acquire(self, check=None):
+        with self._cond:
+            while self.in_flight >= self.concurrency:
+                if check:
+                    check()
+                self._cond.wait(0.25)
+            self.in_flight += 1
+        try:
+            self.bucket.take(check)
+        except BaseException:
+            self._done()
+            raise
+        return time.monotonic()
+
+    def _done(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def release(self, started, outcome="ok"):
+        now = time.monotonic()
+        latency = now - started
+        with self._cond:
+            self.in_flight -= 1
+            if outcome == "throttled":
+                self.throttled += 1
+                self._cut(self.decrease, now, throttled=True)
+            elif outcome == "ok":
+                self._observe(latency)
+                if self._latency_spike():
+                    # Độ trễ tăng vọt: dấu hiệu sắp bị chặn, giảm nhẹ trước
+                    self._cut(0.8, now)
+                else:
+                    self._grow()
+            self._cond.notify_all()
+
+    def _latency_spike(self):
+        # Cần vượt cả hệ số lẫn một khoảng tuyệt đối, tránh nhiễu khi độ trễ nền rất nhỏ
+        return (self._baseline is not None
+                and self._latency > self.latency_factor * self._baseline
+                and self._latency - self._baseline > self.min_spike)
+
+    def _observe(self, latency):
+        self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+        if self._baseline is None or latency < self._baseline:
+            self._baseline = latency
+        else:
+            # Cho mức nền trôi lên chậm để thích nghi khi mạng chậm đi thật
+            self._baseline += 0.01 * (latency - self._baseline)
+
+    def _grow(self):
+        # Cộng thêm ~1 sau mỗi "vòng" ``limit`` request thành công, chỉ khi giới hạn
+        # đang thực sự được dùng hết (không nới khi tải thấp)
+        if self.in_flight + 1 < self.concurrency:
+            return
+        self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+        if self.bucket.rate is None:
+            return
+        cap = self.max_rate or self._ceiling
+        rate = self.bucket.rate + cap * 0.05 / self.limit
+        if self.max_rate:
+            self.bucket.set_rate(min(self.max_rate, rate))
+        elif rate >= self._ceiling:
+            # Đã về lại tốc độ lúc bị chặn mà không bị chặn thêm: bỏ trần tự đặt
+            self.bucket.set_rate(None)
+        else:
+            self.bucket.set_rate(rate)
+
+    def _cut(self, factor, now, throttled=False):
+        if now - self._last_cut < self.cooldown:
+            return
+        self._last_cut = now
+        rate = self.bucket.rate
+        if rate is None and throttled and self._latency:
+            # Không có trần mà server đã chặn: lấy tốc độ đang đạt (song song / độ trễ)
+            rate = self._ceiling = self.limit / self._latency
+        self.limit = max(1.0, self.limit * factor)
+        if rate is not None:
+            self.bucket.set_rate(max(self.min_rate, rate * factor))
+
+    def snapshot(self):
+        with self._cond:
+            return {"concurrency": self.concurrency, "in_flight": self.in_flight,
+                    "rate": self.bucket.rate, "throttled": self.throttled}
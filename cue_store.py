@@ -0,0 +1,172 @@
+"""Kho metadata video SQLite dùng chung giữa các lần chạy.
+
+Mỗi video lấy được lượt xem (popular deep/API) được ghi lại: video ID, kênh (UC…), lượt
+xem, tiêu đề, vị trí trong uploads (0 = mới nhất) và thời điểm lấy. Kho dùng để:
+
+- bỏ qua việc lấy lại lượt xem còn mới hơn ``max_age`` giây (``fresh_views``);
+- không xuất lại video đã xuất ra cùng một đích (``exported`` / ``mark_exported``);
+- trả lời "top N của các kênh này" không cần mạng (``top``).
+
+Bản ghi cũ hơn ``retention`` giây bị xoá khi mở kho.
+"""
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+from cue_cache import default_cache_dir
+
+
+DEFAULT_MAX_AGE = 24 * 3600    # tuổi tối đa (giây) của lượt xem được dùng lại, khi bật
+
+# SQLite giới hạn số tham số mỗi câu lệnh (999 ở bản cũ)
+_CHUNK = 500
+
+
+def channel_of_playlist(playlist_id):
+    """UU… (uploads) -> UC… của kênh; playlist khác thì giữ nguyên."""
+    if playlist_id and playlist_id.startswith("UU"):
+        return "UC" + playlist_id[2:]
+    return playlist_id
+
+
+class VideoStore:
+    """Kho thread-safe; nhiều tiến trình dùng chung được (WAL).
+
+    ``max_age`` (giây) là tuổi tối đa của lượt xem được dùng lại thay vì lấy mới.
+    """
+
+    def __init__(self, path=None, max_age=DEFAULT_MAX_AGE, retention=90 * 86400):
+        if path is None:
+            path = os.path.join(default_cache_dir(), "videos.sqlite3")
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_age = max_age
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS videos (
+                    video_id TEXT PRIMARY KEY,
+                    channel_id TEXT,
+                    views INTEGER NOT NULL,
+                    title TEXT,
+                    position INTEGER,
+                    fetched_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS exports (
+                    target TEXT NOT NULL,
+                    video_id TEXT NOT NULL,
+                    exported_at REAL NOT NULL,
+                    PRIMARY KEY (target, video_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_videos_channel_views ON videos(channel_id, views DESC);
+                CREATE INDEX IF NOT EXISTS idx_videos_fetched ON videos(fetched_at);
+            """)
+            cutoff = time.time() - retention
+            self._conn.execute("DELETE FROM videos WHERE fetched_at < ?", (cutoff,))
+            self._conn.execute("DELETE FROM exports WHERE exported_at < ?", (cutoff,))
+
+    # ---------- lượt xem ----------
+    def fresh_views(self, video_ids, max_age=None):
+        """{vid: (views, title)} của các video có lượt xem lấy trong vòng ``max_age`` giây."""
+        max_age = self.max_age if max_age is None else max_age
+        cutoff = time.time() - max_age
+        it = iter(video_ids)
+        found = {}
+        with self._lock:
+            for chunk in iter(lambda: list(itertools.islice(it, _CHUNK)), []):
+                rows = self._conn.execute(
+                    "SELECT video_id, views, title FROM videos WHERE fetched_at >= ? AND video_id IN "
+                    f"({','.join('?' * len(chunk))})", (cutoff, *chunk),
+                ).fetchall()
+                found.update((vid, (views, title)) for vid, views, title in rows)
+        return found
+
+    def put_views(self, rows, channel_id=None):
+        """Ghi ``rows`` = (vid, views, title, position); tiêu đề None thì giữ tiêu đề đã có."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO videos (video_id, channel_id, views, title, position, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(video_id) DO UPDATE SET "
+                "channel_id = COALESCE(excluded.channel_id, channel_id), views = excluded.views, "
+                "title = COALESCE(excluded.title, title), "
+                "position = COALESCE(excluded.position, position), fetched_at = excluded.fetched_at",
+                [(vid, channel_id, int(views), title, position, now)
+                 for vid, views, title, position in rows],
+            )
+
+    def top(self, channel_ids, n=None, max_age=None):
+        """Top ``n`` video nhiều lượt xem nhất của các kênh, chỉ đọc từ kho.
+
+        Trả về list (views, vid, title, channel_id); hoà lượt xem thì video mới hơn đứng
+        trước. ``max_age`` None = mọi bản ghi còn trong kho.
+        """
+        channel_ids = list(dict.fromkeys(channel_ids))
+        if not channel_ids:
+            return []
+        # Danh sách kênh đi qua bảng tạm thay vì IN (?, …): batch lớn vượt giới hạn tham số
+        sql = ("SELECT views, video_id, title, channel_id FROM videos "
+               "WHERE channel_id IN (SELECT channel_id FROM top_channels)")
+        params = []
+        if max_age is not None:
+            sql += " AND fetched_at >= ?"
+            params.append(time.time() - max_age)
+        sql += " ORDER BY views DESC, position ASC"
+        if n:
+            sql += " LIMIT ?"
+            params.append(int(n))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS top_channels (channel_id TEXT PRIMARY KEY)")
+            self._conn.execute("DELETE FROM top_channels")
+            self._conn.executemany("INSERT INTO top_channels VALUES (?)",
+                                   ((uc,) for uc in channel_ids))
+            return [tuple(r) for r in self._conn.execute(sql, params).fetchall()]
+
+    def count(self, channel_id=None):
+        with self._lock:
+            if channel_id is None:
+                return self._conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM videos WHERE channel_id = ?", (channel_id,)).fetchone()[0]
+
+    # ---------- chống xuất trùng ----------
+    def exported(self, target, video_ids):
+        """Tập video trong ``video_ids`` đã từng xuất ra ``target``."""
+        video_ids = list(video_ids)
+        seen = set()
+        with self._lock:
+            for i in range(0, len(video_ids), _CHUNK):
+                chunk = video_ids[i:i + _CHUNK]
+                rows = self._conn.execute(
+                    "SELECT video_id FROM exports WHERE target = ? AND video_id IN "
+                    f"({','.join('?' * len(chunk))})", (target, *chunk),
+                ).fetchall()
+                seen.update(r[0] for r in rows)
+        return seen
+
+    def mark_exported(self, target, video_ids):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO exports (target, video_id, exported_at) VALUES (?, ?, ?)",
+                [(target, vid, now) for vid in video_ids],
+            )
+
+    # ---------- bảo trì ----------
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM videos")
+            self._conn.execute("DELETE FROM exports")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,64 @@
+"""Chọn top-K theo lượt xem bằng heap, bộ nhớ O(K).
+
+Hoà lượt xem thì phần tử có ``order`` nhỏ hơn (đứng trước trong playlist) được ưu tiên,
+giống kết quả của ``sort(reverse=True)`` ổn định trên danh sách theo thứ tự playlist.
+"""
+import heapq
+import itertools
+import threading
+
+
+class TopK:
+    """Bộ chọn top-K dạng luồng, an toàn đa luồng.
+
+    ``k`` <= 0 hoặc None nghĩa là giữ tất cả (khi đó bộ nhớ O(n) là không tránh được).
+    """
+
+    def __init__(self, k):
+        self.k = k if k and k > 0 else None
+        self._heap = []          # min-heap theo (views, -order): phần tử "tệ nhất" ở đỉnh
+        self._items = []         # dùng khi không giới hạn k
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.seen = 0
+
+    def push(self, views, vid, order=None, payload=None):
+        """Thêm một kết quả; ``payload`` (vd. tiêu đề) đi kèm nhưng không dùng để so sánh."""
+        if order is None:
+            order = next(self._seq)
+        key = (views, -order, vid, payload)
+        with self._lock:
+            self.seen += 1
+            if self.k is None:
+                self._items.append(key)
+            elif len(self._heap) < self.k:
+                heapq.heappush(self._heap, key)
+            elif key[:2] > self._heap[0][:2]:
+                heapq.heapreplace(self._heap, key)
+
+    def extend(self, pairs):
+        for views, vid in pairs:
+            self.push(views, vid)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items) if self.k is None else len(self._heap)
+
+    def items(self):
+        """Bảng xếp hạng hiện tại: list (views, vid, payload) giảm dần, dùng được giữa chừng."""
+        with self._lock:
+            keys = list(self._items if self.k is None else self._heap)
+        # (views, -order) là duy nhất nên không bao giờ so sánh tới payload
+        keys.sort(key=lambda x: x[:2], reverse=True)
+        return [(views, vid, payload) for views, _, vid, payload in keys]
+
+    def snapshot(self):
+        """Như ``items()`` nhưng chỉ gồm (views, vid)."""
+        return [(views, vid) for views, vid, _ in self.items()]
+
+    def threshold(self):
+        """Lượt xem nhỏ nhất để lọt top-K hiện tại (None nếu chưa đủ K)."""
+        with self._lock:
+            if self.k is None or len(self._heap) < self.k:
+                return None
+            return self._heap[0][0]
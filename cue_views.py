@@ -0,0 +1,86 @@
+"""Lấy view_count của video với chi phí tối thiểu cho chế độ popular (deep).
+
+Khác với ``extract_info`` đầy đủ, đường này:
+- dùng lại ``YoutubeDL`` từ pool (``cue_ytdl``) thay vì tạo mới mỗi video;
+- gọi ``process=False`` nên không chọn/sắp xếp format, không xử lý phụ đề;
+- bỏ tải player JS/configs và manifest DASH/HLS (chỉ cần metadata).
+
+Lỗi không bị nuốt (``ignoreerrors`` tắt) để phân biệt bị chặn / video không xem được /
+lỗi tạm thời, xem ``classify_error``.
+"""
+from cue_ytdl import YdlPool
+
+
+LIGHT_EXTRACTOR_ARGS = {
+    "youtube": {
+        "player_skip": ["js", "configs"],
+        "skip": ["dash", "hls", "translated_subs"],
+    },
+}
+
+
+def light_view_opts(cookies_path=None):
+    opts = {
+        "quiet": True,
+        "no_warnings": True,
+        "ignoreerrors": False,
+        "skip_download": True,
+        "check_formats": False,
+        "extractor_args": LIGHT_EXTRACTOR_ARGS,
+    }
+    if cookies_path:
+        opts["cookies"] = cookies_path
+    return opts
+
+
+THROTTLE_MARKERS = ("http error 429", "too many requests", "not a bot", "rate-limit",
+                    "rate limit", "unusual traffic")
+UNAVAILABLE_MARKERS = ("video unavailable", "private video", "has been removed",
+                       "members-only", "join this channel", "sign in to confirm your age",
+                       "account associated with this video has been terminated")
+
+
+def classify_error(exc):
+    """Phân loại lỗi yt-dlp: ``"throttled"`` (429, kiểm tra bot), ``"unavailable"``
+    (video riêng tư/bị xoá/giới hạn, thử lại vô ích) hoặc ``"error"`` (tạm thời)."""
+    msg = str(exc).lower()
+    if any(m in msg for m in THROTTLE_MARKERS):
+        return "throttled"
+    cause = (getattr(exc, "exc_info", None) or (None, None))[1]
+    if any(m in msg for m in UNAVAILABLE_MARKERS) or getattr(cause, "expected", False):
+        return "unavailable"
+    return "error"
+
+
+class ViewCountFetcher:
+    """Bộ lấy view_count dùng lại ``YoutubeDL`` (mượn từ ``cue_ytdl.YdlPool``); an toàn khi
+    gọi từ nhiều luồng. Không truyền ``pool`` thì dùng pool riêng, đóng cùng ``close()``."""
+
+    def __init__(self, cookies_path=None, pool=None):
+        self.cookies_path = cookies_path
+        self._opts = light_view_opts(cookies_path)
+        self._own_pool = pool is None
+        self.pool = YdlPool() if pool is None else pool
+
+    def fetch_info(self, vid):
+        """Metadata thô (chưa xử lý format) của video, hoặc None nếu lỗi."""
+        with self.pool.lease(self._opts) as ydl:
+            return ydl.extract_info(
+                f"https://www.youtube.com/watch?v={vid}", download=False, process=False
+            )
+
+    def fetch(self, vid):
+        info = self.fetch_info(vid)
+        return int((info or {}).get("view_count") or 0)
+
+    def fetch_meta(self, vid):
+        """(view_count, title) từ cùng một lần gọi; (None, None) nếu không lấy được."""
+        info = self.fetch_info(vid)
+        if not info:
+            return None, None
+        return int(info.get("view_count") or 0), info.get("title")
+
+    def close(self):
+        # Pool dùng chung thì giữ instance cho job sau
+        if self._own_pool:
+            self.pool.close()
@@ -0,0 +1,91 @@
+"""Pool ``yt_dlp.YoutubeDL`` dùng lại giữa các lần gọi và giữa các job.
+
+Tạo ``YoutubeDL`` mới mỗi lần gọi nghĩa là đọc lại file cookies, khởi tạo lại extractor
+và mở session HTTP mới. Pool giữ các instance rảnh theo bộ tuỳ chọn (flat/không flat,
+cookies...): ``lease(opts)`` mượn một instance cùng cấu hình, dùng xong trả lại. Mỗi
+instance chỉ được một luồng dùng tại một thời điểm (``YoutubeDL`` không an toàn đa luồng),
+nên một luồng đang đọc dở playlist (generator) vẫn giữ instance riêng của nó.
+
+File cookies được tính vào khoá theo thời điểm sửa đổi: sửa file thì instance mới được tạo.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+
+class YdlPool:
+    """Các ``YoutubeDL`` rảnh theo bộ tuỳ chọn; an toàn khi dùng từ nhiều luồng."""
+
+    def __init__(self, max_idle=32):
+        # max_idle: số instance rảnh tối đa giữ lại cho mỗi bộ tuỳ chọn (thừa thì đóng)
+        self.max_idle = max_idle
+        self._idle = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    @staticmethod
+    def _key(opts):
+        cookies = opts.get("cookies")
+        try:
+            stamp = os.path.getmtime(cookies) if cookies else None
+        except OSError:
+            stamp = None
+        return json.dumps(opts, sort_keys=True, default=repr) + f"|{stamp}"
+
+    def acquire(self, opts):
+        key = self._key(opts)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.reused += 1
+                return key, idle.pop()
+            self.created += 1
+        # Nạp yt_dlp ở lần dùng đầu tiên (mất ~0,2 s), không phải lúc import
+        import yt_dlp
+        return key, yt_dlp.YoutubeDL(dict(opts))
+
+    def release(self, key, ydl):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(ydl)
+                return
+        _close(ydl)
+
+    @contextmanager
+    def lease(self, opts):
+        """``with pool.lease(opts) as ydl:`` — thay cho ``with yt_dlp.YoutubeDL(opts) as ydl:``."""
+        key, ydl = self.acquire(opts)
+        try:
+            yield ydl
+        finally:
+            self.release(key, ydl)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for instances in idle.values():
+            for ydl in instances:
+                _close(ydl)
+
+
+def _close(ydl):
+    try:
+        ydl.close()
+    except Exception:
+        pass
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def default_pool():
+    """Pool dùng chung của tiến trình (các job/kênh dùng lại instance của nhau)."""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = YdlPool()
+        return _default_pool
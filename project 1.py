@@ -1,295 +1,214 @@
 import sys
 import os
-import re
-import json
-import math
-import urllib.parse
-import urllib.request
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-import pandas as pd
+import time
+
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QLabel, QLineEdit, QRadioButton, 
                             QPushButton, QFileDialog, QMessageBox, QProgressBar,
-                            QButtonGroup, QGridLayout, QGroupBox, QSpinBox, QCheckBox)
+                            QButtonGroup, QGridLayout, QGroupBox, QSpinBox, QCheckBox,
+                            QComboBox)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QFont
-from PyQt6.QtGui import QPalette, QBrush, QPixmap, QColor
-import yt_dlp
+from PyQt6.QtGui import QPalette, QBrush, QPixmap, QColor, QImage
+
+from cue_cache import Cache, default_cache_dir
+from cue_checkpoint import default_checkpoint_dir
+from cue_store import DEFAULT_MAX_AGE, VideoStore
+from cue_export import (DEFAULT_COLUMNS, FORMATS, ResultSpool, export_urls,
+                        export_split_parallel)
 
 
 # ========== Worker Thread ==========
 
 class YoutubeExtractorThread(QThread):
-    progress_signal = pyqtSignal(int, int)   # current, total
-    finished_signal = pyqtSignal(list)       # list of URLs
+    # current, total (0 = chưa biết), tốc độ video/giây, ETA giây (-1 = chưa biết);
+    # engine đã gộp sẵn (tối đa ~20 lần/giây) nên luồng giao diện không bị dồn signal
+    progress_signal = pyqtSignal(int, int, float, float)
+    batch_ready = pyqtSignal(list)           # list of (url, views, title), gửi dần trong lúc chạy
+    finished_signal = pyqtSignal(int)        # tổng số kết quả
     error_signal = pyqtSignal(str)
 
     def __init__(self, channel_input, extract_type, video_count=None,
                  use_api=False, api_key=None,
-                 quick_popular=False, cookies_path=None, workers=8):
+                 quick_popular=False, cookies_path=None, workers=8,
+                 cache=None, incremental=False, checkpoint_dir=None, backend="thread",
+                 store=None, views_max_age=None):
         super().__init__()
-        self.channel_input = channel_input.strip()
-        self.extract_type = extract_type
-        self.video_count = int(video_count) if video_count else None
-        self.use_api = use_api
-        self.api_key = (api_key or "").strip()
-        self.quick_popular = quick_popular
-        self.cookies_path = cookies_path
-        self.workers = max(1, int(workers))
-
-    # ---------- yt-dlp helpers ----------
-    def _normalize_to_channel_url(self, raw):
-        if raw.startswith("http"):
-            return raw.rstrip("/")
-        if raw.startswith("@"):
-            return f"https://www.youtube.com/{raw}"
-        return f"https://www.youtube.com/channel/{raw}"
-
-    def _extract_uc_from_input(self):
-        """Lấy UC… từ UC/@handle/URL bằng yt-dlp (ổn định, nhanh)."""
-        raw = self.channel_input
-
-        if raw.startswith("UC"):
-            return raw
-
-        m = re.search(r"/channel/(UC[0-9A-Za-z_-]+)", raw)
-        if m:
-            return m.group(1)
-
-        probe_opts = {
-            "quiet": True,
-            "extract_flat": True,
-            "ignoreerrors": True,
-        }
-        if self.cookies_path:
-            probe_opts["cookies"] = self.cookies_path
-
-        url = self._normalize_to_channel_url(raw)
-        with yt_dlp.YoutubeDL(probe_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-
-        uc = None
-        if isinstance(info, dict):
-            uc = info.get("channel_id") or info.get("uploader_id") or info.get("id")
-            if not (uc and uc.startswith("UC")):
-                entries = info.get("entries") or []
-                if entries:
-                    first = entries[0] or {}
-                    uc = first.get("channel_id") or first.get("uploader_id")
-        if not (uc and uc.startswith("UC")):
-            raise RuntimeError("Không xác định được Channel ID (UC…) từ đầu vào.")
-        return uc
-
-    def _uploads_playlist_from_uc(self, uc):
-        return f"UU{uc[2:]}"
-
-    def _yt_opts(self, flat=True):
-        opts = {
-            "quiet": True,
-            "ignoreerrors": True,
-            "extract_flat": bool(flat),
-        }
-        if self.cookies_path:
-            opts["cookies"] = self.cookies_path
-        return opts
-
-    def _fetch_upload_entries_flat(self, uploads_playlist_id):
-        """Lấy toàn bộ entries từ uploads playlist (flat, có phân trang)."""
-        url = f"https://www.youtube.com/playlist?list={uploads_playlist_id}"
-        with yt_dlp.YoutubeDL(self._yt_opts(flat=True)) as ydl:
-            info = ydl.extract_info(url, download=False)
-        return info.get("entries") or []
-
-    # ---------- Popular modes ----------
-    def _collect_popular_shelf_quick(self, base_channel_url, top_n):
-        """Cách nhanh: tab Popular, thường chỉ ~30–60 video."""
-        shelf_url = f"{base_channel_url}/videos?view=0&sort=p&flow=grid"
-        with yt_dlp.YoutubeDL(self._yt_opts(flat=True)) as ydl:
-            info = ydl.extract_info(shelf_url, download=False)
-        entries = info.get("entries") or []
-        total = min(top_n, len(entries)) if top_n else len(entries)
-        urls = []
-        for i, e in enumerate(entries[:total], start=1):
-            vid = e.get("id")
-            if vid:
-                urls.append(f"https://www.youtube.com/watch?v={vid}")
-            self.progress_signal.emit(i, total)
-        return urls
-
-    def _fetch_views_single(self, vid):
-        """Lấy view_count cho 1 video bằng yt-dlp (non-flat)."""
-        try:
-            with yt_dlp.YoutubeDL(self._yt_opts(flat=False)) as ydl:
-                info = ydl.extract_info(f"https://www.youtube.com/watch?v={vid}", download=False)
-            return int(info.get("view_count") or 0)
-        except Exception:
-            return 0
-
-    def _collect_popular_deep_concurrent(self, uploads_playlist_id, top_n):
-        """Chính xác: quét hết uploads, lấy view_count song song và sort."""
-        entries = self._fetch_upload_entries_flat(uploads_playlist_id)
-        ids = [e.get("id") for e in entries if e and e.get("id")]
-        total = len(ids)
-        if total == 0:
-            return []
-
-        results = []
-        done = 0
-        self.progress_signal.emit(0, total)
-
-        with ThreadPoolExecutor(max_workers=self.workers) as ex:
-            futs = {ex.submit(self._fetch_views_single, vid): vid for vid in ids}
-            for fut in as_completed(futs):
-                vid = futs[fut]
-                views = 0
-                try:
-                    views = int(fut.result() or 0)
-                except Exception:
-                    views = 0
-                results.append((views, vid))
-                done += 1
-                self.progress_signal.emit(done, total)
-
-        results.sort(key=lambda x: x[0], reverse=True)
-        chosen = results if (not top_n or top_n <= 0) else results[:top_n]
-        return [f"https://www.youtube.com/watch?v={vid}" for _, vid in chosen]
-
-    # ---------- YouTube Data API (fast & full) ----------
-    def _http_get_json(self, url, params):
-        q = urllib.parse.urlencode(params)
-        with urllib.request.urlopen(f"{url}?{q}") as resp:
-            data = resp.read()
-        return json.loads(data.decode("utf-8"))
-
-    def _collect_popular_via_api(self, uc, top_n):
-        """Dùng YouTube Data API v3: rất nhanh & đủ. Cần API key."""
-        if not self.api_key:
-            raise RuntimeError("Thiếu API key cho YouTube Data API.")
-
-        # Lấy uploads playlist ID
-        ch = self._http_get_json(
-            "https://www.googleapis.com/youtube/v3/channels",
-            {"part": "contentDetails", "id": uc, "key": self.api_key}
-        )
-        items = ch.get("items") or []
-        if not items:
-            raise RuntimeError("API không tìm thấy kênh.")
-        uploads_pid = items[0]["contentDetails"]["relatedPlaylists"]["uploads"]
-
-        # Lấy toàn bộ videoId từ uploads (50/req)
-        video_ids = []
-        page_token = None
-        total_scan_reported = 0
-        while True:
-            params = {
-                "part": "contentDetails",
-                "playlistId": uploads_pid,
-                "maxResults": 50,
-                "key": self.api_key
-            }
-            if page_token:
-                params["pageToken"] = page_token
-            data = self._http_get_json("https://www.googleapis.com/youtube/v3/playlistItems", params)
-            items = data.get("items") or []
-            for it in items:
-                vid = it["contentDetails"].get("videoId")
-                if vid:
-                    video_ids.append(vid)
-            page_token = data.get("nextPageToken")
-
-            # cập nhật tiến trình theo số item đã gom
-            total_scan_reported += len(items)
-            self.progress_signal.emit(total_scan_reported, max(total_scan_reported, 1))
-
-            if not page_token:
-                break
-
-        if not video_ids:
-            return []
-
-        # Lấy statistics theo lô 50 id/lần
-        scored = []
-        total = len(video_ids)
-        done = 0
-        for i in range(0, len(video_ids), 50):
-            batch = video_ids[i:i+50]
-            stats = self._http_get_json(
-                "https://www.googleapis.com/youtube/v3/videos",
-                {"part": "statistics", "id": ",".join(batch), "key": self.api_key}
+        self.failed_channels = []
+        self.channels = None
+        channels = channel_input.replace(",", " ").split()
+        if use_api and api_key and len(channels) > 1:
+            # Nhiều kênh qua Data API: engine asyncio chạy trên event loop riêng của luồng này,
+            # kết quả / tiến trình đi về giao diện qua signal (Qt tự xếp hàng giữa các luồng)
+            from cue_aio import AsyncApiEngine
+            self.channels = channels
+            self._rows = []
+            self._rows_at = 0.0
+            self.engine = AsyncApiEngine(
+                api_key, extract_type, video_count=video_count, cache=cache, store=store,
+                views_max_age=views_max_age, on_progress=self._emit_progress, on_results=self._collect_rows,
             )
-            for it in stats.get("items", []):
-                vid = it.get("id")
-                views = int(it.get("statistics", {}).get("viewCount", 0))
-                if vid:
-                    scored.append((views, vid))
-            done = min(i + 50, total)
-            self.progress_signal.emit(done, total)
-
-        scored.sort(key=lambda x: x[0], reverse=True)
-        chosen = scored if (not top_n or top_n <= 0) else scored[:top_n]
-        return [f"https://www.youtube.com/watch?v={vid}" for _, vid in chosen]
-
-    # ---------- Main run ----------
+            return
+        # Toàn bộ logic trích xuất nằm ở cue_engine (không phụ thuộc Qt); nạp ở job đầu
+        # tiên thay vì lúc mở cửa sổ
+        from cue_engine import YoutubeExtractor
+        self.engine = YoutubeExtractor(
+            channel_input, extract_type, video_count=video_count,
+            use_api=use_api, api_key=api_key,
+            quick_popular=quick_popular, cookies_path=cookies_path,
+            workers=workers, on_progress=self._emit_progress,
+            cache=cache, incremental=incremental, checkpoint_dir=checkpoint_dir,
+            backend=backend, store=store, views_max_age=views_max_age,
+        )
+
     def run(self):
         try:
-            if self.extract_type not in ("all", "recent", "popular"):
-                raise RuntimeError("Kiểu lấy video không hợp lệ.")
-
-            # Luôn resolve UC id 1 lần
-            uc = self._extract_uc_from_input()
-            uploads_pid = self._uploads_playlist_from_uc(uc)
-
-            # Popular
-            if self.extract_type == "popular":
-                top_n = max(1, int(self.video_count or 50))
-
-                # Ưu tiên API nếu bật
-                if self.use_api:
-                    urls = self._collect_popular_via_api(uc, top_n)
-                    self.finished_signal.emit(urls)
-                    return
-
-                # Nếu chọn nhanh (shelf)
-                if self.quick_popular:
-                    base = self._normalize_to_channel_url(self.channel_input)
-                    urls = self._collect_popular_shelf_quick(base, top_n)
-                    self.finished_signal.emit(urls)
-                    return
-
-                # Mặc định: deep + đa luồng
-                urls = self._collect_popular_deep_concurrent(uploads_pid, top_n)
-                self.finished_signal.emit(urls)
+            if self.channels is not None:
+                self.finished_signal.emit(self._run_async())
                 return
+            count = 0
+            for batch in self.engine.iter_batches():
+                self.batch_ready.emit([tuple(r) for r in batch])
+                count += len(batch)
+            self.finished_signal.emit(count)
+        except Exception as e:
+            self.error_signal.emit(str(e))
 
-            # All / Recent dựa vào uploads (đầy đủ)
-            entries = self._fetch_upload_entries_flat(uploads_pid)
-
-            if self.extract_type == "all":
-                total = len(entries)
-                urls = []
-                for i, e in enumerate(entries, start=1):
-                    vid = e.get("id")
-                    if vid:
-                        urls.append(f"https://www.youtube.com/watch?v={vid}")
-                    self.progress_signal.emit(i, total)
-                self.finished_signal.emit(urls)
-                return
+    def _run_async(self):
+        results = self.engine.run_sync(self.channels)
+        self._flush_rows()
+        self.failed_channels = [r for r in results if not r.ok]
+        if len(self.failed_channels) == len(results):
+            raise RuntimeError(self.failed_channels[0].error)
+        return sum(len(r.results) for r in results if r.ok)
+
+    def _collect_rows(self, rows):
+        # Gộp kết quả của nhiều kênh thành lô ~200 dòng / 1 giây như iter_batches()
+        if not self._rows:
+            self._rows_at = time.monotonic()
+        self._rows.extend(tuple(r) for r in rows)
+        if len(self._rows) >= 200 or time.monotonic() - self._rows_at >= 1.0:
+            self._flush_rows()
+
+    def _flush_rows(self):
+        if self._rows:
+            self.batch_ready.emit(self._rows)
+            self._rows = []
+
+    def _emit_progress(self, current, total):
+        # Tốc độ / ETA tính sẵn ở luồng làm việc
+        progress = self.engine.progress
+        eta = progress.eta
+        self.progress_signal.emit(current, total, progress.rate or 0.0, -1.0 if eta is None else eta)
+
+    # Gọi từ luồng giao diện; engine tự kiểm tra cờ trước mỗi request
+    def cancel(self):
+        self.engine.cancel()
+
+    def pause(self):
+        self.engine.pause()
+
+    def resume(self):
+        self.engine.resume()
+
+
+class ExportThread(QThread):
+    progress_signal = pyqtSignal(int, int)   # parts done, total parts
+    finished_signal = pyqtSignal(list)       # list of file paths
+    error_signal = pyqtSignal(str)
 
-            if self.extract_type == "recent":
-                count = max(1, int(self.video_count or 1))
-                total = min(count, len(entries))
-                urls = []
-                for i, e in enumerate(entries[:total], start=1):
-                    vid = e.get("id")
-                    if vid:
-                        urls.append(f"https://www.youtube.com/watch?v={vid}")
-                    self.progress_signal.emit(i, total)
-                self.finished_signal.emit(urls)
-                return
+    def __init__(self, rows, folder, fmt="xlsx", per_file=None, workers=4,
+                 columns=DEFAULT_COLUMNS, metrics=None):
+        super().__init__()
+        self.metrics = metrics
+        # rows: list hoặc ResultSpool (đọc lại từ đĩa, không nạp hết vào RAM). Spool thuộc
+        # về luồng này: xoá khi ghi xong, nên job mới bắt đầu trong lúc đang ghi không
+        # đụng tới nó
+        self.rows = rows
+        self.folder = folder
+        self.fmt = fmt
+        self.per_file = per_file
+        self.workers = workers
+        self.columns = columns
 
+    def run(self):
+        try:
+            if self.metrics is not None:
+                with self.metrics.stage("export"):
+                    paths = self._export()
+            else:
+                paths = self._export()
         except Exception as e:
-            self.error_signal.emit(str(e))
+            message = str(e)
+            if isinstance(self.rows, ResultSpool):
+                # Giữ lại kết quả để không mất dữ liệu khi ghi lỗi
+                self.rows.close()
+                message += f"\n\nKết quả vẫn được lưu tạm tại:\n{self.rows.path}"
+            self.error_signal.emit(message)
+            return
+        if isinstance(self.rows, ResultSpool):
+            self.rows.discard()
+        self.finished_signal.emit(paths)
+
+    def _export(self):
+        if self.per_file and len(self.rows) > self.per_file:
+            # Nhiều phần được ghi song song; mỗi phần ghi file tạm rồi mới đổi tên
+            return export_split_parallel(self.rows, self.folder, self.per_file, self.fmt,
+                                         workers=self.workers,
+                                         on_progress=self.progress_signal.emit,
+                                         columns=self.columns)
+        path = os.path.join(self.folder, f"youtube_urls.{self.fmt}")
+        export_urls(self.rows, path, self.fmt, self.columns)
+        return [path]
+
+
+class BackgroundLoader(QThread):
+    """Giải mã và thu nhỏ ảnh nền ngoài luồng giao diện.
+
+    Bản đã thu nhỏ theo kích thước cửa sổ được lưu vào thư mục cache (theo mtime của
+    ảnh gốc), nên các lần mở sau chỉ phải đọc một ảnh nhỏ. Dùng ``QImage`` vì ``QPixmap``
+    chỉ được tạo trên luồng giao diện.
+    """
+    loaded = pyqtSignal(QImage)
+
+    def __init__(self, path, width, height, cache_dir=None):
+        super().__init__()
+        self.path = path
+        self.width = width
+        self.height = height
+        self.cache_dir = cache_dir
+
+    def _cached_path(self):
+        if not self.cache_dir:
+            return None
+        try:
+            stamp = int(os.path.getmtime(self.path))
+        except OSError:
+            return None
+        name = os.path.splitext(os.path.basename(self.path))[0]
+        return os.path.join(self.cache_dir, f"{name}_{self.width}x{self.height}_{stamp}.png")
+
+    def run(self):
+        cached = self._cached_path()
+        image = QImage(cached) if cached and os.path.exists(cached) else QImage()
+        if image.isNull():
+            image = QImage(self.path)
+            if image.isNull():
+                return
+            image = image.scaled(
+                self.width, self.height,
+                Qt.AspectRatioMode.KeepAspectRatioByExpanding,
+                Qt.TransformationMode.SmoothTransformation,
+            ).convertToFormat(QImage.Format.Format_RGB32)
+            if cached:
+                try:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    tmp = cached + ".tmp"
+                    if image.save(tmp, "PNG"):
+                        os.replace(tmp, cached)
+                except OSError:
+                    pass   # không ghi được cache thì lần sau giải mã lại
+        self.loaded.emit(image)
 
 
 # ========== Main Window ==========
@@ -299,30 +218,18 @@ class YoutubeUrlExtractor(QMainWindow):
         self.setWindowTitle("Công Cụ Lấy URL Kênh YouTube")
         self.setMinimumSize(500, 690)
 
-        self.video_urls = []
+        # Kết quả được ghi dần ra file tạm thay vì giữ cả list trong RAM
+        self.spool = None
         self.cookies_path = None
+        self.cache = None
+        self.store = None
         self.setup_ui()
+        self.load_background()
 
     def setup_ui(self):
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        # Kết hợp với tên file ảnh
-        image_path = os.path.join(current_dir, "cloud1.png")
-
-        background = QPixmap(image_path)
-
-        # 2. Scale it to the current window size
-        scaled_background = background.scaled(
-            central_widget.size(),  # Dùng central_widget.size() thay vì self.size()
-            Qt.AspectRatioMode.KeepAspectRatioByExpanding, 
-            Qt.TransformationMode.SmoothTransformation
-        )
-
-        # 3. Apply to the Palette của central_widget (KHÔNG PHẢI self)
-        palette = central_widget.palette()
-        palette.setBrush(QPalette.ColorRole.Window, QBrush(scaled_background))
-        central_widget.setPalette(palette)
+        # Ảnh nền được nạp sau (load_background), cửa sổ hiện ra ngay không chờ giải mã ảnh
         central_widget.setAutoFillBackground(True)
 
         main_layout = QVBoxLayout(central_widget)
@@ -360,6 +267,8 @@ class YoutubeUrlExtractor(QMainWindow):
         channel_id_label = QLabel("UID/Handle/URL kênh:")
         self.channel_id_input = QLineEdit()
         self.channel_id_input.setPlaceholderText("Nhập UC…, @handle, hoặc URL kênh (ví dụ: UCxxx…, @abc, https://...)",)
+        self.channel_id_input.setToolTip("Khi dùng API key có thể nhập nhiều kênh, cách nhau bởi dấu phẩy: "
+                                         "các kênh được chạy cùng lúc trên một event loop.")
         self.channel_id_input.setStyleSheet("border: 1px solid black; border-radius: 4px; padding: 2px; color: black;")
 
         channel_layout.addWidget(channel_id_label, 0, 0)
@@ -463,10 +372,25 @@ class YoutubeUrlExtractor(QMainWindow):
         self.api_cb = QCheckBox("Dùng YouTube Data API (nhanh & đầy đủ)")
         accel.addWidget(self.api_cb, 4, 0)
         accel.addWidget(QLabel("API key:"), 5, 0)
-        self.api_key_edit = QLineEdit(); self.api_key_edit.setPlaceholderText("AIza…")
+        self.api_key_edit = QLineEdit(); self.api_key_edit.setPlaceholderText("AIza… (nhiều key: cách nhau bởi dấu phẩy)")
         self.api_key_edit.setStyleSheet("border: 1px solid black; border-radius: 4px; padding: 2px; color: black;")
         accel.addWidget(self.api_key_edit, 5, 1)
 
+        self.cache_cb = QCheckBox("Dùng cache kênh/playlist (chạy lại nhanh hơn)")
+        self.cache_cb.setChecked(True)
+        accel.addWidget(self.cache_cb, 6, 0, 1, 2)
+        self.incremental_cb = QCheckBox("Chỉ tải video mới kể từ lần trước (tăng dần)")
+        accel.addWidget(self.incremental_cb, 7, 0, 1, 2)
+        self.resume_cb = QCheckBox("Lưu tiến độ và chạy tiếp nếu bị gián đoạn (popular)")
+        self.resume_cb.setChecked(True)
+        accel.addWidget(self.resume_cb, 8, 0, 1, 2)
+        self.process_cb = QCheckBox("Lấy lượt xem bằng nhiều tiến trình (deep, máy nhiều nhân CPU)")
+        accel.addWidget(self.process_cb, 9, 0, 1, 2)
+        self.reuse_views_cb = QCheckBox("Dùng lại lượt xem đã lấy trong 24 giờ (popular, nhanh hơn)")
+        self.reuse_views_cb.setToolTip("Thứ hạng có thể dựa trên lượt xem cũ tới 24 giờ. Cần bật cache.")
+        accel.addWidget(self.reuse_views_cb, 10, 0, 1, 2)
+        self.cache_cb.toggled.connect(self.reuse_views_cb.setEnabled)
+
         main_layout.addWidget(accel_group)
 
         # Xuất file
@@ -488,6 +412,15 @@ class YoutubeUrlExtractor(QMainWindow):
             }
         """)
 
+        format_layout = QHBoxLayout()
+        format_layout.addWidget(QLabel("Định dạng:"))
+        self.format_combo = QComboBox()
+        self.format_combo.addItems(FORMATS)
+        self.format_combo.setStyleSheet("border: 1px solid black; border-radius: 4px; padding: 2px; color: black;")
+        format_layout.addWidget(self.format_combo)
+        format_layout.addStretch()
+        export_layout.addLayout(format_layout)
+
         self.split_files_check = QCheckBox("Tự động chia nhỏ file URL")
         export_layout.addWidget(self.split_files_check)
 
@@ -515,11 +448,29 @@ class YoutubeUrlExtractor(QMainWindow):
         self.extract_button.setMinimumHeight(40)
         self.extract_button.clicked.connect(self.start_extraction)
         btn_row.addWidget(self.extract_button)
+
+        self.pause_button = QPushButton("Tạm dừng")
+        self.pause_button.setMinimumHeight(40)
+        self.pause_button.setEnabled(False)
+        self.pause_button.clicked.connect(self.toggle_pause)
+        btn_row.addWidget(self.pause_button)
+
+        self.cancel_button = QPushButton("Huỷ")
+        self.cancel_button.setMinimumHeight(40)
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_extraction)
+        btn_row.addWidget(self.cancel_button)
         main_layout.addLayout(btn_row)
 
         self.status_label = QLabel("Sẵn sàng")
         main_layout.addWidget(self.status_label)
 
+        # Số liệu hiệu năng của job gần nhất (chi tiết trong tooltip và file metrics)
+        self.metrics_label = QLabel("")
+        self.metrics_label.setWordWrap(True)
+        self.metrics_label.setStyleSheet("color: #333; font-size: 11px;")
+        main_layout.addWidget(self.metrics_label)
+
     # ---- UI actions ----
     def pick_cookies_file(self):
         path, _ = QFileDialog.getOpenFileName(self, "Chọn cookies.txt", "", "Text files (*.txt);;All files (*.*)")
@@ -528,6 +479,23 @@ class YoutubeUrlExtractor(QMainWindow):
             self.cookies_path_edit.setText(path)
             self.cookies_cb.setChecked(True)
 
+    def load_background(self):
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        # Kết hợp với tên file ảnh
+        image_path = os.path.join(current_dir, "cloud1.png")
+        size = self.size()
+        self.background_loader = BackgroundLoader(
+            image_path, size.width(), size.height(), os.path.join(default_cache_dir(), "ui"))
+        self.background_loader.loaded.connect(self.apply_background)
+        self.background_loader.start()
+
+    def apply_background(self, image):
+        # Áp vào Palette của central_widget (KHÔNG PHẢI self)
+        central_widget = self.centralWidget()
+        palette = central_widget.palette()
+        palette.setBrush(QPalette.ColorRole.Window, QBrush(QPixmap.fromImage(image)))
+        central_widget.setPalette(palette)
+
     def start_extraction(self):
         channel = self.channel_id_input.text().strip()
         if not channel:
@@ -543,6 +511,7 @@ class YoutubeUrlExtractor(QMainWindow):
         elif self.recent_videos_radio.isChecked():
             extract_type = "recent"; video_count = self.recent_count.value()
 
+        self.progress_bar.setRange(0, 100)
         self.progress_bar.setValue(0)
         self.progress_bar.setVisible(True)
         self.extract_button.setEnabled(False)
@@ -553,6 +522,29 @@ class YoutubeUrlExtractor(QMainWindow):
         quick_pop = self.quick_popular_cb.isChecked()
         cookies_path = self.cookies_path if self.cookies_cb.isChecked() else None
         workers = self.workers_spin.value()
+        cache = None
+        store = None
+        if self.cache_cb.isChecked():
+            try:
+                if self.cache is None:
+                    self.cache = Cache()
+                cache = self.cache
+            except Exception:
+                cache = None  # cache không mở được thì vẫn chạy bình thường
+            try:
+                # Kho lượt xem: luôn ghi lại; chỉ dùng lại khi bật ô "Dùng lại lượt xem"
+                if self.store is None:
+                    self.store = VideoStore()
+                store = self.store
+            except Exception:
+                store = None
+
+        if self.spool is not None:
+            self.spool.discard()
+        try:
+            self.spool = ResultSpool(os.path.join(default_cache_dir(), "results"))
+        except OSError:
+            self.spool = ResultSpool()
 
         self.worker = YoutubeExtractorThread(
             channel_input=channel,
@@ -562,56 +554,145 @@ class YoutubeUrlExtractor(QMainWindow):
             api_key=api_key,
             quick_popular=quick_pop,
             cookies_path=cookies_path,
-            workers=workers
+            workers=workers,
+            cache=cache,
+            store=store,
+            views_max_age=DEFAULT_MAX_AGE if store is not None and self.reuse_views_cb.isChecked() else None,
+            incremental=self.incremental_cb.isChecked(),
+            checkpoint_dir=default_checkpoint_dir() if self.resume_cb.isChecked() else None,
+            backend="process" if self.process_cb.isChecked() else "thread",
         )
         self.worker.progress_signal.connect(self.update_progress)
+        self.worker.batch_ready.connect(self.results_received)
         self.worker.finished_signal.connect(self.extraction_finished)
         self.worker.error_signal.connect(self.extraction_error)
         self.worker.start()
+        self.set_running(True)
+
+    def set_running(self, running):
+        self.extract_button.setEnabled(not running)
+        self.pause_button.setEnabled(running)
+        self.pause_button.setText("Tạm dừng")
+        self.cancel_button.setEnabled(running)
+
+    def toggle_pause(self):
+        if self.worker.engine.control.paused:
+            self.worker.resume()
+            self.pause_button.setText("Tạm dừng")
+            self.status_label.setText("Đang lấy dữ liệu...")
+        else:
+            self.worker.pause()
+            self.pause_button.setText("Tiếp tục")
+            self.status_label.setText("Đã tạm dừng (các request đang chạy sẽ hoàn tất).")
+
+    def cancel_extraction(self):
+        # Không gửi request mới nữa; worker kết thúc với phần kết quả đã có
+        self.worker.cancel()
+        self.pause_button.setEnabled(False)
+        self.cancel_button.setEnabled(False)
+        self.status_label.setText("Đang huỷ...")
+
+    def update_progress(self, current, total, rate, eta):
+        if self.worker.engine.control.paused or self.worker.engine.cancelled:
+            return
+        extra = f" · {rate:.1f} video/s" if rate > 0 else ""
+        if eta >= 0:
+            extra += f" · còn ~{int(eta // 60)}:{int(eta % 60):02d}"
+        if total > 0:
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setValue(int((current / total) * 100))
+            self.status_label.setText(f"Đang xử lý: {current}/{total}{extra}")
+        else:
+            # Chưa biết tổng số video (đang quét từng trang): thanh chạy liên tục
+            self.progress_bar.setRange(0, 0)
+            self.status_label.setText(f"Đang xử lý: {current} video{extra}" if current else "Đang xử lý...")
 
-    def update_progress(self, current, total):
-        percentage = int((current / total) * 100) if total > 0 else 0
-        self.progress_bar.setValue(percentage)
-        self.status_label.setText(f"Đang xử lý: {current}/{total}" if total else "Đang xử lý...")
+    def results_received(self, rows):
+        self.spool.append_many(rows)
 
-    def extraction_finished(self, urls):
-        self.video_urls = urls
-        self.status_label.setText(f"Hoàn thành! Đã lấy được {len(urls)} URLs.")
-        if urls:
-            self.save_urls_to_file()
+    def extraction_finished(self, count):
+        engine = self.worker.engine
+        if engine.cancelled:
+            status = f"Đã huỷ. Giữ lại {count} URLs đã lấy được."
         else:
+            status = f"Hoàn thành! Đã lấy được {count} URLs."
+        if engine.quota.total:
+            status += f" Quota API: {engine.quota.total} đơn vị."
+        skipped = engine.unavailable_videos + engine.failed_videos
+        if skipped:
+            status += f" Bỏ qua {skipped} video không lấy được lượt xem."
+        if engine.resumed:
+            status += f" Chạy tiếp từ checkpoint ({engine.resumed} video đã có)."
+        if engine.api_fallback_reason:
+            status += " Hết quota API, đã chuyển sang yt-dlp."
+        if self.worker.failed_channels:
+            failed = self.worker.failed_channels
+            status += f" {len(failed)} kênh lỗi: {failed[0].channel} ({failed[0].error})."
+        self.status_label.setText(status)
+        self.show_metrics(engine.metrics)
+        if count:
+            self.save_urls_to_file()
+        elif not engine.cancelled:
             QMessageBox.information(self, "Thông báo", "Không tìm thấy URL video nào từ kênh này.")
         self.progress_bar.setVisible(False)
-        self.extract_button.setEnabled(True)
+        self.set_running(False)
 
     def extraction_error(self, error_message):
-        QMessageBox.critical(self, "Lỗi", f"Đã xảy ra lỗi khi lấy dữ liệu: {error_message}")
+        message = f"Đã xảy ra lỗi khi lấy dữ liệu: {error_message}"
+        if self.spool is not None and self.spool.count:
+            # Giữ lại phần kết quả đã lấy được
+            self.spool.close()
+            message += f"\n\nĐã lưu tạm {self.spool.count} kết quả tại:\n{self.spool.path}"
+            self.spool = None
+        QMessageBox.critical(self, "Lỗi", message)
         self.status_label.setText("Đã xảy ra lỗi!")
         self.progress_bar.setVisible(False)
-        self.extract_button.setEnabled(True)
+        self.set_running(False)
 
     def save_urls_to_file(self):
         folder_path = QFileDialog.getExistingDirectory(self, "Chọn thư mục lưu file")
         if not folder_path:
             return
+        # Ghi file ở luồng nền để cửa sổ không bị treo với danh sách lớn
+        per_file = self.split_count.value() if self.split_files_check.isChecked() else None
+        self.status_label.setText("Đang lưu file...")
+        # Giao spool cho luồng ghi file: job sau tạo spool mới, không xoá spool đang được đọc
+        spool, self.spool = self.spool, None
+        self.export_worker = ExportThread(spool, folder_path,
+                                          self.format_combo.currentText(), per_file,
+                                          workers=min(8, os.cpu_count() or 1),
+                                          metrics=self.worker.engine.metrics)
+        self.export_worker.progress_signal.connect(self.update_export_progress)
+        self.export_worker.finished_signal.connect(self.export_finished)
+        self.export_worker.error_signal.connect(self.export_error)
+        self.export_worker.start()
+
+    def update_export_progress(self, done, total):
+        self.status_label.setText(f"Đang lưu file: {done}/{total}")
+
+    def export_finished(self, paths):
+        self.status_label.setText(f"Đã lưu {len(paths)} file.")
+        self.show_metrics(self.sender().metrics)
+        if len(paths) > 1:
+            folder_path = os.path.dirname(paths[0])
+            QMessageBox.information(self, "Thành công", f"Đã lưu {len(paths)} files tại:\n{folder_path}")
+        else:
+            QMessageBox.information(self, "Thành công", f"Đã lưu file tại:\n{paths[0]}")
+
+    def show_metrics(self, metrics):
+        self.metrics_label.setText(metrics.summary())
+        self.metrics_label.setToolTip(metrics.to_json())
+        # Lưu số liệu job gần nhất để theo dõi hồi quy hiệu năng
+        folder = os.path.join(default_cache_dir(), "metrics")
         try:
-            df = pd.DataFrame({"url": self.video_urls})
-
-            if self.split_files_check.isChecked() and len(self.video_urls) > self.split_count.value():
-                urls_per_file = self.split_count.value()
-                total_files = math.ceil(len(self.video_urls) / urls_per_file)
-                for i in range(total_files):
-                    start_idx = i * urls_per_file
-                    end_idx = min((i + 1) * urls_per_file, len(self.video_urls))
-                    file_df = df.iloc[start_idx:end_idx]
-                    file_df.to_excel(os.path.join(folder_path, f"youtube_urls_part{i+1}.xlsx"), index=False)
-                QMessageBox.information(self, "Thành công", f"Đã lưu {total_files} files tại:\n{folder_path}")
-            else:
-                file_path = os.path.join(folder_path, "youtube_urls.xlsx")
-                df.to_excel(file_path, index=False)
-                QMessageBox.information(self, "Thành công", f"Đã lưu file tại:\n{file_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Lỗi", f"Lỗi khi lưu file: {str(e)}")
+            metrics.dump(os.path.join(folder, "last_job.json"))
+            metrics.dump(os.path.join(folder, "last_job.prom"))
+        except OSError:
+            pass
+
+    def export_error(self, error_message):
+        self.status_label.setText("Lỗi khi lưu file!")
+        QMessageBox.critical(self, "Lỗi", f"Lỗi khi lưu file: {error_message}")
 
 
 if __name__ == "__main__":
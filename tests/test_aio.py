@@ -0,0 +1,82 @@
+"""AsyncApiEngine với Data API giả lập (benchmarks/offline_stub.py), không cần mạng."""
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+
+import cue_engine  # noqa: E402
+import offline_stub  # noqa: E402
+from cue_aio import AsyncApiEngine, AsyncHttpClient  # noqa: E402
+
+
+class FlakyPagesEngine(AsyncApiEngine):
+    """Lần thử đầu của mỗi kênh lỗi sau ``fail_after`` trang playlistItems."""
+
+    fail_after = 2
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.failed = set()
+
+    async def _pages(self, uploads, limit=None):
+        pages = 0
+        async for ids in super()._pages(uploads, limit):
+            yield ids
+            pages += 1
+            if pages == self.fail_after and uploads not in self.failed:
+                self.failed.add(uploads)
+                raise RuntimeError("trang playlistItems lỗi (giả lập)")
+
+
+class AsyncApiEngineTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = offline_stub.StubApiServer()
+        cls.server.start()
+        cls._api_base = cue_engine.API_BASE
+        cue_engine.API_BASE = cls.server.base_url
+
+    @classmethod
+    def tearDownClass(cls):
+        cue_engine.API_BASE = cls._api_base
+        cls.server.stop()
+
+    def run_engine(self, engine_cls, channels, mode="all"):
+        rows = []
+        progress = []
+        engine = engine_cls(
+            "test-key", mode, video_count=5, backoff=0.01, progress_interval=0,
+            http=AsyncHttpClient(max_retries=0),
+            on_results=rows.extend, on_progress=lambda cur, tot: progress.append((cur, tot)),
+        )
+        return engine.run_sync(channels), rows, progress
+
+    def test_retried_channel_does_not_resend_rows(self):
+        results, rows, progress = self.run_engine(FlakyPagesEngine, [offline_stub.channel_id(200)])
+        self.assertEqual(results[0].attempts, 2)
+        self.assertTrue(results[0].ok)
+        urls = [r.url for r in rows]
+        self.assertEqual(len(urls), 200)
+        self.assertEqual(len(set(urls)), 200)
+        self.assertEqual(len(results[0].results), 200)
+        self.assertEqual(progress[-1], (200, 200))
+
+    def test_progress_total_with_retries(self):
+        channels = [offline_stub.channel_id(200), offline_stub.channel_id(120)]
+        results, rows, progress = self.run_engine(FlakyPagesEngine, channels)
+        self.assertEqual([r.attempts for r in results], [2, 2])
+        self.assertEqual(len(rows), 320)
+        self.assertEqual(progress[-1], (320, 320))
+
+    def test_clean_run_matches_flaky_run(self):
+        channels = [offline_stub.channel_id(200)]
+        _, clean, _ = self.run_engine(AsyncApiEngine, channels)
+        _, flaky, _ = self.run_engine(FlakyPagesEngine, channels)
+        self.assertEqual([r.url for r in clean], [r.url for r in flaky])
+
+
+if __name__ == "__main__":
+    unittest.main()